@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from .coalescing import coalesce_activity
+from .models import ActivityLog
+
+_current_buffer: ContextVar[Optional["ActivityBuffer"]] = ContextVar("activity_buffer", default=None)
+
+COPY_COLUMNS = ("user_id", "project_id", "action", "target_type", "target_id", "timestamp", "metadata")
+
+
+class _OnCommit:
+    """Moves an entry logged inside a transaction into its buffer once that transaction commits."""
+
+    def __init__(self, buffer: "ActivityBuffer", entry: ActivityLog):
+        self.buffer = buffer
+        self.entry = entry
+        self.done = False
+
+    def __call__(self) -> None:
+        if not self.done:
+            self.done = True
+            self.buffer.take(self.entry)
+
+
+class ActivityBuffer:
+    """Activity entries collected by ``buffered_activity`` and written together when it exits."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.entries: List[ActivityLog] = []
+        self.pending: List[_OnCommit] = []
+        self.closed = False
+        # Atomic blocks open when the buffer started; the buffer's own write happens inside them.
+        self.depth = len(connection.atomic_blocks)
+
+    @property
+    def actor_id(self) -> Optional[int]:
+        """Who is making the changes: the request's user, once the view has authenticated it."""
+        user = getattr(self.request, "user", None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.depth > 0
+
+    def add(self, entry: ActivityLog) -> None:
+        if len(connection.atomic_blocks) <= self.depth:
+            # No block opened since the buffer started: the entry is written in the same
+            # transaction as the change it describes, or after it was autocommitted.
+            self.entries.append(entry)
+            return
+        hook = _OnCommit(self, entry)
+        self.pending.append(hook)
+        transaction.on_commit(hook)
+
+    def take(self, entry: ActivityLog) -> None:
+        if self.closed:
+            # The transaction outlived the buffer: write the entry on its own.
+            self._write([entry])
+        else:
+            self.entries.append(entry)
+
+    def _survivors(self) -> List[ActivityLog]:
+        # Entries whose blocks were released into the transaction the buffer itself runs in:
+        # their hooks are still queued on it. Hooks of rolled-back blocks were dropped.
+        queued = {id(item[1]) for item in connection.run_on_commit}
+        survivors = []
+        for hook in self.pending:
+            if not hook.done and id(hook) in queued:
+                hook.done = True
+                survivors.append(hook.entry)
+        return survivors
+
+    def abort(self) -> None:
+        """The block failed: write only the entries of changes that have already committed."""
+        self.closed = True
+        for hook in self.pending:
+            hook.done = True
+        entries, self.entries = ([] if self.in_transaction else self.entries), []
+        self._write(entries)
+
+    def flush(self) -> None:
+        """Write the entries of committed changes and of those committing with the enclosing transaction."""
+        self.closed = True
+        entries, self.entries = self.entries + self._survivors(), []
+        self._write(entries)
+
+    def _write(self, entries: List[ActivityLog]) -> None:
+        if not entries:
+            return
+        if settings.ACTIVITY_LOG_ASYNC:
+            from .tasks import write_activity_batch
+
+            payload = [_to_payload(entry) for entry in entries]
+            # Only hand the batch over once the work it describes has committed.
+            transaction.on_commit(lambda: write_activity_batch.delay(payload))
+        else:
+            write_activity_logs(entries)
+
+
+def current_buffer() -> Optional[ActivityBuffer]:
+    return _current_buffer.get()
+
+
+@contextmanager
+def buffered_activity(request=None) -> Iterator[ActivityBuffer]:
+    """
+    Collect the ``create_activity_log`` calls made inside the block and write them with one
+    bulk insert when it exits; nested blocks share the outermost buffer. An entry logged in an
+    atomic block opened inside the buffer is only kept once that block commits, so work rolled
+    back leaves no activity while work committed before a later failure keeps its entries. If
+    the block raises, only entries of changes that have already committed are written.
+    ``request`` is the request the changes are made for; its user is recorded as the actor.
+    """
+    buffer = _current_buffer.get()
+    if buffer is not None:
+        yield buffer
+        return
+    buffer = ActivityBuffer(request)
+    token = _current_buffer.set(buffer)
+    try:
+        yield buffer
+    except BaseException:
+        buffer.abort()
+        raise
+    finally:
+        _current_buffer.reset(token)
+    buffer.flush()
+
+
+def write_activity_logs(entries: List[ActivityLog]) -> List[ActivityLog]:
+    """
+    Write ``entries``, folding rapid repeat updates into recent rows (``activity.coalescing``),
+    and insert the rest with ``bulk_create``, or with ``COPY`` for large batches on Postgres.
+    Returns the inserted entries followed by the updated rows.
+    """
+    inserts, updates = coalesce_activity(entries)
+    if updates:
+        ActivityLog.objects.bulk_update(updates, ["timestamp", "metadata"], batch_size=500)
+    if connection.vendor == "postgresql" and len(inserts) >= settings.ACTIVITY_LOG_COPY_THRESHOLD:
+        _copy_activity_logs(inserts)
+    elif inserts:
+        ActivityLog.objects.bulk_create(inserts, batch_size=500)
+    return inserts + updates
+
+
+def _copy_activity_logs(entries: List[ActivityLog]) -> None:
+    stream = io.StringIO()
+    writer = csv.writer(stream, quoting=csv.QUOTE_ALL)
+    for entry in entries:
+        writer.writerow([
+            "" if entry.user_id is None else entry.user_id,
+            "" if entry.project_id is None else entry.project_id,
+            entry.action,
+            entry.target_type,
+            entry.target_id,
+            entry.timestamp.isoformat(),
+            json.dumps(entry.metadata, cls=DjangoJSONEncoder),
+        ])
+    stream.seek(0)
+    # Every value is quoted so blank strings stay blank; only a missing user or project becomes NULL.
+    sql = (
+        f"COPY {ActivityLog._meta.db_table} ({', '.join(COPY_COLUMNS)}) "
+        f"FROM STDIN WITH (FORMAT csv, FORCE_NULL (user_id, project_id))"
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, stream)
+
+
+def _to_payload(entry: ActivityLog) -> dict:
+    return {
+        "user_id": entry.user_id,
+        "project_id": entry.project_id,
+        "action": entry.action,
+        "target_type": entry.target_type,
+        "target_id": entry.target_id,
+        "timestamp": entry.timestamp.isoformat(),
+        "metadata": entry.metadata,
+    }
+
+
+def from_payload(payload: dict) -> ActivityLog:
+    return ActivityLog(**{**payload, "timestamp": parse_datetime(payload["timestamp"])})
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .models import ActivityLog
+
+# Updates to the same target by the same actor within ACTIVITY_COALESCE_SECONDS share one row.
+# The actor is metadata["actor_id"] (the request user), not ``user``, which the task receivers
+# fill with the assignee; entries without a known actor are never merged.
+COALESCED_ACTIONS = frozenset({"task_updated", "subtask_updated", "comment_updated", "project_updated"})
+# Long text values are recorded as a preview; the feed shows what changed, not whole documents.
+CHANGE_PREVIEW_LENGTH = 200
+
+
+def _preview(value):
+    value = json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+    if isinstance(value, str) and len(value) > CHANGE_PREVIEW_LENGTH:
+        return value[:CHANGE_PREVIEW_LENGTH] + "…"
+    return value
+
+
+def field_changes(instance) -> Dict[str, list]:
+    """JSON-ready ``{field: [old, new]}`` of a ``TrackedFieldsMixin`` instance being saved."""
+    return {field: [_preview(old), _preview(new)] for field, (old, new) in instance.get_field_changes().items()}
+
+
+def merge_changes(earlier: dict, later: dict) -> dict:
+    """Keep each field's first old value and latest new value; fields edited back to where they started drop out."""
+    merged = dict(earlier)
+    for field, (old, new) in later.items():
+        merged[field] = [earlier[field][0] if field in earlier else old, new]
+    return {field: change for field, change in merged.items() if change[0] != change[1]}
+
+
+def merge_entry(row: ActivityLog, entry: ActivityLog) -> None:
+    """Fold ``entry`` into the earlier ``row`` for the same actor, action and target."""
+    row.metadata = {
+        **row.metadata,
+        **entry.metadata,
+        "changes": merge_changes(row.metadata.get("changes", {}), entry.metadata.get("changes", {})),
+        "coalesced": row.metadata.get("coalesced", 1) + entry.metadata.get("coalesced", 1),
+    }
+    row.timestamp = max(row.timestamp, entry.timestamp)
+
+
+def _key(entry: ActivityLog) -> Tuple:
+    return (entry.metadata.get("actor_id"), entry.action, entry.target_type, entry.target_id)
+
+
+def _coalescible(entry: ActivityLog) -> bool:
+    return entry.action in COALESCED_ACTIONS and bool(entry.target_id) and entry.metadata.get("actor_id") is not None
+
+
+def coalesce_activity(entries: List[ActivityLog]) -> Tuple[List[ActivityLog], List[ActivityLog]]:
+    """
+    Split ``entries`` into ``(new entries to insert, existing rows to update)``. Coalescible
+    entries are merged with each other first, then with the latest stored row of the same
+    key if that was written less than the window ago; the stored rows are found with one
+    query over the (target_type, target_id, -timestamp) index. The window is measured from
+    a row's last merged update, so a burst of edits collapses into one row.
+    """
+    window = timedelta(seconds=settings.ACTIVITY_COALESCE_SECONDS)
+    if not window:
+        return entries, []
+    inserts, latest = [], {}
+    for entry in entries:
+        if not _coalescible(entry):
+            inserts.append(entry)
+            continue
+        key = _key(entry)
+        previous = latest.get(key)
+        if previous is not None and entry.timestamp - previous.timestamp <= window:
+            merge_entry(previous, entry)
+            continue
+        latest[key] = entry
+        inserts.append(entry)
+
+    # Only the first batch entry of each key can continue a stored row.
+    first = {}
+    for entry in inserts:
+        if _coalescible(entry):
+            first.setdefault(_key(entry), entry)
+    if not first:
+        return inserts, []
+    condition = Q()
+    for actor_id, action, target_type, target_id in first:
+        condition |= Q(metadata__actor_id=actor_id, action=action, target_type=target_type, target_id=target_id)
+    since = min(entry.timestamp for entry in first.values()) - window
+    stored = {}
+    for row in ActivityLog.objects.filter(condition, timestamp__gte=since).order_by("timestamp", "id"):
+        stored[_key(row)] = row
+    updates = []
+    for key, entry in first.items():
+        row = stored.get(key)
+        if row is not None and timedelta(0) <= entry.timestamp - row.timestamp <= window:
+            merge_entry(row, entry)
+            updates.append(row)
+            inserts.remove(entry)
+    return inserts, updates
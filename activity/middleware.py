@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from .buffer import buffered_activity
+
+
+class ActivityBufferMiddleware:
+    """
+    Buffer the activity entries a request logs and write them together once the response is
+    ready, instead of one INSERT per event. Each entry is tied to the transaction that made
+    its change (``activity.buffer``), so a failed request still logs what it committed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_activity(request):
+            return self.get_response(request)
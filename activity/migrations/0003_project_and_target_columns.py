@@ -0,0 +1,60 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+# Rows copied per transaction, so the backfill never holds long locks on a large audit table.
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def backfill_project_ids(apps, schema_editor):
+    ActivityLog = apps.get_model("activity", "ActivityLog")
+    rows = ActivityLog.objects.filter(project__isnull=True).order_by("id")
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(id__gt=last_id).values_list("id", "metadata")[:BACKFILL_CHUNK_SIZE])
+        if not chunk:
+            return
+        last_id = chunk[-1][0]
+        by_project = {}
+        for log_id, metadata in chunk:
+            project_id = str(metadata.get("project_id")) if isinstance(metadata, dict) else ""
+            if project_id.isdigit():
+                by_project.setdefault(int(project_id), []).append(log_id)
+        with transaction.atomic(using=schema_editor.connection.alias):
+            for project_id, log_ids in by_project.items():
+                ActivityLog.objects.filter(pk__in=log_ids).update(project_id=project_id)
+
+
+class Migration(migrations.Migration):
+
+    # Each backfill chunk commits on its own.
+    atomic = False
+
+    dependencies = [
+        ('activity', '0002_keyset_indexes'),
+        ('projects', '0005_card_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylog',
+            name='project',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='projects.project'),
+        ),
+        migrations.RunPython(backfill_project_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['project', '-timestamp', '-id'], name='activity_project_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['project', 'action', '-timestamp', '-id'], name='activity_project_action_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['target_type', 'target_id', '-timestamp'], name='activity_target_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:04
+
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+TABLE = "activity_activitylog"
+UNPARTITIONED = "activity_activitylog_unpartitioned"
+COLUMNS = "id, user_id, project_id, action, target_type, target_id, timestamp, metadata"
+# Same as the ACTIVITY_PARTITIONS_AHEAD default; the beat job keeps extending it from here.
+PARTITIONS_AHEAD = 3
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_activity_log(apps, schema_editor):
+    # Postgres only: rebuild the table as range-partitioned by month on "timestamp". Partition
+    # keys must be part of the primary key, hence (id, timestamp). Other databases keep the
+    # plain table and archive by deleting rows instead.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [TABLE, f"{TABLE}_pkey"],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f"SELECT MIN(timestamp), now() FROM {TABLE}")
+        oldest, now = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{UNPARTITIONED}"')
+        cursor.execute(f'ALTER TABLE "{UNPARTITIONED}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{UNPARTITIONED}_pkey"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{UNPARTITIONED}" INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE) '
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, "timestamp")')
+        month = add_months((oldest or now).astimezone(timezone.utc), 0)
+        last = add_months(now.astimezone(timezone.utc), PARTITIONS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_y{month.year:04d}m{month.month:02d}" PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+            month = add_months(month, 1)
+        # Catches rows outside every monthly range instead of failing the insert.
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" ({COLUMNS}) SELECT {COLUMNS} FROM "{UNPARTITIONED}"')
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        sequence = cursor.fetchone()[0]
+        if sequence is None:
+            # A serial column: the copied default still uses the old sequence, so keep it alive.
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [UNPARTITIONED])
+            sequence = cursor.fetchone()[0]
+            cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{TABLE}".id')
+        else:
+            cursor.execute(f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM "{TABLE}"), 0) + 1, false)', [sequence])
+        cursor.execute(f'DROP TABLE "{UNPARTITIONED}"')
+        # The definitions still name the original table, which is now the partitioned one.
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0003_project_and_target_columns'),
+    ]
+
+    operations = [
+        # Kept partitioned on the way back; the model works the same on either table shape.
+        migrations.RunPython(partition_activity_log, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ActivityArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateTimeField(db_index=True)),
+                ('path', models.CharField(max_length=500)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('-month', '-id'),
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0004_monthly_partitions'),
+        ('projects', '0006_project_access'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activityarchive',
+            name='project',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='projects.project'),
+        ),
+        migrations.AddIndex(
+            model_name='activityarchive',
+            index=models.Index(fields=['project', 'month'], name='activity_archive_project_idx'),
+        ),
+    ]
@@ -7,6 +7,16 @@ from django.utils import timezone
 
 class ActivityLog(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="activity_logs")
+	# Audit rows outlive what they describe, so no database constraint ties them to the project.
+	project = models.ForeignKey(
+		"projects.Project",
+		on_delete=models.DO_NOTHING,
+		db_constraint=False,
+		db_index=False,
+		null=True,
+		blank=True,
+		related_name="+",
+	)
 	action = models.CharField(max_length=200)
 	target_type = models.CharField(max_length=255, blank=True)
 	target_id = models.CharField(max_length=255, blank=True)
@@ -15,7 +25,37 @@ class ActivityLog(models.Model):
 
 	class Meta:
 		ordering = ("-timestamp", "-id")
+		indexes = [
+			models.Index(fields=("-timestamp", "-id"), name="activity_recent_idx"),
+			models.Index(fields=("project", "-timestamp", "-id"), name="activity_project_recent_idx"),
+			models.Index(fields=("project", "action", "-timestamp", "-id"), name="activity_project_action_idx"),
+			models.Index(fields=("target_type", "target_id", "-timestamp"), name="activity_target_recent_idx"),
+		]
 
 	def __str__(self):
 		return f"{self.action} by {self.user_id} on {self.target_type}:{self.target_id} at {self.timestamp}"
 
+
+# Activity of one month and project moved out of the database into a gzipped NDJSON file once it
+# passed the retention window; the project feed reads these back for date ranges that reach that far.
+class ActivityArchive(models.Model):
+	month = models.DateTimeField(db_index=True)
+	project = models.ForeignKey(
+		"projects.Project",
+		on_delete=models.DO_NOTHING,
+		db_constraint=False,
+		db_index=False,
+		null=True,
+		blank=True,
+		related_name="+",
+	)
+	path = models.CharField(max_length=500)
+	row_count = models.PositiveIntegerField(default=0)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		ordering = ("-month", "-id")
+		indexes = [models.Index(fields=("project", "month"), name="activity_archive_project_idx")]
+
+	def __str__(self):
+		return f"Activity for {self.month:%Y-%m} in {self.path}"
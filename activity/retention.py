@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import re
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.pagination import keyset_filter
+
+from .models import ActivityArchive, ActivityLog
+
+logger = logging.getLogger(__name__)
+
+TABLE = ActivityLog._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_RE = re.compile(rf"^{TABLE}_y(?P<year>\d{{4}})m(?P<month>\d{{2}})$")
+ARCHIVE_COLUMNS = ("id", "user_id", "project_id", "action", "target_type", "target_id", "timestamp", "metadata")
+ARCHIVE_ORDERING = ("project_id", "timestamp", "id")
+FEED_ORDERING = ("-timestamp", "-id")
+EXPORT_CHUNK_SIZE = 2000
+
+
+def month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def retention_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Start of the oldest month kept in the database; everything before it gets archived."""
+    return add_months(month_start(now or timezone.now()), -settings.ACTIVITY_RETENTION_MONTHS)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def archive_storage() -> FileSystemStorage:
+    return FileSystemStorage(location=settings.ACTIVITY_ARCHIVE_ROOT)
+
+
+# Partitions (Postgres)
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def _partition_tables() -> dict:
+    """Monthly partition tables by name, attached or not, mapped to whether they are attached."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid AND i.inhparent = %s::regclass) "
+            "FROM pg_class c WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace AND c.relname LIKE %s",
+            [TABLE, f"{TABLE}\\_y%"],
+        )
+        return {name: attached for name, attached in cursor.fetchall() if PARTITION_RE.match(name)}
+
+
+def _partition_month(name: str) -> datetime:
+    match = PARTITION_RE.match(name)
+    return datetime(int(match["year"]), int(match["month"]), 1, tzinfo=dt_timezone.utc)
+
+
+def _create_partition(cursor, month: datetime) -> None:
+    """Create ``month``'s partition, moving in the rows the default partition caught for it meanwhile."""
+    name, end = partition_name(month), add_months(month, 1)
+    bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+    # Blocks writes to the default partition until commit, so no row for the month slips in.
+    cursor.execute(f'LOCK TABLE "{DEFAULT_PARTITION}" IN EXCLUSIVE MODE')
+    in_month = '"timestamp" >= %s AND "timestamp" < %s'
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE {in_month})', [month, end])
+    if not cursor.fetchone()[0]:
+        cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" {bounds}')
+        return
+    # Postgres refuses a partition for a range the default partition holds rows of, so fill a
+    # plain table with those rows first and attach it once the default no longer has them.
+    columns = ", ".join(ARCHIVE_COLUMNS)
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}")')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_month} RETURNING {columns}) '
+        f'INSERT INTO "{name}" ({columns}) SELECT {columns} FROM moved',
+        [month, end],
+    )
+    cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" {bounds}')
+
+
+def ensure_partitions(now: Optional[datetime] = None, ahead: Optional[int] = None) -> List[str]:
+    """
+    Create the partitions for this month and ``ahead`` months after it, so inserts never land
+    in the default partition. Returns the names created; a no-op unless the table is partitioned.
+    """
+    if not is_partitioned():
+        return []
+    ahead = settings.ACTIVITY_PARTITIONS_AHEAD if ahead is None else ahead
+    current = month_start(now or timezone.now())
+    existing = _partition_tables()
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            _create_partition(cursor, month)
+        created.append(name)
+    return created
+
+
+# Archiving
+
+def expired_months(cutoff: datetime) -> List[datetime]:
+    if is_partitioned():
+        # Detached partitions left behind by an interrupted run are picked up again here, and so
+        # are months that never had a partition and only live in the default one.
+        months = {_partition_month(name) for name in _partition_tables()}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT DISTINCT date_trunc('month', \"timestamp\", 'UTC') "
+                f'FROM "{DEFAULT_PARTITION}" WHERE "timestamp" < %s',
+                [cutoff],
+            )
+            months.update(month.astimezone(dt_timezone.utc) for (month,) in cursor.fetchall())
+    else:
+        months = set(ActivityLog.objects.filter(timestamp__lt=cutoff).datetimes("timestamp", "month", tzinfo=dt_timezone.utc))
+    return sorted(month for month in months if month < cutoff)
+
+
+def _archive_row(row: Sequence) -> str:
+    entry = dict(zip(ARCHIVE_COLUMNS, row))
+    if isinstance(entry["metadata"], str):
+        entry["metadata"] = json.loads(entry["metadata"])
+    return json.dumps(entry, cls=DjangoJSONEncoder) + "\n"
+
+
+def _write_archive(
+    month: datetime, project_id: Optional[int], rows: Iterable[Sequence], moment: datetime
+) -> ActivityArchive:
+    row_count = 0
+    name = f"{month:%Y-%m}/project-{project_id or 'none'}/activity-{moment:%Y%m%d%H%M%S}.ndjson.gz"
+    with tempfile.TemporaryFile() as spool:
+        with gzip.GzipFile(fileobj=spool, mode="wb") as archive:
+            for row in rows:
+                archive.write(_archive_row(row).encode())
+                row_count += 1
+        spool.seek(0)
+        path = archive_storage().save(name, File(spool))
+    return ActivityArchive(month=month, project_id=project_id, path=path, row_count=row_count)
+
+
+def write_archives(month: datetime, rows: Iterable[Sequence]) -> List[ActivityArchive]:
+    """
+    Write ``rows`` (in ``ARCHIVE_COLUMNS`` order, sorted by ``ARCHIVE_ORDERING``) to one gzipped
+    NDJSON file per project, so a project's feed only reads its own files; the records are not saved.
+    """
+    moment = timezone.now()
+    by_project = groupby(rows, key=itemgetter(ARCHIVE_COLUMNS.index("project_id")))
+    return [_write_archive(month, project_id, group, moment) for project_id, group in by_project]
+
+
+def _partition_rows(name: str):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {", ".join(ARCHIVE_COLUMNS)} FROM "{name}" ORDER BY {", ".join(ARCHIVE_ORDERING)}')
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                return
+            yield from rows
+
+
+def archive_month(month: datetime) -> List[ActivityArchive]:
+    """
+    Move one month of activity into archive files. On Postgres the month's partition is
+    detached first, in its own short transaction, then exported and dropped; a month only the
+    default partition holds gets a partition of its own to detach. Elsewhere the rows are
+    exported and deleted. The archive records commit together with the removal, so a month is
+    never both archived and live.
+    """
+    end = add_months(month, 1)
+    if is_partitioned():
+        name = partition_name(month)
+        attached = _partition_tables().get(name)
+        if attached is None:
+            with transaction.atomic(), connection.cursor() as cursor:
+                _create_partition(cursor, month)
+            attached = True
+        if attached:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+        archives = write_archives(month, _partition_rows(name))
+        with transaction.atomic(), connection.cursor() as cursor:
+            ActivityArchive.objects.bulk_create(archives)
+            cursor.execute(f'DROP TABLE "{name}"')
+    else:
+        rows = ActivityLog.objects.filter(timestamp__gte=month, timestamp__lt=end).order_by(*ARCHIVE_ORDERING)
+        archives = write_archives(month, rows.values_list(*ARCHIVE_COLUMNS).iterator(chunk_size=EXPORT_CHUNK_SIZE))
+        with transaction.atomic():
+            ActivityArchive.objects.bulk_create(archives)
+            rows.delete()
+    logger.info(
+        "Archived %s activity entries from %s into %s files",
+        sum(archive.row_count for archive in archives),
+        f"{month:%Y-%m}",
+        len(archives),
+    )
+    return archives
+
+
+def archive_expired_activity(now: Optional[datetime] = None) -> List[datetime]:
+    """Archive every month that has fallen out of ``ACTIVITY_RETENTION_MONTHS``; returns those months."""
+    months = expired_months(retention_cutoff(now))
+    for month in months:
+        archive_month(month)
+    return months
+
+
+# Reading archives back
+
+def archive_horizon() -> Optional[datetime]:
+    """End of the newest archived month: feeds reaching before it need the archives."""
+    newest = ActivityArchive.objects.aggregate(newest=Max("month"))["newest"]
+    return None if newest is None else add_months(newest, 1)
+
+
+def read_archive(archive: ActivityArchive):
+    with archive_storage().open(archive.path, "rb") as handle, gzip.open(handle, "rt") as lines:
+        for line in lines:
+            entry = json.loads(line)
+            yield ActivityLog(**{**entry, "timestamp": parse_datetime(entry["timestamp"])})
+
+
+def archived_activity(
+    project_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    actions: Sequence[str] = (),
+) -> List[ActivityLog]:
+    """A project's archived entries in ``[since, until)``, newest first; only its files for months in range are read."""
+    archives = ActivityArchive.objects.filter(project_id=project_id).order_by("month", "id")
+    if since is not None:
+        archives = archives.filter(month__gte=month_start(since))
+    if until is not None:
+        archives = archives.filter(month__lt=until)
+    entries = [
+        entry
+        for archive in archives
+        for entry in read_archive(archive)
+        if (not actions or entry.action in actions)
+        and (since is None or entry.timestamp >= since)
+        and (until is None or entry.timestamp < until)
+    ]
+    entries.sort(key=lambda entry: (entry.timestamp, entry.id), reverse=True)
+    return entries
+
+
+class ActivityTimeline:
+    """
+    Live entries followed by archived ones, newest first, sliceable like a queryset so the
+    feed paginators can page through both. The archives are only read once a page runs past
+    the live rows (or a page count is needed).
+    """
+
+    def __init__(self, live, load_archived: Callable[[], List[ActivityLog]]):
+        self.live = live.order_by(*FEED_ORDERING)
+        self._load_archived = load_archived
+        self._archived: Optional[List[ActivityLog]] = None
+
+    @property
+    def archived(self) -> List[ActivityLog]:
+        if self._archived is None:
+            self._archived = self._load_archived()
+        return self._archived
+
+    def order_by(self, *ordering) -> "ActivityTimeline":
+        if tuple(ordering) != FEED_ORDERING:
+            raise ValueError(f"Archived activity can only be read in {FEED_ORDERING} order.")
+        return self
+
+    def after(self, values: Sequence) -> "ActivityTimeline":
+        """The entries after the one whose ``FEED_ORDERING`` values are ``values`` (a decoded cursor)."""
+        live = self.live.filter(keyset_filter(ActivityLog, FEED_ORDERING, values))
+        timestamp, pk = ActivityLog._meta.get_field("timestamp").to_python(values[0]), int(values[1])
+        return ActivityTimeline(
+            live, lambda: [entry for entry in self.archived if (entry.timestamp, entry.id) < (timestamp, pk)]
+        )
+
+    def count(self) -> int:
+        return self.live.count() + len(self.archived)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        rows = list(self.live[start:stop])
+        if stop is not None and len(rows) == stop - start:
+            return rows
+        live_count = start + len(rows) if rows else self.live.count()
+        archived_stop = None if stop is None else max(stop - live_count, 0)
+        return rows + self.archived[max(start - live_count, 0):archived_stop]
@@ -8,5 +8,5 @@ from .models import ActivityLog
 class ActivityLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = ActivityLog
-        fields = ("id", "user", "action", "target_type", "target_id", "timestamp", "metadata")
+        fields = ("id", "user", "project", "action", "target_type", "target_id", "timestamp", "metadata")
         read_only_fields = ("id", "timestamp")
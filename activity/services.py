@@ -2,32 +2,55 @@ from __future__ import annotations
 
 from typing import Any, Optional
 
-from django.contrib.contenttypes.models import ContentType
-from django.db import transaction
+from projects.models import Project
 
+from .buffer import current_buffer, write_activity_logs
 from .models import ActivityLog
 
 
-@transaction.atomic
+def _project_id(target, metadata: dict) -> Optional[int]:
+    # Callers put the project in the metadata; fall back to the target's own project.
+    project_id = str(metadata.get("project_id", ""))
+    if project_id.isdigit():
+        return int(project_id)
+    if isinstance(target, Project):
+        return target.pk
+    return getattr(target, "project_id", None)
+
+
 def create_activity_log(user: Optional[Any], action: str, target: Optional[Any] = None, metadata: Optional[dict] = None) -> ActivityLog:
     """
     Helper that creates an ActivityLog for a given action and target object.
     The `target` can be any model instance; we store its content type and pk.
     If the target has a `project_id` property or metadata indicating a `project_id` this function will not modify it; signals should pass along project context.
+    The user making the request is recorded as ``metadata["actor_id"]``; signal receivers log
+    the task's assignee as ``user``, which need not be who made the change.
+    Inside ``activity.buffer.buffered_activity`` (every request runs in one) the entry is queued
+    and the returned instance is unsaved until the buffer flushes; it is dropped if the atomic
+    block it was logged in rolls back. Outside one, a repeat update within the coalescing
+    window returns the earlier row it was merged into.
     """
     if metadata is None:
         metadata = {}
+    buffer = current_buffer()
+    if buffer is not None and buffer.actor_id is not None and "actor_id" not in metadata:
+        metadata = {**metadata, "actor_id": buffer.actor_id}
     target_type = ""
     target_id = ""
     if target is not None:
-        ct = ContentType.objects.get_for_model(target.__class__)
-        target_type = f"{ct.app_label}.{ct.model}"
+        # Same "app_label.model" a ContentType lookup would give, without the query.
+        opts = target._meta.concrete_model._meta
+        target_type = f"{opts.app_label}.{opts.model_name}"
         target_id = str(getattr(target, "pk", getattr(target, "id", "")))
-    log = ActivityLog.objects.create(
+    log = ActivityLog(
         user=user if user is not None else None,
+        project_id=_project_id(target, metadata),
         action=action,
         target_type=target_type,
         target_id=target_id,
         metadata=metadata,
     )
-    return log
+    if buffer is not None:
+        buffer.add(log)
+        return log
+    return write_activity_logs([log])[0]
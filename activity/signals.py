@@ -6,6 +6,7 @@ from tasks.models import Task, Subtask
 from comments.models import Comment
 from projects.models import Project
 
+from .coalescing import field_changes
 from .services import create_activity_log
 
 logger = logging.getLogger(__name__)
@@ -14,6 +15,8 @@ logger = logging.getLogger(__name__)
 @receiver(post_save, sender=Task)
 def task_activity(sender, instance, created, **kwargs):
     data = {"project_id": str(instance.project_id)}
+    if not created:
+        data["changes"] = field_changes(instance)
     action = "task_created" if created else "task_updated"
     create_activity_log(user=getattr(instance, "assigned_to", None), action=action, target=instance, metadata=data)
 
@@ -22,18 +25,17 @@ def task_activity(sender, instance, created, **kwargs):
 def task_move_activity(sender, instance, **kwargs):
     if not instance.pk:
         return
-    try:
-        old = Task.objects.get(pk=instance.pk)
-    except Task.DoesNotExist:
-        return
-    if old.board_list_id != instance.board_list_id:
-        data = {"project_id": str(instance.project_id), "from_list": str(old.board_list_id), "to_list": str(instance.board_list_id)}
+    changes = instance.get_field_changes()
+    if "board_list_id" in changes:
+        data = {"project_id": str(instance.project_id), "from_list": str(changes["board_list_id"][0]), "to_list": str(instance.board_list_id)}
         create_activity_log(user=getattr(instance, "assigned_to", None), action="task_moved", target=instance, metadata=data)
 
 
 @receiver(post_save, sender=Subtask)
 def subtask_activity(sender, instance, created, **kwargs):
     data = {"project_id": str(instance.task.project_id), "task_id": str(instance.task_id)}
+    if not created:
+        data["changes"] = field_changes(instance)
     action = "subtask_created" if created else "subtask_updated"
     # Use the task's assigned user as the actor if available
     user = getattr(instance.task, "assigned_to", None)
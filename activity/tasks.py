@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import logging
+from typing import List
+
+from celery import shared_task
+
+from .buffer import from_payload, write_activity_logs
+from .retention import archive_expired_activity, ensure_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def write_activity_batch(self, entries: List[dict]) -> int:
+    write_activity_logs([from_payload(entry) for entry in entries])
+    logger.info("Wrote %s buffered activity entries", len(entries))
+    return len(entries)
+
+
+@shared_task(bind=True)
+def maintain_activity_partitions(self) -> int:
+    created = ensure_partitions()
+    months = archive_expired_activity()
+    logger.info("Created %s activity partitions, archived %s months", len(created), len(months))
+    return len(months)
@@ -1,14 +1,30 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from projects.models import Project, ProjectMember
 from teams.models import Team, TeamMember
 from boards.models import Board, BoardList
-from tasks.models import Task
+from tasks.models import Subtask, Task
 from comments.models import Comment
-from .models import ActivityLog
+from .buffer import buffered_activity
+from .middleware import ActivityBufferMiddleware
+from .models import ActivityArchive, ActivityLog
+from .retention import DEFAULT_PARTITION, add_months, ensure_partitions, month_start, partition_name
+from .services import create_activity_log
+from .tasks import maintain_activity_partitions
+from .views import ActivityPagination
 
 User = get_user_model()
 
@@ -37,3 +53,203 @@ class ActivityApiTests(APITestCase):
 		data = response.data.get("results", response.data)
 		self.assertTrue(any(item["metadata"].get("project_id") == str(self.project.id) for item in data))
 
+
+	def test_patching_the_list_logs_one_move(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Task X")
+		target = BoardList.objects.filter(board=self.board).exclude(pk=self.list_todo.pk).first()
+		response = self.client.patch(
+			reverse("tasks:tasks-detail", args=[task.id]), {"board_list_id": target.id, "title": "Moved"}, format="json"
+		)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		logs = ActivityLog.objects.filter(target_type="tasks.task", target_id=str(task.id)).exclude(action="task_created")
+		self.assertEqual(sorted(log.action for log in logs), ["task_moved", "task_updated"])
+		self.assertEqual(set(logs.get(action="task_updated").metadata["changes"]), {"title"})
+
+	def test_request_writes_its_activity_in_one_insert(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Task Y", position=1)
+		target = BoardList.objects.filter(board=self.board).last()
+		url = reverse("tasks:tasks-detail", args=[task.id])
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.patch(url, {"title": "Moved", "board_list_id": target.id}, format="json")
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		inserts = [query for query in queries.captured_queries if query["sql"].startswith('INSERT INTO "activity_activitylog"')]
+		self.assertEqual(len(inserts), 1)
+		self.assertEqual(
+			set(ActivityLog.objects.filter(target_type="tasks.task", target_id=str(task.id)).values_list("action", flat=True)),
+			{"task_created", "task_moved", "task_updated"},
+		)
+		self.assertEqual(ActivityLog.objects.get(action="task_updated", target_id=str(task.id)).metadata["actor_id"], self.user.id)
+
+	def test_buffer_drops_entries_when_the_block_fails(self):
+		with self.assertRaises(RuntimeError):
+			with buffered_activity():
+				with buffered_activity() as inner:
+					create_activity_log(self.user, "doomed", target=self.project)
+					self.assertEqual(len(inner.entries), 1)
+				raise RuntimeError("rolled back")
+		self.assertFalse(ActivityLog.objects.filter(action="doomed").exists())
+
+	def test_buffered_entries_follow_the_transaction_that_logged_them(self):
+		def view(request):
+			with transaction.atomic():
+				create_activity_log(self.user, "committed_chunk", target=self.project)
+			with self.assertRaises(RuntimeError):
+				with transaction.atomic():
+					create_activity_log(self.user, "rolled_back_chunk", target=self.project)
+					raise RuntimeError("chunk failed")
+			return HttpResponse(status=500)
+
+		response = ActivityBufferMiddleware(view)(RequestFactory().post("/"))
+		self.assertEqual(response.status_code, 500)
+		self.assertTrue(ActivityLog.objects.filter(action="committed_chunk").exists())
+		self.assertFalse(ActivityLog.objects.filter(action="rolled_back_chunk").exists())
+
+	@override_settings(ACTIVITY_LOG_ASYNC=True)
+	def test_async_mode_hands_batches_to_celery_after_commit(self):
+		with self.captureOnCommitCallbacks() as callbacks:
+			with buffered_activity():
+				create_activity_log(self.user, "queued", target=self.project, metadata={"project_id": str(self.project.id)})
+		self.assertFalse(ActivityLog.objects.filter(action="queued").exists())
+		for callback in callbacks:
+			callback()
+		log = ActivityLog.objects.get(action="queued")
+		self.assertEqual((log.user_id, log.target_type), (self.user.id, "projects.project"))
+
+	def _save_as(self, user, instance):
+		request = RequestFactory().patch("/")
+		request.user = user
+		with buffered_activity(request):
+			instance.save()
+
+	def test_rapid_updates_coalesce_into_one_row(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Draft", position=1)
+		task.title = "Final"
+		self._save_as(self.user, task)
+		task.description = "Notes"
+		task.priority = Task.PriorityChoices.HIGH
+		self._save_as(self.user, task)
+		task.priority = Task.PriorityChoices.MEDIUM
+		self._save_as(self.user, task)
+		log = ActivityLog.objects.get(action="task_updated", target_id=str(task.id))
+		self.assertEqual(log.metadata["changes"], {"title": ["Draft", "Final"], "description": ["", "Notes"]})
+		self.assertEqual((log.metadata["coalesced"], log.metadata["actor_id"]), (3, self.user.id))
+
+		subtask = Subtask.objects.create(task=task, title="Step")
+		for completed in (True, False, True):
+			subtask.completed = completed
+			self._save_as(self.user, subtask)
+		log = ActivityLog.objects.get(action="subtask_updated")
+		self.assertEqual((log.metadata["changes"], log.metadata["coalesced"]), ({"completed": [False, True]}, 3))
+
+		# Another editor, or one that is unknown, gets a row of their own.
+		teammate = User.objects.create_user(email="teammate@example.com", password="StrongPass123")
+		task.title = "Theirs"
+		self._save_as(teammate, task)
+		task.title = "Anonymous"
+		task.save()
+		task.title = "Anonymous again"
+		task.save()
+		self.assertEqual(ActivityLog.objects.filter(action="task_updated").count(), 4)
+
+		# Past the window a new row starts.
+		ActivityLog.objects.filter(action="task_updated").update(timestamp=timezone.now() - timedelta(minutes=5))
+		task.title = "Later"
+		self._save_as(self.user, task)
+		self.assertEqual(ActivityLog.objects.filter(action="task_updated").count(), 5)
+		with self.settings(ACTIVITY_COALESCE_SECONDS=0):
+			task.title = "Again"
+			self._save_as(self.user, task)
+		self.assertEqual(ActivityLog.objects.filter(action="task_updated").count(), 6)
+
+	def test_project_feed_filters_by_action_and_date_range(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Task Z", position=1)
+		Comment.objects.create(task=task, user=self.user, text="Hi")
+		ActivityLog.objects.filter(action="task_created").update(timestamp=timezone.now() - timedelta(days=3))
+		url = reverse("activity:project-activity", args=[self.project.id])
+
+		response = self.client.get(url, {"action": "task_created,comment_created"})
+		self.assertEqual({item["action"] for item in response.data["results"]}, {"task_created", "comment_created"})
+		since = (timezone.now() - timedelta(days=1)).isoformat()
+		response = self.client.get(url, {"action": "task_created,comment_created", "since": since})
+		self.assertEqual([item["action"] for item in response.data["results"]], ["comment_created"])
+		self.assertEqual(self.client.get(url, {"since": "yesterday"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+		outsider = User.objects.create_user(email="outsider@example.com", password="StrongPass123")
+		self.client.force_authenticate(outsider)
+		self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+	def test_task_timeline_includes_comments_and_subtasks(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Timeline", position=1)
+		other = Task.objects.create(project=self.project, board_list=self.list_todo, title="Other", position=2)
+		Subtask.objects.create(task=task, title="Step")
+		Comment.objects.create(task=task, user=self.user, text="Note")
+		Comment.objects.create(task=other, user=self.user, text="Elsewhere")
+		response = self.client.get(reverse("activity:task-activity", args=[task.id]))
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(
+			sorted(item["action"] for item in response.data["results"]),
+			["comment_created", "subtask_created", "task_created"],
+		)
+
+	def test_feeds_are_served_from_indexes(self):
+		queries = (
+			ActivityLog.objects.filter(project=self.project, action="task_created"),
+			ActivityLog.objects.filter(project=self.project, timestamp__gte=timezone.now()),
+			ActivityLog.objects.filter(target_type="tasks.task", target_id="1"),
+		)
+		for queryset in queries:
+			with transaction.atomic(), connection.cursor() as cursor:
+				if connection.vendor == "postgresql":
+					# The test table is tiny; make the planner show which index it would use at scale.
+					cursor.execute("SET LOCAL enable_seqscan = off")
+				plan = queryset.explain()
+			self.assertNotRegex(plan, r"Seq Scan on activity_activitylog\b|SCAN activity_activitylog\b", plan)
+
+	def test_expired_months_are_archived_and_still_served_for_old_ranges(self):
+		archive_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, archive_root, ignore_errors=True)
+		ActivityLog.objects.all().delete()
+		old_month = add_months(month_start(timezone.now()), -3)
+		for day, action in ((1, "ancient"), (2, "ancient"), (3, "older")):
+			ActivityLog.objects.create(user=self.user, project=self.project, action=action, timestamp=old_month + timedelta(days=day))
+		ActivityLog.objects.create(user=self.user, project=None, action="ancient", timestamp=old_month + timedelta(days=4))
+		recent = ActivityLog.objects.create(user=self.user, project=self.project, action="recent")
+
+		with self.settings(ACTIVITY_RETENTION_MONTHS=1, ACTIVITY_ARCHIVE_ROOT=archive_root):
+			self.assertEqual(maintain_activity_partitions(), 1)
+			self.assertFalse(ActivityLog.objects.filter(timestamp__lt=old_month + timedelta(days=10)).exists())
+			# One file per project, so the project feed below never opens the other one.
+			archives = {(archive.project_id, archive.month, archive.row_count) for archive in ActivityArchive.objects.all()}
+			self.assertEqual(archives, {(self.project.id, old_month, 3), (None, old_month, 1)})
+
+			url = reverse("activity:project-activity", args=[self.project.id])
+			self.assertEqual([item["id"] for item in self.client.get(url).data["results"]], [recent.id])
+			since = (old_month - timedelta(days=1)).isoformat()
+			response = self.client.get(url, {"since": since})
+			self.assertEqual([item["action"] for item in response.data["results"]], ["recent", "older", "ancient", "ancient"])
+			self.assertEqual(response.data["count"], 4)
+			with mock.patch.object(ActivityPagination, "page_size", 1):
+				response = self.client.get(url, {"since": since, "action": "ancient", "page": 2})
+			self.assertEqual([item["timestamp"] for item in response.data["results"]], [(old_month + timedelta(days=1)).isoformat().replace("+00:00", "Z")])
+
+			pages, params = [], {"since": since, "pagination": "cursor", "page_size": 2}
+			while True:
+				response = self.client.get(url, params)
+				pages.append([item["action"] for item in response.data["results"]])
+				if not response.data["next"]:
+					break
+				params["cursor"] = response.data["next"].split("cursor=")[1].split("&")[0]
+			self.assertEqual(pages, [["recent", "older"], ["ancient", "ancient"]])
+
+	def test_partition_creation_moves_rows_out_of_the_default_partition(self):
+		if connection.vendor != "postgresql":
+			self.skipTest("Only Postgres partitions the activity log.")
+		month = add_months(month_start(timezone.now()), 24)
+		caught = ActivityLog.objects.create(user=self.user, project=self.project, action="early", timestamp=month + timedelta(days=2))
+
+		self.assertEqual(ensure_partitions(now=month, ahead=0), [partition_name(month)])
+		with connection.cursor() as cursor:
+			cursor.execute(f'SELECT id FROM "{partition_name(month)}"')
+			self.assertEqual(cursor.fetchall(), [(caught.id,)])
+			cursor.execute(f'SELECT count(*) FROM "{DEFAULT_PARTITION}"')
+			self.assertEqual(cursor.fetchone(), (0,))
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import ProjectActivityListView
+from .views import ProjectActivityListView, TaskActivityListView
 
 app_name = "activity"
 
 urlpatterns = [
     path("projects/<int:project_pk>/", ProjectActivityListView.as_view(), name="project-activity"),
+    path("tasks/<int:task_pk>/", TaskActivityListView.as_view(), name="task-activity"),
 ]
@@ -1,20 +1,87 @@
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
 from rest_framework import generics, permissions
-from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 
-from projects.permissions import IsProjectMember
+from comments.models import Comment
+from core.pagination import KeysetPagination
 from projects.models import Project
+from projects.visibility import visible_to
+from tasks.models import Subtask, Task
 
 from .models import ActivityLog
+from .retention import ActivityTimeline, archive_horizon, archived_activity
 from .serializers import ActivityLogSerializer
 
 
-class ProjectActivityListView(generics.ListAPIView):
+class ActivityPagination(KeysetPagination):
+	ordering = ("-timestamp", "-id")
+
+	def rows_after(self, queryset, values):
+		if isinstance(queryset, ActivityTimeline):
+			return queryset.after(values)
+		return super().rows_after(queryset, values)
+
+
+class ActivityListView(generics.ListAPIView):
+	"""Shared filters: ?action=a,b and an ISO ?since=/&until= range on the timestamp."""
+
 	serializer_class = ActivityLogSerializer
-	permission_classes = (permissions.IsAuthenticated, IsProjectMember)
+	pagination_class = ActivityPagination
+	permission_classes = (permissions.IsAuthenticated,)
+
+	def requested_actions(self):
+		return [action for action in self.request.query_params.get("action", "").split(",") if action]
 
+	def requested_range(self):
+		moments = []
+		for param in ("since", "until"):
+			value = self.request.query_params.get(param)
+			moment = parse_datetime(value) if value else None
+			if value and moment is None:
+				raise ValidationError({param: "Use an ISO 8601 date-time."})
+			moments.append(moment)
+		return tuple(moments)
+
+	def filter_activity(self, queryset):
+		actions = self.requested_actions()
+		if actions:
+			queryset = queryset.filter(action__in=actions)
+		since, until = self.requested_range()
+		if since is not None:
+			queryset = queryset.filter(timestamp__gte=since)
+		if until is not None:
+			queryset = queryset.filter(timestamp__lt=until)
+		return queryset
+
+
+class ProjectActivityListView(ActivityListView):
 	def get_queryset(self):
-		project_pk = self.kwargs.get("project_pk")
-		# Only include activity logs that include project id in metadata
-		return ActivityLog.objects.filter(metadata__project_id=str(project_pk))
+		project = get_object_or_404(visible_to(Project.objects.all(), self.request, "pk"), pk=self.kwargs.get("project_pk"))
+		# Served from (project, -timestamp, -id), or (project, action, ...) when filtering by action
+		queryset = self.filter_activity(ActivityLog.objects.filter(project=project))
+		# Without a date range the feed covers the retention window; a range starting before
+		# the newest archived month continues into the archive files.
+		since, until = self.requested_range()
+		horizon = archive_horizon()
+		start = since or until
+		if horizon is None or start is None or start >= horizon:
+			return queryset
+		actions = self.requested_actions()
+		return ActivityTimeline(queryset, lambda: archived_activity(project.pk, since, until, actions))
 
+
+class TaskActivityListView(ActivityListView):
+	def get_queryset(self):
+		task = get_object_or_404(visible_to(Task.objects.all(), self.request), pk=self.kwargs.get("task_pk"))
+		# The task's own entries plus those of its subtasks and comments, each looked up through
+		# the (target_type, target_id, -timestamp) index.
+		subtask_ids = [str(pk) for pk in Subtask.objects.filter(task=task).values_list("id", flat=True)]
+		comment_ids = [str(pk) for pk in Comment.objects.filter(task=task).values_list("id", flat=True)]
+		timeline = (
+			Q(target_type="tasks.task", target_id=str(task.pk))
+			| Q(target_type="tasks.subtask", target_id__in=subtask_ids)
+			| Q(target_type="comments.comment", target_id__in=comment_ids)
+		)
+		return self.filter_activity(ActivityLog.objects.filter(timeline))
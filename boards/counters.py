@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from projects.models import Project
+from tasks.models import Task
+
+from .models import Board, BoardList
+
+COUNTER_FIELDS = ("task_count", "high_priority_count", "medium_priority_count", "low_priority_count", "overdue_count")
+PRIORITY_COUNTERS = {
+    Task.PriorityChoices.HIGH: "high_priority_count",
+    Task.PriorityChoices.MEDIUM: "medium_priority_count",
+    Task.PriorityChoices.LOW: "low_priority_count",
+}
+
+# board_list_id -> {counter field: delta}
+CounterDeltas = Dict[int, Counter]
+
+
+def card_counts(priority: str, due_date: Optional[datetime], now: datetime, sign: int = 1) -> Counter:
+    """What one card with these values contributes to its list's counters."""
+    counts = Counter(task_count=sign)
+    if priority in PRIORITY_COUNTERS:
+        counts[PRIORITY_COUNTERS[priority]] += sign
+    if due_date is not None and due_date < now:
+        counts["overdue_count"] += sign
+    return counts
+
+
+def add_card_counts(deltas: CounterDeltas, board_list_id: int, counts: Counter) -> None:
+    deltas.setdefault(board_list_id, Counter()).update(counts)
+
+
+def moved_card_deltas(cards: Iterable[tuple], target_list_id: int, now: datetime) -> CounterDeltas:
+    """Deltas for moving ``(board_list_id, priority, due_date)`` cards into ``target_list_id``."""
+    deltas: CounterDeltas = {}
+    for board_list_id, priority, due_date in cards:
+        if board_list_id != target_list_id:
+            add_card_counts(deltas, board_list_id, card_counts(priority, due_date, now, sign=-1))
+            add_card_counts(deltas, target_list_id, card_counts(priority, due_date, now))
+    return deltas
+
+
+def _shift(model, deltas: Dict[int, Counter]) -> None:
+    # Rows that change by the same amounts share one UPDATE.
+    by_delta = {}
+    for pk, counts in deltas.items():
+        key = tuple(sorted((field, delta) for field, delta in counts.items() if delta))
+        if key:
+            by_delta.setdefault(key, []).append(pk)
+    for key, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + delta for field, delta in key})
+
+
+def shift_card_counters(deltas: CounterDeltas) -> None:
+    """
+    Apply per-list counter deltas and roll them up to the boards and projects. Callers run
+    this in the transaction that changed the cards; it costs one SELECT and at most a few
+    ``F()`` UPDATEs per table however many cards moved.
+    """
+    deltas = {list_id: counts for list_id, counts in deltas.items() if any(counts.values())}
+    if not deltas:
+        return
+    board_deltas, project_deltas = {}, {}
+    for list_id, board_id, project_id in BoardList.objects.filter(pk__in=deltas).values_list(
+        "id", "board_id", "board__project_id"
+    ):
+        board_deltas.setdefault(board_id, Counter()).update(deltas[list_id])
+        project_deltas.setdefault(project_id, Counter()).update(deltas[list_id])
+    _shift(BoardList, deltas)
+    _shift(Board, board_deltas)
+    _shift(Project, project_deltas)
+
+
+def _list_counts(now: datetime) -> dict:
+    def count(condition=None):
+        cards = Task.objects.filter(board_list=OuterRef("pk"))
+        if condition is not None:
+            cards = cards.filter(condition)
+        total = cards.order_by().values("board_list").annotate(total=Count("id")).values("total")
+        return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+
+    counts = {"task_count": count(), "overdue_count": count(Q(due_date__lt=now))}
+    for priority, field in PRIORITY_COUNTERS.items():
+        counts[field] = count(Q(priority=priority))
+    return counts
+
+
+def _rollup(model, child_model, parent_field: str, pks: Optional[Iterable[int]]) -> None:
+    # Bumps ``version`` in the same UPDATE, so ETag-guarded responses stop answering 304 with old counts.
+    rows = model.objects.all() if pks is None else model.objects.filter(pk__in=pks)
+    children = child_model.objects.filter(**{parent_field: OuterRef("pk")}).order_by().values(parent_field)
+    rows.update(
+        version=F("version") + 1,
+        **{
+            field: Coalesce(Subquery(children.annotate(total=Sum(field)).values("total")), Value(0))
+            for field in COUNTER_FIELDS
+        },
+    )
+
+
+def recount_card_counters(project_ids: Optional[Iterable[int]] = None) -> None:
+    """Recompute every counter from the cards themselves, for all projects or just ``project_ids``."""
+    lists = BoardList.objects.all()
+    boards = Board.objects.all()
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        lists = lists.filter(board__project_id__in=project_ids)
+        boards = boards.filter(project_id__in=project_ids)
+    lists.update(**_list_counts(timezone.now()))
+    _rollup(Board, BoardList, "board", None if project_ids is None else list(boards.values_list("id", flat=True)))
+    _rollup(Project, Board, "project", project_ids)
+
+
+def refresh_overdue_counters(since: datetime, now: Optional[datetime] = None) -> int:
+    """
+    Recount ``overdue_count`` for the lists holding cards that fell due between ``since`` and
+    ``now``, then roll those lists up. Returns the number of lists refreshed.
+    """
+    now = now or timezone.now()
+    list_ids = list(
+        Task.objects.filter(due_date__gte=since, due_date__lt=now).order_by().values_list("board_list_id", flat=True).distinct()
+    )
+    if not list_ids:
+        return 0
+    overdue = (
+        Task.objects.filter(board_list=OuterRef("pk"), due_date__lt=now)
+        .order_by().values("board_list").annotate(total=Count("id")).values("total")
+    )
+    BoardList.objects.filter(pk__in=list_ids).update(
+        overdue_count=Coalesce(Subquery(overdue, output_field=IntegerField()), Value(0))
+    )
+    boards = dict(Board.objects.filter(lists__in=list_ids).values_list("id", "project_id"))
+    _rollup(Board, BoardList, "board", list(boards))
+    _rollup(Project, Board, "project", set(boards.values()))
+    return len(list_ids)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from boards.counters import COUNTER_FIELDS, recount_card_counters
+from boards.models import Board, BoardList
+from projects.models import Project
+from tasks.models import Task
+from tasks.services import recount_task_rollups
+
+
+def _counters(project_id: int) -> list:
+    return [
+        list(BoardList.objects.filter(board__project_id=project_id).order_by("id").values_list("id", *COUNTER_FIELDS)),
+        list(Board.objects.filter(project_id=project_id).order_by("id").values_list("id", *COUNTER_FIELDS)),
+        list(Project.objects.filter(pk=project_id).values_list("id", *COUNTER_FIELDS)),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Recompute the card counters of lists, boards and projects, and each task's detail rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, action="append", help="Limit to these project ids")
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by("id")
+        if options["project"]:
+            projects = projects.filter(pk__in=options["project"])
+        repaired = 0
+        for project_id in projects.values_list("id", flat=True).iterator():
+            with transaction.atomic():
+                before = _counters(project_id)
+                recount_card_counters([project_id])
+                recount_task_rollups(Task.objects.filter(project_id=project_id))
+                after = _counters(project_id)
+            if before != after:
+                repaired += 1
+                self.stdout.write(f"Project {project_id}: repaired drifted counters")
+        self.stdout.write(f"Recounted card counters; {repaired} project(s) had drifted")
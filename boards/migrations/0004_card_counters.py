@@ -0,0 +1,63 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0003_version_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='high_priority_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='low_priority_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='medium_priority_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='overdue_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='boardlist',
+            name='high_priority_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='boardlist',
+            name='low_priority_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='boardlist',
+            name='medium_priority_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='boardlist',
+            name='overdue_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='boardlist',
+            name='task_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -7,9 +7,24 @@ from django.utils import timezone
 DEFAULT_LISTS = ["Backlog", "Todo", "Progress", "Review", "Done"]
 
 
-class Board(models.Model):
+# Denormalised card counts, kept current by boards.counters; lists roll up into boards and
+# boards into projects. `overdue_count` is also refreshed periodically as due dates pass.
+class CardCounters(models.Model):
+	task_count = models.IntegerField(default=0)
+	high_priority_count = models.IntegerField(default=0)
+	medium_priority_count = models.IntegerField(default=0)
+	low_priority_count = models.IntegerField(default=0)
+	overdue_count = models.IntegerField(default=0)
+
+	class Meta:
+		abstract = True
+
+
+class Board(CardCounters):
 	project = models.ForeignKey("projects.Project", related_name="boards", on_delete=models.CASCADE)
 	name = models.CharField(max_length=150)
+	# Bumped whenever the board, its lists or their cards change; backs the board ETags.
+	version = models.PositiveBigIntegerField(default=1)
 	created_at = models.DateTimeField(default=timezone.now)
 	updated_at = models.DateTimeField(auto_now=True)
 
@@ -21,7 +36,7 @@ class Board(models.Model):
 		return f"{self.name} ({self.project_id})"
 
 
-class BoardList(models.Model):
+class BoardList(CardCounters):
 	board = models.ForeignKey(Board, related_name="lists", on_delete=models.CASCADE)
 	name = models.CharField(max_length=100)
 	position = models.PositiveIntegerField(default=0)
@@ -8,13 +8,24 @@ from projects.models import Project
 from .models import Board, BoardList
 
 
+class CardCountersSerializer(serializers.Serializer):
+    """The denormalised card counters of a list, board or project; read from its own row."""
+
+    total = serializers.IntegerField(source="task_count", read_only=True)
+    high_priority = serializers.IntegerField(source="high_priority_count", read_only=True)
+    medium_priority = serializers.IntegerField(source="medium_priority_count", read_only=True)
+    low_priority = serializers.IntegerField(source="low_priority_count", read_only=True)
+    overdue = serializers.IntegerField(source="overdue_count", read_only=True)
+
+
 class ListSerializer(serializers.ModelSerializer):
     board_id = serializers.PrimaryKeyRelatedField(source="board", queryset=Board.objects.all(), write_only=True)
+    counters = CardCountersSerializer(source="*", read_only=True)
 
     class Meta:
         model = BoardList
-        fields = ("id", "board", "board_id", "name", "position", "created_at", "updated_at")
-        read_only_fields = ("id", "board", "created_at", "updated_at")
+        fields = ("id", "board", "board_id", "name", "position", "counters", "created_at", "updated_at")
+        read_only_fields = ("id", "board", "counters", "created_at", "updated_at")
 
     def create(self, validated_data):
         board = validated_data["board"]
@@ -28,6 +39,7 @@ class BoardSerializer(serializers.ModelSerializer):
     project_id = serializers.PrimaryKeyRelatedField(source="project", queryset=Project.objects.all())
     project = serializers.CharField(source="project.name", read_only=True)
     lists = ListSerializer(many=True, read_only=True)
+    counters = CardCountersSerializer(source="*", read_only=True)
 
     class Meta:
         model = Board
@@ -36,8 +48,9 @@ class BoardSerializer(serializers.ModelSerializer):
             "project",
             "project_id",
             "name",
+            "counters",
             "created_at",
             "updated_at",
             "lists",
         )
-        read_only_fields = ("id", "project", "created_at", "updated_at", "lists")
+        read_only_fields = ("id", "project", "counters", "created_at", "updated_at", "lists")
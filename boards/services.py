@@ -2,10 +2,26 @@ from __future__ import annotations
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from activity.services import create_activity_log
+from projects.models import Project
+from tasks.models import Task
 
 from .models import Board, BoardList, DEFAULT_LISTS
 
 
+def bump_board_version(**lookup) -> None:
+    """
+    Mark the boards matching ``lookup`` as changed, e.g. ``bump_board_version(lists=list_id)``,
+    and their projects with them: project responses carry the card counters.
+    """
+    boards = Board.objects.filter(**lookup)
+    Project.objects.filter(pk__in=boards.values("project_id")).update(version=F("version") + 1)
+    boards.update(version=F("version") + 1)
+
+
 def ensure_default_lists(board: Board) -> None:
     if board.lists.exists():
         return
@@ -14,17 +30,70 @@ def ensure_default_lists(board: Board) -> None:
 
 
 @transaction.atomic
-def reorder_board_lists(board: Board, ordered_ids: list[int]) -> None:
-    existing_ids = list(board.lists.values_list("id", flat=True))
-    if len(ordered_ids) != len(existing_ids) or set(existing_ids) != set(ordered_ids):
+def reorder_board_lists(board: Board, ordered_ids: list[int], user=None) -> None:
+    current_positions = dict(board.lists.values_list("id", "position"))
+    if len(ordered_ids) != len(current_positions) or set(current_positions) != set(ordered_ids):
         raise ValidationError("Order must include all board lists.")
 
-    ordering_map = {item_id: idx for idx, item_id in enumerate(ordered_ids, start=1)}
-    lists = board.lists.all()
+    now = timezone.now()
+    changed_lists = [
+        BoardList(id=list_id, position=index, updated_at=now)
+        for index, list_id in enumerate(ordered_ids, start=1)
+        if current_positions[list_id] != index
+    ]
+    if not changed_lists:
+        return
+    BoardList.objects.bulk_update(changed_lists, ["position", "updated_at"])
+    bump_board_version(pk=board.pk)
+    create_activity_log(
+        user=user,
+        action="lists_reordered",
+        target=board,
+        metadata={"project_id": str(board.project_id), "changed": len(changed_lists)},
+    )
+
+
+def build_board_snapshot(board: Board) -> dict:
+    """
+    Everything needed to render a board: its ordered lists, each with a compact card array.
+    Lists and cards are read in two queries regardless of board size, detail counts coming from
+    the cards' rollup columns; ``version`` is the board's change counter, so clients can skip
+    re-rendering a board that has not changed.
+    """
+    lists = list(board.lists.values("id", "name", "position"))
+    cards_by_list = {}
     for board_list in lists:
-        new_position = ordering_map.get(board_list.id)
-        if new_position is None:
-            raise ValidationError("Invalid list id in order payload.")
-        if board_list.position != new_position:
-            board_list.position = new_position
-            board_list.save(update_fields=["position"])
+        board_list["cards"] = cards_by_list[board_list["id"]] = []
+
+    cards = (
+        Task.objects.filter(board_list_id__in=list(cards_by_list))
+        .order_by("board_list_id", "position", "id")
+        .values(
+            "id", "board_list_id", "title", "assigned_to_id", "assigned_to__name", "priority", "due_date", "tags",
+            "subtasks_total", "subtasks_done", "comments_count", "attachments_count",
+        )
+    )
+    for card in cards:
+        cards_by_list[card["board_list_id"]].append({
+            "id": card["id"],
+            "title": card["title"],
+            "assignee": (
+                {"id": card["assigned_to_id"], "name": card["assigned_to__name"]}
+                if card["assigned_to_id"] is not None
+                else None
+            ),
+            "priority": card["priority"],
+            "due_date": card["due_date"],
+            "tags": card["tags"],
+            "subtasks": {"done": card["subtasks_done"], "total": card["subtasks_total"]},
+            "comments": card["comments_count"],
+            "attachments": card["attachments_count"],
+        })
+
+    return {
+        "id": board.id,
+        "project_id": board.project_id,
+        "name": board.name,
+        "version": board.version,
+        "lists": lists,
+    }
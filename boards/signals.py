@@ -1,11 +1,71 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import Board
-from .services import ensure_default_lists
+from comments.models import Comment
+from tasks.models import Attachment, Subtask, Task
+
+from .counters import add_card_counts, card_counts, shift_card_counters
+from .models import Board, BoardList
+from .services import bump_board_version, ensure_default_lists
 
 
 @receiver(post_save, sender=Board)
 def create_default_lists(sender, instance, created, **kwargs):
     if created:
         ensure_default_lists(instance)
+    else:
+        bump_board_version(pk=instance.pk)
+
+
+@receiver(post_save, sender=BoardList)
+@receiver(post_delete, sender=BoardList)
+def bump_board_on_list_change(sender, instance, **kwargs):
+    bump_board_version(pk=instance.board_id)
+
+
+@receiver(post_save, sender=Task)
+def bump_board_on_task_save(sender, instance, **kwargs):
+    list_ids = {instance.board_list_id}
+    changes = instance.get_field_changes()
+    if "board_list_id" in changes:
+        # Moved by a plain save(): the list it left changed too.
+        list_ids.add(changes["board_list_id"][0])
+    bump_board_version(lists__in=list_ids)
+
+
+@receiver(post_delete, sender=Task)
+def bump_board_on_task_delete(sender, instance, **kwargs):
+    bump_board_version(lists=instance.board_list_id)
+
+
+@receiver(post_save, sender=Task)
+def count_saved_card(sender, instance, created, **kwargs):
+    now = timezone.now()
+    if created:
+        shift_card_counters({instance.board_list_id: card_counts(instance.priority, instance.due_date, now)})
+        return
+    changes = instance.get_field_changes()
+    if not {"board_list_id", "priority", "due_date"} & changes.keys():
+        return
+    old_list = changes.get("board_list_id", (instance.board_list_id,))[0]
+    old_priority = changes.get("priority", (instance.priority,))[0]
+    old_due_date = changes.get("due_date", (instance.due_date,))[0]
+    deltas = {old_list: card_counts(old_priority, old_due_date, now, sign=-1)}
+    add_card_counts(deltas, instance.board_list_id, card_counts(instance.priority, instance.due_date, now))
+    shift_card_counters(deltas)
+
+
+@receiver(post_delete, sender=Task)
+def uncount_deleted_card(sender, instance, **kwargs):
+    shift_card_counters({instance.board_list_id: card_counts(instance.priority, instance.due_date, timezone.now(), sign=-1)})
+
+
+@receiver(post_save, sender=Subtask)
+@receiver(post_delete, sender=Subtask)
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_board_on_card_detail_change(sender, instance, **kwargs):
+    bump_board_version(lists__tasks=instance.task_id)
@@ -1,11 +1,22 @@
+import io
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from projects.models import Project, ProjectMember
+from tasks.models import Subtask, Task
+from tasks.services import move_task_to_list, move_tasks_to_list
 from teams.models import Team, TeamMember
+from .counters import COUNTER_FIELDS, recount_card_counters
 from .models import Board, BoardList
+from .tasks import refresh_overdue_card_counters
 
 User = get_user_model()
 
@@ -37,3 +48,165 @@ class BoardApiTests(APITestCase):
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
 		first_list = BoardList.objects.get(id=order[0])
 		self.assertEqual(first_list.position, 1)
+
+	def _snapshot_queries(self, url):
+		# Measured with the user's memberships already cached, as on every request but the first.
+		self.client.get(url)
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(url)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		return response, len(queries)
+
+	def test_snapshot_returns_cards_per_list_in_fixed_queries(self):
+		board = Board.objects.create(project=self.project, name="Snapshot")
+		todo = board.lists.first()
+		url = reverse("boards:board-snapshot", args=[board.id])
+		task = Task.objects.create(project=self.project, board_list=todo, title="Card")
+		Task.objects.filter(pk=task.pk).update(assigned_to=self.user)
+		Subtask.objects.create(task=task, title="Step", completed=True)
+		Subtask.objects.create(task=task, title="Step 2")
+		response, small_board = self._snapshot_queries(url)
+		cards = response.data["lists"][0]["cards"]
+		self.assertEqual([card["id"] for card in cards], [task.id])
+		self.assertEqual(cards[0]["subtasks"], {"done": 1, "total": 2})
+		self.assertEqual(cards[0]["assignee"]["id"], self.user.id)
+
+		for index in range(10):
+			Task.objects.create(project=self.project, board_list=board.lists.last(), title=f"Card {index}")
+		response, large_board = self._snapshot_queries(url)
+		self.assertEqual(large_board, small_board)
+		self.assertEqual(len(response.data["lists"][-1]["cards"]), 10)
+
+	def test_snapshot_not_modified_when_version_matches(self):
+		board = Board.objects.create(project=self.project, name="Cached")
+		url = reverse("boards:board-snapshot", args=[board.id])
+		response = self.client.get(url)
+		etag = response["ETag"]
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+		Task.objects.create(project=self.project, board_list=board.lists.first(), title="New card")
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertNotEqual(response["ETag"], etag)
+
+	def test_snapshot_etag_changes_when_an_assignee_is_renamed(self):
+		board = Board.objects.create(project=self.project, name="Assigned")
+		task = Task.objects.create(project=self.project, board_list=board.lists.first(), title="Card")
+		# Assigned without a save, so no assignment email is rendered.
+		Task.objects.filter(pk=task.pk).update(assigned_to=self.user)
+		url = reverse("boards:board-snapshot", args=[board.id])
+		etag = self.client.get(url)["ETag"]
+
+		self.user.name = "Renamed"
+		self.user.save()
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data["lists"][0]["cards"][0]["assignee"]["name"], "Renamed")
+
+	def test_retrieve_answers_if_none_match_until_a_card_changes(self):
+		board = Board.objects.create(project=self.project, name="Polled")
+		url = reverse("boards:board-detail", args=[board.id])
+		etag = self.client.get(url)["ETag"]
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+		self.assertEqual(len(queries), 1)
+
+		task = Task.objects.create(project=self.project, board_list=board.lists.first(), title="Card")
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		etag = response["ETag"]
+
+		Subtask.objects.create(task=task, title="Step")
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+	def test_non_integer_board_id_is_not_found(self):
+		self.assertEqual(self.client.get(reverse("boards:board-detail", args=["abc"])).status_code, status.HTTP_404_NOT_FOUND)
+		response = self.client.get(reverse("boards:board-snapshot", args=["abc"]))
+		self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CardCounterTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(email="counter@example.com", password="StrongPass123")
+		team = Team.objects.create(name="Count Team", description="", created_by=self.user)
+		TeamMember.objects.create(team=team, user=self.user, role=TeamMember.RoleChoices.OWNER)
+		self.project = Project.objects.create(team=team, name="Counted")
+		ProjectMember.objects.create(project=self.project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+		self.board = Board.objects.create(project=self.project, name="Counters")
+		self.todo, self.done = self.board.lists.first(), self.board.lists.last()
+		self.client.force_authenticate(self.user)
+
+	def _counters(self):
+		rows = [
+			BoardList.objects.filter(pk=self.todo.pk),
+			BoardList.objects.filter(pk=self.done.pk),
+			Board.objects.filter(pk=self.board.pk),
+			Project.objects.filter(pk=self.project.pk),
+		]
+		return [row.values_list(*COUNTER_FIELDS).get() for row in rows]
+
+	def _assert_matches_recount(self):
+		maintained = self._counters()
+		recount_card_counters([self.project.id])
+		self.assertEqual(maintained, self._counters())
+
+	def test_counters_follow_creates_moves_edits_and_deletes(self):
+		yesterday = timezone.now() - timedelta(days=1)
+		high = Task.objects.create(project=self.project, board_list=self.todo, title="High", priority="high", due_date=yesterday)
+		low = Task.objects.create(project=self.project, board_list=self.todo, title="Low", priority="low")
+		third = Task.objects.create(project=self.project, board_list=self.todo, title="Third")
+		self.assertEqual(self._counters()[0], (3, 1, 1, 1, 1))
+		self._assert_matches_recount()
+
+		move_task_to_list(high, self.done)
+		move_tasks_to_list([low.id, third.id], self.done)
+		self.assertEqual(self._counters()[1], (3, 1, 1, 1, 1))
+		low.refresh_from_db()
+		low.priority = "high"
+		low.due_date = yesterday
+		low.board_list = self.todo
+		low.save()
+		Task.objects.get(pk=third.pk).delete()
+		self.assertEqual(self._counters()[0], (1, 1, 0, 0, 1))
+		self.assertEqual(self._counters()[3], (2, 2, 0, 0, 2))
+		self._assert_matches_recount()
+
+	def test_patching_the_list_counts_the_move_once(self):
+		task = Task.objects.create(project=self.project, board_list=self.todo, title="Card", priority="high")
+		response = self.client.patch(
+			reverse("tasks:tasks-detail", args=[task.id]), {"board_list_id": self.done.id, "title": "Moved"}, format="json"
+		)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual([counters[0] for counters in self._counters()], [0, 1, 1, 1])
+		self._assert_matches_recount()
+
+	def test_overdue_counts_are_refreshed_as_cards_fall_due(self):
+		task = Task.objects.create(project=self.project, board_list=self.todo, title="Soon", due_date=timezone.now() + timedelta(hours=1))
+		self.assertEqual(self._counters()[2][4], 0)
+		Task.objects.filter(pk=task.pk).update(due_date=timezone.now() - timedelta(minutes=1))
+		board_etag = self.client.get(reverse("boards:board-detail", args=[self.board.id]))["ETag"]
+		project_etag = self.client.get(reverse("projects:project-detail", args=[self.project.id]))["ETag"]
+		self.assertEqual(refresh_overdue_card_counters.delay().get(), 1)
+		self.assertEqual([counters[4] for counters in self._counters()], [1, 0, 1, 1])
+
+		response = self.client.get(reverse("boards:board-detail", args=[self.board.id]), HTTP_IF_NONE_MATCH=board_etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data["counters"]["overdue"], 1)
+		response = self.client.get(reverse("projects:project-detail", args=[self.project.id]), HTTP_IF_NONE_MATCH=project_etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+	def test_recount_command_repairs_drift_and_serializers_expose_counters(self):
+		Task.objects.create(project=self.project, board_list=self.todo, title="Card", priority="high")
+		Board.objects.filter(pk=self.board.pk).update(task_count=7)
+		out = io.StringIO()
+		call_command("recount_card_counters", project=[self.project.id], stdout=out)
+		self.assertIn("1 project(s) had drifted", out.getvalue())
+
+		response = self.client.get(reverse("boards:board-detail", args=[self.board.id]))
+		self.assertEqual(response.data["counters"], {"total": 1, "high_priority": 1, "medium_priority": 0, "low_priority": 0, "overdue": 0})
+		self.assertEqual(response.data["lists"][0]["counters"]["total"], 1)
+		response = self.client.get(reverse("projects:project-detail", args=[self.project.id]))
+		self.assertEqual(response.data["counters"]["high_priority"], 1)
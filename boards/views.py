@@ -1,68 +1,88 @@
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from projects.models import ProjectMember
+from core.conditional import etag_for, etag_matches, not_modified
+from core.prefetch import PrefetchPlannerMixin
+from projects.membership import get_memberships
 from projects.permissions import IsProjectManager, IsProjectMember
+from projects.visibility import visible_to
 
 from .models import Board, BoardList
 from .serializers import BoardSerializer, ListSerializer
-from .services import reorder_board_lists
+from .services import build_board_snapshot, reorder_board_lists
 
 
-class BoardViewSet(viewsets.ModelViewSet):
+class BoardViewSet(PrefetchPlannerMixin, viewsets.ModelViewSet):
 	serializer_class = BoardSerializer
 	permission_classes = (permissions.IsAuthenticated,)
 
 	def get_queryset(self):
-		return (
-			Board.objects.filter(project__members__user=self.request.user)
-			.select_related("project")
-			.prefetch_related("lists")
-			.distinct()
-		)
+		return visible_to(Board.objects.all(), self.request)
 
 	def get_permissions(self):
-		if self.action in ("list", "retrieve"):
+		if self.action in ("list", "retrieve", "snapshot"):
 			classes = (permissions.IsAuthenticated, IsProjectMember)
 		else:
 			classes = (permissions.IsAuthenticated, IsProjectManager)
 		return [permission() for permission in classes]
 
+	def _board_pk(self, pk):
+		# The router accepts any path segment; one that is not an integer names no board.
+		try:
+			return int(pk)
+		except ValueError:
+			raise Http404
+
+	def retrieve(self, request, *args, **kwargs):
+		# Answer conditional polls from the version counters before anything is serialized.
+		pk = self._board_pk(kwargs["pk"])
+		versions = self.get_queryset().filter(pk=pk).values_list("version", "project__version").first()
+		etag = etag_for("board", pk, *versions) if versions else None
+		if etag and etag_matches(request, etag):
+			return not_modified(etag)
+		response = super().retrieve(request, *args, **kwargs)
+		if etag:
+			response["ETag"] = etag
+		return response
+
+	@action(detail=True, methods=["get"])
+	def snapshot(self, request, pk=None):
+		board = get_object_or_404(self.get_queryset().select_related("project"), pk=self._board_pk(pk))
+		self.check_object_permissions(request, board)
+		etag = etag_for("board-snapshot", board.pk, board.version)
+		if etag_matches(request, etag):
+			return not_modified(etag)
+		return Response(build_board_snapshot(board), headers={"ETag": etag})
+
 	def perform_create(self, serializer):
 		project = serializer.validated_data.get("project")
-		if not ProjectMember.objects.filter(
-			project=project,
-			user=self.request.user,
-			role=ProjectMember.RoleChoices.MANAGER,
-		).exists():
+		if not get_memberships(self.request).is_project_manager(project.pk):
 			raise PermissionDenied("Only project managers can create boards.")
 		serializer.save()
 
 	def perform_update(self, serializer):
 		project = serializer.validated_data.get("project") or self.get_object().project
-		if not ProjectMember.objects.filter(
-			project=project,
-			user=self.request.user,
-			role=ProjectMember.RoleChoices.MANAGER,
-		).exists():
+		if not get_memberships(self.request).is_project_manager(project.pk):
 			raise PermissionDenied("Only project managers can update boards.")
 		serializer.save()
 
 
-class ListViewSet(viewsets.ModelViewSet):
+class ListViewSet(PrefetchPlannerMixin, viewsets.ModelViewSet):
 	serializer_class = ListSerializer
 	permission_classes = (permissions.IsAuthenticated,)
 
 	def get_queryset(self):
-		queryset = BoardList.objects.filter(board__project__members__user=self.request.user).select_related("board")
+		queryset = visible_to(BoardList.objects.select_related("board"), self.request, "board__project")
 		board_id = self.request.query_params.get("board")
 		if board_id:
 			queryset = queryset.filter(board_id=board_id)
-		return queryset.distinct()
+		return queryset
 
 	def get_permissions(self):
 		if self.action in ("list", "retrieve"):
@@ -73,21 +93,13 @@ class ListViewSet(viewsets.ModelViewSet):
 
 	def perform_create(self, serializer):
 		board = serializer.validated_data.get("board")
-		if not ProjectMember.objects.filter(
-			project=board.project,
-			user=self.request.user,
-			role=ProjectMember.RoleChoices.MANAGER,
-		).exists():
+		if not get_memberships(self.request).is_project_manager(board.project_id):
 			raise PermissionDenied("Only project managers can create lists.")
 		serializer.save()
 
 	def perform_update(self, serializer):
 		board = serializer.validated_data.get("board") or self.get_object().board
-		if not ProjectMember.objects.filter(
-			project=board.project,
-			user=self.request.user,
-			role=ProjectMember.RoleChoices.MANAGER,
-		).exists():
+		if not get_memberships(self.request).is_project_manager(board.project_id):
 			raise PermissionDenied("Only project managers can update lists.")
 		serializer.save()
 
@@ -102,7 +114,7 @@ class ReorderListsView(APIView):
 		if not isinstance(order, list) or not order:
 			raise ValidationError({"order": "Provide a non-empty list of list ids."})
 		try:
-			reorder_board_lists(board=board, ordered_ids=[int(item) for item in order])
+			reorder_board_lists(board=board, ordered_ids=[int(item) for item in order], user=request.user)
 		except (ValueError, DjangoValidationError) as exc:
 			raise ValidationError(str(exc)) from exc
 		serializer = BoardSerializer(board, context={"request": request})
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from tasks.models import Task
@@ -15,6 +15,12 @@ class Comment(models.Model):
 
 	class Meta:
 		ordering = ("-created_at", "id")
+		indexes = [models.Index(fields=("task", "-created_at", "id"), name="comment_task_recent_idx")]
+
+	def save(self, *args, **kwargs):
+		# The task's comments_count is shifted by a post-save receiver in the same transaction.
+		with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+			super().save(*args, **kwargs)
 
 	def __str__(self):
 		return f"Comment {self.id} on task {self.task_id}"
@@ -1,8 +1,12 @@
 import logging
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from tasks.search import index_tasks
+from tasks.services import shift_task_rollups
+
 from .models import Comment, CommentAttachment
 
 logger = logging.getLogger(__name__)
@@ -20,3 +24,27 @@ def log_comment_activity(sender, instance, created, **kwargs):
 def log_comment_attachment(sender, instance, created, **kwargs):
     if created:
         logger.info("Attachment %s added to comment %s", instance.id, instance.comment_id)
+
+
+@receiver(post_save, sender=Comment)
+def reindex_commented_task(sender, instance, **kwargs):
+    # Comment text is part of the task's search document.
+    index_tasks([instance.task_id])
+
+
+@receiver(post_delete, sender=Comment)
+def reindex_uncommented_task(sender, instance, **kwargs):
+    # Deferred: when the comment goes in its task's cascade, reindexing now would recreate the
+    # search document the collector is about to delete. index_tasks skips tasks that are gone.
+    transaction.on_commit(lambda: index_tasks([instance.task_id]))
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        shift_task_rollups(instance.task_id, comments_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    shift_task_rollups(instance.task_id, comments_count=-1)
@@ -6,7 +6,7 @@ from rest_framework.test import APITestCase
 from projects.models import Project, ProjectMember
 from teams.models import Team, TeamMember
 from boards.models import Board, BoardList
-from tasks.models import Task
+from tasks.models import Task, TaskSearchDocument
 from .models import Comment
 
 User = get_user_model()
@@ -38,3 +38,14 @@ class CommentsApiTests(APITestCase):
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
 		self.assertGreaterEqual(len(response.data), 1)
 
+	def test_deleting_a_commented_task_drops_its_search_document(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Task X", position=1)
+		other = Task.objects.create(project=self.project, board_list=self.list_todo, title="Task Y", position=2)
+		Comment.objects.create(task=task, user=self.user, text="First")
+		Comment.objects.create(task=other, user=self.user, text="Second")
+
+		with self.captureOnCommitCallbacks(execute=True):
+			task.delete()
+			other.comments.get().delete()
+		self.assertFalse(TaskSearchDocument.objects.filter(task_id=task.id).exists())
+		self.assertEqual(TaskSearchDocument.objects.get(task_id=other.id).comments, "")
@@ -98,6 +98,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "activity.middleware.ActivityBufferMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -171,6 +172,14 @@ CACHES = {
     }
 }
 
+# Project and team roles are cached per user for this long; membership changes retire the
+# cached copy at once through a per-user version key (projects.membership).
+MEMBERSHIP_CACHE_SECONDS = env.int("MEMBERSHIP_CACHE_SECONDS", default=300)
+
+# The JWT's user is cached for this long (users.authentication); saving or deleting the user
+# retires the cached copy at once.
+AUTH_USER_CACHE_SECONDS = env.int("AUTH_USER_CACHE_SECONDS", default=60)
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -197,7 +206,7 @@ AUTH_USER_MODEL = "users.User"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -238,6 +247,13 @@ SIMPLE_JWT.update({
     "BLACKLIST_AFTER_ROTATION": True,
 })
 
+# Refreshes consult a bloom filter of blacklisted jtis per expiry day (users.blacklist) before
+# the blacklist table; each filter is sized for this many jtis at this false-positive rate.
+# Expired outstanding tokens are pruned hourly, this many rows per delete.
+TOKEN_BLACKLIST_BLOOM_CAPACITY = env.int("TOKEN_BLACKLIST_BLOOM_CAPACITY", default=1_000_000)
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = env.float("TOKEN_BLACKLIST_BLOOM_ERROR_RATE", default=0.001)
+TOKEN_PRUNE_CHUNK_SIZE = env.int("TOKEN_PRUNE_CHUNK_SIZE", default=5000)
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Kanban Manager API",
     "DESCRIPTION": "API documentation for all backend modules",
@@ -282,13 +298,54 @@ CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="redis://redis:6379/0")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default="redis://redis:6379/0")
 CELERY_TASK_SERIALIZER = "json"
 CELERY_ACCEPT_CONTENT = ["json"]
+
+# Buffered activity entries are written by a Celery task after commit instead of in-request,
+# and batches this large are loaded with COPY on Postgres.
+ACTIVITY_LOG_ASYNC = env.bool("ACTIVITY_LOG_ASYNC", default=False)
+ACTIVITY_LOG_COPY_THRESHOLD = env.int("ACTIVITY_LOG_COPY_THRESHOLD", default=1000)
+# Repeat updates to the same target by the same actor this close together share one activity
+# row with a merged field-change set (0 turns coalescing off).
+ACTIVITY_COALESCE_SECONDS = env.int("ACTIVITY_COALESCE_SECONDS", default=60)
+
+# Activity older than this many whole months is moved out of the database into gzipped NDJSON
+# files under ACTIVITY_ARCHIVE_ROOT. On Postgres each month is a partition, created this far ahead.
+ACTIVITY_RETENTION_MONTHS = env.int("ACTIVITY_RETENTION_MONTHS", default=12)
+ACTIVITY_ARCHIVE_ROOT = env("ACTIVITY_ARCHIVE_ROOT", default=str(BASE_DIR / "archive" / "activity"))
+ACTIVITY_PARTITIONS_AHEAD = env.int("ACTIVITY_PARTITIONS_AHEAD", default=3)
+
+# Overdue card counters are recounted this often for the lists whose cards have just fallen due.
+CARD_OVERDUE_REFRESH_MINUTES = env.int("CARD_OVERDUE_REFRESH_MINUTES", default=5)
+
 CELERY_BEAT_SCHEDULE = {
     "check_due_soon_tasks_every_hour": {
         "task": "notifications.tasks.check_due_soon_tasks",
         "schedule": timedelta(hours=1),
-    }
+    },
+    "prune_task_tombstones_daily": {
+        "task": "tasks.tasks.prune_task_tombstones",
+        "schedule": timedelta(days=1),
+    },
+    "refresh_overdue_card_counters": {
+        "task": "boards.tasks.refresh_overdue_card_counters",
+        "schedule": timedelta(minutes=CARD_OVERDUE_REFRESH_MINUTES),
+    },
+    "maintain_activity_partitions_daily": {
+        "task": "activity.tasks.maintain_activity_partitions",
+        "schedule": timedelta(days=1),
+    },
+    "prune_outstanding_tokens_hourly": {
+        "task": "users.tasks.prune_outstanding_tokens",
+        "schedule": timedelta(hours=1),
+    },
 }
 
+# Delta sync feed (tasks/changes/): deletions are kept this long. On Postgres rows are held back
+# until every transaction open before them has committed, and the settle window only absorbs
+# clock skew; elsewhere it is the only guard, and a write committing later than this after
+# stamping its rows is missed by clients already past it (see tasks.sync.settled_before).
+TASK_TOMBSTONE_RETENTION_DAYS = env.int("TASK_TOMBSTONE_RETENTION_DAYS", default=30)
+TASK_CHANGES_SETTLE_SECONDS = env.int("TASK_CHANGES_SETTLE_SECONDS", default=2)
+
 
 CELERY_TASK_ALWAYS_EAGER = env.bool("CELERY_TASK_ALWAYS_EAGER", default=DEBUG)
 CELERY_TASK_EAGER_PROPAGATES = env.bool("CELERY_TASK_EAGER_PROPAGATES", default=True)
@@ -297,6 +354,12 @@ CELERY_TASK_EAGER_PROPAGATES = env.bool("CELERY_TASK_EAGER_PROPAGATES", default=
 if "test" in sys.argv:
     CELERY_TASK_ALWAYS_EAGER = True
     CELERY_TASK_EAGER_PROPAGATES = True
+    # Throttle counts live in the cache, which outlasts each test's rollback; ids get reused, so
+    # a long suite would start answering 429.
+    REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = ()
+    # Auth, membership and version caches are written on every save and request; keep the
+    # suite runnable without a Redis server.
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 
 SESSION_COOKIE_SECURE = env.bool("SESSION_COOKIE_SECURE", default=not DEBUG)
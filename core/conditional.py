@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import hashlib
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def etag_for(*parts) -> str:
+    """Strong ETag built from version counters, e.g. ``etag_for("board", 7, 42)``."""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def hashed_etag(*parts) -> str:
+    """Strong ETag for values too long to put in a header verbatim (query strings, version lists)."""
+    return '"' + hashlib.sha1(repr(parts).encode()).hexdigest() + '"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Strong comparison: weak validators (``W/"..."``) never match.
+    return etag in (candidate.strip() for candidate in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, List, Sequence
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([value.isoformat() if hasattr(value, "isoformat") else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise NotFound("Invalid cursor.") from exc
+    if not isinstance(values, list):
+        raise NotFound("Invalid cursor.")
+    return values
+
+
+def keyset_filter(model, ordering: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    Build the ``WHERE`` clause selecting rows strictly after ``values`` in ``ordering``,
+    e.g. ``(-created_at, -id)`` gives ``created_at < v0 OR (created_at = v0 AND id < v1)``.
+    """
+    if len(values) != len(ordering):
+        raise NotFound("Invalid cursor.")
+    names = [field.lstrip("-") for field in ordering]
+    try:
+        parsed = [model._meta.get_field(name).to_python(value) for name, value in zip(names, values)]
+    except Exception as exc:
+        raise NotFound("Invalid cursor.") from exc
+    condition = Q()
+    for index, field in enumerate(ordering):
+        lookup = "lt" if field.startswith("-") else "gt"
+        clause = Q(**{f"{names[index]}__{lookup}": parsed[index]})
+        for previous in range(index):
+            clause &= Q(**{names[previous]: parsed[previous]})
+        condition |= clause
+    return condition
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination unless the client opts in with ``?pagination=cursor`` (or sends a
+    ``cursor``), in which case pages are read by keyset on ``ordering`` instead of
+    ``OFFSET``/``COUNT(*)``. Cursors are opaque and stay valid while rows are inserted.
+
+    Cursor pages only go forward: ``previous`` is always null, and clients that need to go
+    back keep the cursors they were given. ``page_size`` (up to ``max_page_size``) applies
+    to cursor pages only; page-number pages keep the fixed ``PAGE_SIZE``.
+    """
+
+    ordering: Sequence[str] = ("id",)
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def use_cursor(self, request) -> bool:
+        params = request.query_params
+        return self.cursor_query_param in params or params.get(self.mode_query_param) == "cursor"
+
+    def get_page_size(self, request):
+        if not self.use_cursor(request):
+            return self.page_size
+        return super().get_page_size(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = self.rows_after(queryset, decode_cursor(cursor))
+        rows = list(queryset[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page_rows = rows[:page_size]
+        return self.page_rows
+
+    def rows_after(self, queryset, values: Sequence[Any]):
+        """``queryset`` narrowed to the rows after the one whose ``ordering`` values are ``values``."""
+        return queryset.filter(keyset_filter(queryset.model, self.ordering, values))
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page_rows[-1]
+        cursor = encode_cursor([getattr(last, field.lstrip("-")) for field in self.ordering])
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({"next": self.get_next_link(), "previous": None, "results": data})
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+class QueryPlan(NamedTuple):
+    select: Tuple[str, ...]
+    prefetch: Tuple[Tuple[str, type, "QueryPlan"], ...]
+
+
+def _relation(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def _is_single_valued(field) -> bool:
+    return bool(field.many_to_one or field.one_to_one)
+
+
+def _forward_path(model, attrs) -> str:
+    walked = []
+    for attr in attrs:
+        relation = _relation(model, attr)
+        if relation is None or not _is_single_valued(relation):
+            break
+        walked.append(attr)
+        model = relation.related_model
+    return "__".join(walked)
+
+
+@lru_cache(maxsize=None)
+def plan_for_serializer(model, serializer_class) -> QueryPlan:
+    """
+    Derive the ``select_related``/``prefetch_related`` calls a serializer needs from its
+    declared fields: nested serializers, ``many=True`` relations and dotted sources such as
+    ``project.name``. Plain primary-key relations are skipped since DRF reads ``<field>_id``.
+    """
+    select: List[str] = []
+    prefetch: List[Tuple[str, type, QueryPlan]] = []
+
+    for field in serializer_class().fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        path = field.source_attrs
+        if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+            relation = _relation(model, path[0])
+            if relation is not None and len(path) == 1:
+                child_model = field.child.Meta.model
+                prefetch.append((path[0], child_model, plan_for_serializer(child_model, type(field.child))))
+            continue
+        if isinstance(field, serializers.ManyRelatedField):
+            relation = _relation(model, path[0])
+            if relation is not None:
+                prefetch.append((path[0], relation.related_model, QueryPlan((), ())))
+            continue
+        if isinstance(field, serializers.ModelSerializer):
+            relation = _relation(model, path[0])
+            if relation is not None and _is_single_valued(relation) and len(path) == 1:
+                nested = plan_for_serializer(relation.related_model, type(field))
+                select.append(path[0])
+                select.extend(f"{path[0]}__{name}" for name in nested.select)
+                prefetch.extend((f"{path[0]}__{name}", child, plan) for name, child, plan in nested.prefetch)
+            continue
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and len(path) == 1:
+            continue
+        # Dotted sources such as ``project.name`` and non-pk related fields read through joins.
+        if len(path) > 1 or isinstance(field, serializers.RelatedField):
+            walked = _forward_path(model, path)
+            if walked:
+                select.append(walked)
+
+    return QueryPlan(tuple(dict.fromkeys(select)), tuple(prefetch))
+
+
+def apply_plan(queryset, plan: QueryPlan):
+    if plan.select:
+        queryset = queryset.select_related(*plan.select)
+    lookups = [
+        Prefetch(path, queryset=apply_plan(child_model._default_manager.all(), child_plan))
+        for path, child_model, child_plan in plan.prefetch
+    ]
+    if lookups:
+        queryset = queryset.prefetch_related(*lookups)
+    return queryset
+
+
+class PrefetchPlannerMixin:
+    """
+    Generic view mixin that joins or prefetches whatever the view's serializer will read,
+    so list and detail responses cost a fixed number of queries regardless of page size.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return apply_plan(queryset, plan_for_serializer(queryset.model, self.get_serializer_class()))
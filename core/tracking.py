@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from typing import Any, Dict, Tuple
+
+
+class TrackedFieldsMixin:
+    """
+    Model mixin that remembers the values of ``tracked_fields`` as they were loaded from
+    the database, so save receivers can diff an instance without re-fetching its row.
+
+    ``tracked_fields`` lists attribute names (``board_list_id`` rather than ``board_list``).
+    During ``save()`` the diff is computed once and shared by every pre/post-save receiver.
+    Code that writes tracked fields with ``QuerySet.update()`` and hands the instance back must
+    call ``_snapshot_tracked_fields()`` with those fields, or the next ``save()`` repeats them.
+    """
+
+    tracked_fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self, *names: str) -> None:
+        """Take ``names`` (every tracked field by default) as the values stored in the database."""
+        # Deferred fields are skipped: reading them here would cost a query each.
+        snapshot = {
+            name: deepcopy(self.__dict__[name]) for name in names or self.tracked_fields if name in self.__dict__
+        }
+        loaded = getattr(self, "_loaded_values", None)
+        if names and loaded is None:
+            # Never loaded: get_field_changes() reads the row, which already has these values.
+            return
+        self._loaded_values = {**loaded, **snapshot} if names else snapshot
+
+    def get_field_changes(self) -> Dict[str, Tuple[Any, Any]]:
+        """Return ``{field: (old, new)}`` for tracked fields changed since the row was loaded."""
+        pending = getattr(self, "_pending_changes", None)
+        if pending is not None:
+            return pending
+        if self.pk is None:
+            return {}
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            # Instance was built by hand rather than loaded: fall back to a single read.
+            loaded = type(self)._base_manager.filter(pk=self.pk).values(*self.tracked_fields).first() or {}
+            self._loaded_values = loaded
+        return {
+            name: (old, getattr(self, name))
+            for name, old in loaded.items()
+            if getattr(self, name) != old
+        }
+
+    def save(self, *args, **kwargs):
+        self._pending_changes = self.get_field_changes()
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self._pending_changes = None
+        self._snapshot_tracked_fields()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked_fields()
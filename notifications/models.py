@@ -13,6 +13,7 @@ class Notification(models.Model):
 
 	class Meta:
 		ordering = ("-created_at", "-id")
+		indexes = [models.Index(fields=("user", "-created_at", "-id"), name="notification_user_recent_idx")]
 
 	def __str__(self):
 		return f"Notification {self.id} for user {self.user_id}"
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
@@ -48,3 +49,40 @@ class NotificationsTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         notification.refresh_from_db()
         self.assertTrue(notification.is_read)
+
+    def test_cursor_pagination_walks_ties_without_duplicates(self):
+        created_at = timezone.now()
+        notifications = [
+            Notification.objects.create(user=self.user, message=f"Message {index}", created_at=created_at)
+            for index in range(5)
+        ]
+        url = reverse("notifications:notifications-list")
+        response = self.client.get(url, {"pagination": "cursor", "page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        seen = [item["id"] for item in response.data["results"]]
+
+        # A newer row arriving mid-walk must not shift the following pages.
+        Notification.objects.create(user=self.user, message="Late arrival")
+        next_url = response.data["next"]
+        while next_url:
+            response = self.client.get(next_url)
+            seen.extend(item["id"] for item in response.data["results"])
+            next_url = response.data["next"]
+        self.assertEqual(seen, [notification.id for notification in reversed(notifications)])
+
+    def test_page_size_only_applies_to_cursor_pages(self):
+        for index in range(3):
+            Notification.objects.create(user=self.user, message=f"Message {index}")
+        url = reverse("notifications:notifications-list")
+        response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertIsNone(response.data["next"])
+        response = self.client.get(url, {"pagination": "cursor", "page_size": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["previous"])
+
+    def test_invalid_cursor_is_rejected(self):
+        url = reverse("notifications:notifications-list")
+        response = self.client.get(url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
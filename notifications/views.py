@@ -7,12 +7,19 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from core.pagination import KeysetPagination
+
 from .models import Notification
 from .serializers import NotificationSerializer
 
 
+class NotificationPagination(KeysetPagination):
+	ordering = ("-created_at", "-id")
+
+
 class NotificationListView(generics.ListAPIView):
 	serializer_class = NotificationSerializer
+	pagination_class = NotificationPagination
 	permission_classes = (permissions.IsAuthenticated,)
 
 	def get_queryset(self):
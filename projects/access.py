@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from teams.models import TeamMember
+
+from .models import ProjectAccess, ProjectMember
+
+# ProjectAccess.role_bits
+PROJECT_MEMBER = 1 << 0
+PROJECT_EDITOR = 1 << 1
+PROJECT_MANAGER = 1 << 2
+TEAM_MEMBER = 1 << 3
+TEAM_ADMIN = 1 << 4
+TEAM_OWNER = 1 << 5
+
+PROJECT_ROLE_BITS = {
+    ProjectMember.RoleChoices.VIEWER: PROJECT_MEMBER,
+    ProjectMember.RoleChoices.MEMBER: PROJECT_MEMBER | PROJECT_EDITOR,
+    ProjectMember.RoleChoices.MANAGER: PROJECT_MEMBER | PROJECT_EDITOR | PROJECT_MANAGER,
+}
+TEAM_ROLE_BITS = {
+    TeamMember.RoleChoices.VIEWER: TEAM_MEMBER,
+    TeamMember.RoleChoices.MEMBER: TEAM_MEMBER,
+    TeamMember.RoleChoices.ADMIN: TEAM_MEMBER | TEAM_ADMIN,
+    TeamMember.RoleChoices.OWNER: TEAM_MEMBER | TEAM_ADMIN | TEAM_OWNER,
+}
+
+
+def role_bits(project_role: str, team_role: Optional[str]) -> int:
+    return PROJECT_ROLE_BITS.get(project_role, PROJECT_MEMBER) | TEAM_ROLE_BITS.get(team_role, 0)
+
+
+def refresh_project_access(**lookup) -> int:
+    """
+    Rewrite the ProjectAccess rows selected by ``lookup`` (``user_id=``, ``project_id=``,
+    ``project__team_id=``, ... or nothing for all of them) from the memberships they are
+    derived from. Runs in the caller's transaction with a fixed number of queries; returns
+    how many rows were created, changed or removed.
+    """
+    members = list(ProjectMember.objects.filter(**lookup).values_list("user_id", "project_id", "role", "project__team_id"))
+    team_roles = {}
+    if members:
+        team_roles = {
+            (user_id, team_id): role
+            for user_id, team_id, role in TeamMember.objects.filter(
+                user_id__in={member[0] for member in members},
+                team_id__in={member[3] for member in members},
+            ).values_list("user_id", "team_id", "role")
+        }
+    wanted = {
+        (user_id, project_id): role_bits(role, team_roles.get((user_id, team_id)))
+        for user_id, project_id, role, team_id in members
+    }
+    stored = {
+        (user_id, project_id): (pk, bits)
+        for pk, user_id, project_id, bits in ProjectAccess.objects.filter(**lookup).values_list(
+            "id", "user_id", "project_id", "role_bits"
+        )
+    }
+
+    removed = [pk for key, (pk, _) in stored.items() if key not in wanted]
+    if removed:
+        ProjectAccess.objects.filter(pk__in=removed).delete()
+    changed: Dict[int, list] = {}
+    for key, bits in wanted.items():
+        if key in stored and stored[key][1] != bits:
+            changed.setdefault(bits, []).append(stored[key][0])
+    for bits, pks in changed.items():
+        ProjectAccess.objects.filter(pk__in=pks).update(role_bits=bits)
+    created = [
+        ProjectAccess(user_id=user_id, project_id=project_id, role_bits=bits)
+        for (user_id, project_id), bits in wanted.items()
+        if (user_id, project_id) not in stored
+    ]
+    ProjectAccess.objects.bulk_create(created, batch_size=1000)
+    return len(removed) + sum(len(pks) for pks in changed.values()) + len(created)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+from datetime import datetime
+from typing import Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from rest_framework.renderers import BaseRenderer
+
+from comments.models import Comment
+from tasks.models import Subtask, Task
+
+EXPORT_CHUNK_SIZE = 2000
+# CSV cells holding several values use the same separator the task importer reads.
+MULTI_VALUE_SEPARATOR = ";"
+CSV_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "list_name",
+    "status",
+    "assigned_to",
+    "priority",
+    "due_date",
+    "tags",
+    "subtasks",
+    "comment_count",
+    "position",
+    "created_at",
+    "updated_at",
+)
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only error payloads reach the renderer; exports themselves are streamed.
+        return json.dumps(data, cls=DjangoJSONEncoder) + "\n"
+
+
+class CSVRenderer(NDJSONRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+def export_queryset(project):
+    """
+    Tasks of ``project`` with everything the export writes. Used with ``.iterator(chunk_size)``,
+    Django runs the prefetches once per chunk, so memory stays flat however big the project is.
+    """
+    return (
+        Task.objects.filter(project=project)
+        .select_related("board_list", "assigned_to")
+        .prefetch_related(
+            Prefetch("subtasks", queryset=Subtask.objects.only("id", "task_id", "title", "completed", "position")),
+            Prefetch("comments", queryset=Comment.objects.select_related("user").order_by("created_at", "id")),
+        )
+        .order_by("id")
+    )
+
+
+def task_record(task: Task) -> dict:
+    return {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "list_name": task.board_list.name,
+        "status": task.status,
+        "assigned_to": task.assigned_to.email if task.assigned_to else None,
+        "priority": task.priority,
+        "due_date": task.due_date,
+        "tags": task.tags,
+        "position": task.position,
+        "created_at": task.created_at,
+        "updated_at": task.updated_at,
+        "subtasks": [
+            {"id": subtask.id, "title": subtask.title, "completed": subtask.completed, "position": subtask.position}
+            for subtask in task.subtasks.all()
+        ],
+        "comments": [
+            {
+                "id": comment.id,
+                "user": comment.user.email if comment.user else None,
+                "text": comment.text,
+                "created_at": comment.created_at,
+            }
+            for comment in task.comments.all()
+        ],
+    }
+
+
+def iter_ndjson(project, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    for task in export_queryset(project).iterator(chunk_size=chunk_size):
+        yield json.dumps(task_record(task), cls=DjangoJSONEncoder) + "\n"
+
+
+def iter_csv(project, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    One row per task. Tags and subtask titles are ``;``-joined so the file can be fed back to
+    the task importer; comments are summarised as a count (use NDJSON for their text).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for task in export_queryset(project).iterator(chunk_size=chunk_size):
+        record = task_record(task)
+        record["tags"] = MULTI_VALUE_SEPARATOR.join(record["tags"] or [])
+        record["subtasks"] = MULTI_VALUE_SEPARATOR.join(subtask["title"] for subtask in record["subtasks"])
+        record["comment_count"] = len(record.pop("comments"))
+        for key in ("due_date", "created_at", "updated_at"):
+            record[key] = record[key].isoformat() if record[key] else ""
+        writer.writerow([record[column] for column in CSV_COLUMNS])
+        yield flush()
+
+
+EXPORTERS = {
+    NDJSONRenderer.format: (iter_ndjson, NDJSONRenderer.media_type),
+    CSVRenderer.format: (iter_csv, CSVRenderer.media_type),
+}
+
+
+def export_file_name(project_id: int, file_format: str, moment: datetime) -> str:
+    return f"project-{project_id}-{moment:%Y%m%d%H%M%S}.{file_format}.gz"
+
+
+def export_file_pattern(project_id: int):
+    # Storage may add a random suffix to a taken name; nothing with a path separator matches.
+    return re.compile(rf"project-{project_id}-\d{{14}}(_\w+)?\.({'|'.join(EXPORTERS)})\.gz")
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.access import refresh_project_access
+from projects.membership import invalidate_memberships
+from projects.models import Project, ProjectAccess, ProjectMember
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ProjectAccess table from project and team memberships"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, action="append", help="Limit to these project ids")
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by("id")
+        if options["project"]:
+            projects = projects.filter(pk__in=options["project"])
+        repaired = 0
+        for project_id in projects.values_list("id", flat=True).iterator():
+            with transaction.atomic():
+                users = set(ProjectAccess.objects.filter(project_id=project_id).values_list("user_id", flat=True))
+                changed = refresh_project_access(project_id=project_id)
+                if changed:
+                    users |= set(ProjectMember.objects.filter(project_id=project_id).values_list("user_id", flat=True))
+                    invalidate_memberships(users)
+            if changed:
+                repaired += 1
+                self.stdout.write(f"Project {project_id}: rewrote {changed} access row(s)")
+        self.stdout.write(f"Rebuilt project access; {repaired} project(s) had drifted")
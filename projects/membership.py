@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import uuid
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from teams.models import TeamMember
+
+from .access import PROJECT_MANAGER
+from .models import ProjectAccess
+
+VERSION_KEY = "memberships:version:{user_id}"
+ROLES_KEY = "memberships:access:{user_id}:{version}"
+
+
+class Memberships:
+    """A user's ``{project_id: ProjectAccess.role_bits}`` and ``{team_id: role}``."""
+
+    def __init__(self, user_id: Optional[int], projects: Dict[int, int], teams: Dict[int, str]):
+        self.user_id = user_id
+        self.projects = projects
+        self.teams = teams
+
+    @property
+    def project_ids(self):
+        return self.projects.keys()
+
+    @property
+    def team_ids(self):
+        return self.teams.keys()
+
+    def project_bits(self, project_id: Optional[int]) -> int:
+        return self.projects.get(project_id, 0)
+
+    def team_role(self, team_id: Optional[int]) -> Optional[str]:
+        return self.teams.get(team_id)
+
+    def is_project_member(self, project_id: Optional[int]) -> bool:
+        return project_id in self.projects
+
+    def is_project_manager(self, project_id: Optional[int]) -> bool:
+        return bool(self.project_bits(project_id) & PROJECT_MANAGER)
+
+    def manages_all(self, project_ids: Iterable[int]) -> bool:
+        return all(self.is_project_manager(project_id) for project_id in project_ids)
+
+    def is_team_member(self, team_id: Optional[int]) -> bool:
+        return team_id in self.teams
+
+
+def _current_version(user_id: int) -> str:
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Versions are random rather than counters, so an evicted version key can never bring
+        # an older cached entry back into use.
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def load_memberships(user_id: int) -> Memberships:
+    return Memberships(
+        user_id,
+        dict(ProjectAccess.objects.filter(user_id=user_id).values_list("project_id", "role_bits")),
+        dict(TeamMember.objects.filter(user_id=user_id).values_list("team_id", "role")),
+    )
+
+
+def memberships_for_user(user_id: Optional[int]) -> Memberships:
+    """A user's memberships from the cache, loading them with two queries on a miss."""
+    if user_id is None:
+        return Memberships(None, {}, {})
+    key = ROLES_KEY.format(user_id=user_id, version=_current_version(user_id))
+    cached = cache.get(key)
+    if cached is not None:
+        return Memberships(user_id, *cached)
+    memberships = load_memberships(user_id)
+    cache.set(key, (memberships.projects, memberships.teams), timeout=settings.MEMBERSHIP_CACHE_SECONDS)
+    return memberships
+
+
+def get_memberships(request) -> Memberships:
+    """``request.user``'s memberships, resolved at most once per request."""
+    http_request = getattr(request, "_request", request)
+    memberships = getattr(http_request, "_memberships", None)
+    if memberships is None or memberships.user_id != request.user.pk:
+        memberships = http_request._memberships = memberships_for_user(request.user.pk)
+    return memberships
+
+
+def invalidate_memberships(user_ids: Iterable[int]) -> None:
+    """
+    Retire the cached memberships of ``user_ids``. Done at once and again on commit, so a
+    request racing the transaction cannot leave pre-commit roles cached under the new version.
+    """
+    user_ids = set(user_ids)
+
+    def bump():
+        cache.set_many({VERSION_KEY.format(user_id=user_id): uuid.uuid4().hex for user_id in user_ids}, timeout=None)
+
+    if user_ids:
+        bump()
+        transaction.on_commit(bump)
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Same values as projects.access at the time of writing.
+PROJECT_ROLE_BITS = {"viewer": 0b1, "member": 0b11, "manager": 0b111}
+TEAM_ROLE_BITS = {"viewer": 0b1000, "member": 0b1000, "admin": 0b11000, "owner": 0b111000}
+
+
+def backfill_project_access(apps, schema_editor):
+    ProjectMember = apps.get_model("projects", "ProjectMember")
+    ProjectAccess = apps.get_model("projects", "ProjectAccess")
+    TeamMember = apps.get_model("teams", "TeamMember")
+    team_roles = {(user_id, team_id): role for user_id, team_id, role in TeamMember.objects.values_list("user_id", "team_id", "role")}
+    rows = (
+        ProjectAccess(
+            user_id=user_id,
+            project_id=project_id,
+            role_bits=PROJECT_ROLE_BITS.get(role, 0b1) | TEAM_ROLE_BITS.get(team_roles.get((user_id, team_id)), 0),
+        )
+        for user_id, project_id, role, team_id in ProjectMember.objects.values_list(
+            "user_id", "project_id", "role", "project__team_id"
+        ).iterator()
+    )
+    ProjectAccess.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_card_counters'),
+        ('teams', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role_bits', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='projects.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'project'), name='project_access_user_project')],
+            },
+        ),
+        migrations.RunPython(backfill_project_access, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
+from boards.models import CardCounters
+from core.tracking import TrackedFieldsMixin
 
-class Project(models.Model):
+
+class Project(TrackedFieldsMixin, CardCounters):
 	team = models.ForeignKey("teams.Team", related_name="projects", on_delete=models.CASCADE)
 	name = models.CharField(max_length=150)
 	description = models.TextField(blank=True)
 	archived = models.BooleanField(default=False)
+	# Bumped whenever the project or its membership changes; backs the project ETag.
+	version = models.PositiveBigIntegerField(default=1)
 	created_at = models.DateTimeField(default=timezone.now)
 	updated_at = models.DateTimeField(auto_now=True)
 
@@ -17,6 +22,13 @@ class Project(models.Model):
 		ordering = ("-created_at", "name")
 		unique_together = ("team", "name")
 
+	tracked_fields = ("team_id",)
+
+	def save(self, *args, **kwargs):
+		# Moving a project to another team rewrites its ProjectAccess rows in the same transaction.
+		with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+			super().save(*args, **kwargs)
+
 	def __str__(self):
 		return f"{self.name} ({self.team})"
 
@@ -39,6 +51,26 @@ class ProjectMember(models.Model):
 	def __str__(self):
 		return f"{self.user} -> {self.project} ({self.role})"
 
+	def save(self, *args, **kwargs):
+		# The member's ProjectAccess row is rewritten by a post-save receiver in the same transaction.
+		with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+			super().save(*args, **kwargs)
+
 	@property
 	def is_manager(self):
 		return self.role == self.RoleChoices.MANAGER
+
+
+# What each project member may do there, folded from their project and team roles into bit
+# flags (projects.access) so authorization is one lookup on (user, project). Derived data:
+# kept in step by the membership receivers and rebuilt by `manage.py rebuild_project_access`.
+class ProjectAccess(models.Model):
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="project_access", on_delete=models.CASCADE)
+	project = models.ForeignKey(Project, related_name="access", on_delete=models.CASCADE)
+	role_bits = models.PositiveIntegerField(default=0)
+
+	class Meta:
+		constraints = [models.UniqueConstraint(fields=("user", "project"), name="project_access_user_project")]
+
+	def __str__(self):
+		return f"{self.user_id} -> {self.project_id} ({self.role_bits:b})"
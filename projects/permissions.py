@@ -2,17 +2,18 @@ from __future__ import annotations
 
 from rest_framework.permissions import BasePermission
 
-from .models import Project, ProjectMember
+from .membership import get_memberships
+from .models import Project
 
 
-def _extract_project(obj):
+def _extract_project_id(obj):
     if isinstance(obj, Project):
-        return obj
-    if hasattr(obj, "project"):
-        return obj.project
+        return obj.pk
+    if hasattr(obj, "project_id"):
+        return obj.project_id
     if hasattr(obj, "board"):
         board = getattr(obj, "board")
-        return getattr(board, "project", None)
+        return getattr(board, "project_id", None)
     return None
 
 
@@ -20,21 +21,17 @@ class IsProjectMember(BasePermission):
     message = "You must be a project member."
 
     def has_object_permission(self, request, view, obj):
-        project = _extract_project(obj)
-        if not project or not request.user.is_authenticated:
+        project_id = _extract_project_id(obj)
+        if not project_id or not request.user.is_authenticated:
             return False
-        return ProjectMember.objects.filter(project=project, user=request.user).exists()
+        return get_memberships(request).is_project_member(project_id)
 
 
 class IsProjectManager(BasePermission):
     message = "You must be a project manager."
 
     def has_object_permission(self, request, view, obj):
-        project = _extract_project(obj)
-        if not project or not request.user.is_authenticated:
+        project_id = _extract_project_id(obj)
+        if not project_id or not request.user.is_authenticated:
             return False
-        return ProjectMember.objects.filter(
-            project=project,
-            user=request.user,
-            role=ProjectMember.RoleChoices.MANAGER,
-        ).exists()
+        return get_memberships(request).is_project_manager(project_id)
@@ -3,8 +3,10 @@ from __future__ import annotations
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from boards.serializers import CardCountersSerializer
 from teams.models import Team
 
+from .membership import get_memberships
 from .models import Project, ProjectMember
 from .services import add_project_member
 
@@ -35,6 +37,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     team_id = serializers.PrimaryKeyRelatedField(source="team", queryset=Team.objects.all())
     team = serializers.CharField(source="team.name", read_only=True)
     members = ProjectMemberSerializer(many=True, read_only=True)
+    counters = CardCountersSerializer(source="*", read_only=True)
 
     class Meta:
         model = Project
@@ -45,11 +48,12 @@ class ProjectSerializer(serializers.ModelSerializer):
             "name",
             "description",
             "archived",
+            "counters",
             "created_at",
             "updated_at",
             "members",
         )
-        read_only_fields = ("id", "team", "created_at", "updated_at", "members")
+        read_only_fields = ("id", "team", "counters", "created_at", "updated_at", "members")
 
     def validate(self, attrs):
         request = self.context.get("request")
@@ -57,6 +61,6 @@ class ProjectSerializer(serializers.ModelSerializer):
         if not team and self.instance:
             team = self.instance.team
         if request and team:
-            if not team.members.filter(user=request.user).exists():
+            if not get_memberships(request).is_team_member(team.pk):
                 raise serializers.ValidationError({"team_id": "You must belong to the team."})
         return attrs
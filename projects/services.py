@@ -2,14 +2,20 @@ from __future__ import annotations
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db.models import F
 
-from .models import ProjectMember
+from .membership import memberships_for_user
+from .models import Project, ProjectMember
 
 User = get_user_model()
 
 
+def bump_project_version(project_id: int) -> None:
+    Project.objects.filter(pk=project_id).update(version=F("version") + 1)
+
+
 def add_project_member(*, project, user, role: str = ProjectMember.RoleChoices.MEMBER):
-    if not project.team.members.filter(user=user).exists():
+    if not memberships_for_user(user.pk).is_team_member(project.team_id):
         raise ValidationError("User must belong to the team before joining the project.")
 
     membership, created = ProjectMember.objects.get_or_create(
@@ -1,9 +1,12 @@
 import logging
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from .access import refresh_project_access
+from .membership import invalidate_memberships
 from .models import Project, ProjectMember
+from .services import bump_project_version
 
 logger = logging.getLogger(__name__)
 
@@ -20,3 +23,30 @@ def log_project_activity(sender, instance, created, **kwargs):
 def log_project_member(sender, instance, created, **kwargs):
     if created:
         logger.info("User %s added to project %s as %s", instance.user_id, instance.project_id, instance.role)
+
+
+@receiver(post_save, sender=Project)
+def bump_project_on_update(sender, instance, created, **kwargs):
+    if not created:
+        bump_project_version(instance.pk)
+
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectMember)
+def bump_project_on_membership_change(sender, instance, **kwargs):
+    bump_project_version(instance.project_id)
+
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectMember)
+def invalidate_project_memberships(sender, instance, **kwargs):
+    refresh_project_access(user_id=instance.user_id, project_id=instance.project_id)
+    invalidate_memberships([instance.user_id])
+
+
+@receiver(post_save, sender=Project)
+def refresh_access_on_team_change(sender, instance, created, **kwargs):
+    # Team roles are folded into each member's access bits, so a move to another team rewrites them.
+    if not created and "team_id" in instance.get_field_changes():
+        refresh_project_access(project_id=instance.pk)
+        invalidate_memberships(instance.members.values_list("user_id", flat=True))
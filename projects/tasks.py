@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import tempfile
+
+from celery import shared_task
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+
+from notifications.models import Notification
+
+from .exports import EXPORTERS, export_file_name
+from .models import Project
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def export_project(self, project_id: int, file_format: str = "ndjson", user_id: int | None = None) -> str:
+    project = Project.objects.get(pk=project_id)
+    iter_export, _ = EXPORTERS[file_format]
+    name = f"exports/{export_file_name(project_id, file_format, timezone.now())}"
+    # Compressed into a spooled temp file chunk by chunk, then handed to storage in one piece.
+    with tempfile.TemporaryFile() as spool:
+        with gzip.GzipFile(fileobj=spool, mode="wb") as archive:
+            for chunk in iter_export(project):
+                archive.write(chunk.encode())
+        spool.seek(0)
+        path = default_storage.save(name, File(spool))
+    logger.info("Exported project %s to %s", project_id, path)
+    if user_id:
+        # Linked through the API, which checks project membership; storage URLs are not protected.
+        download = reverse("projects:project-export-download", args=[project_id, os.path.basename(path)])
+        Notification.objects.create(
+            user_id=user_id,
+            message=f"Your export of {project.name} is ready: {download}",
+        )
+    return path
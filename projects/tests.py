@@ -1,10 +1,30 @@
+import csv
+import glob
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from boards.models import Board
+from comments.models import Comment
+from notifications.models import Notification
+from tasks.models import Subtask, Task
 from teams.models import Team, TeamMember
-from .models import Project
+from .access import PROJECT_EDITOR, PROJECT_MANAGER, PROJECT_MEMBER, TEAM_ADMIN, TEAM_MEMBER, TEAM_OWNER
+from .models import Project, ProjectAccess, ProjectMember
+from .visibility import visible_to
 
 User = get_user_model()
 
@@ -29,3 +49,179 @@ class ProjectEndpointsTests(APITestCase):
 		response = self.client.get(url)
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
 		self.assertTrue(len(response.data) >= 1)
+
+	def test_detail_etag_changes_with_membership(self):
+		project = Project.objects.create(team=self.team, name="Polled")
+		ProjectMember.objects.create(project=project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+		url = reverse("projects:project-detail", args=[project.id])
+		etag = self.client.get(url)["ETag"]
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+		teammate = User.objects.create_user(email="mate@example.com", password="StrongPass123")
+		TeamMember.objects.create(team=self.team, user=teammate, role=TeamMember.RoleChoices.MEMBER)
+		ProjectMember.objects.create(project=project, user=teammate)
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(len(response.data["members"]), 2)
+
+	def test_detail_etag_changes_when_a_member_renames_themselves(self):
+		project = Project.objects.create(team=self.team, name="Named")
+		ProjectMember.objects.create(project=project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+		url = reverse("projects:project-detail", args=[project.id])
+		etag = self.client.get(url)["ETag"]
+
+		self.user.save()
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+		self.user.name = "Renamed"
+		self.user.save()
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data["members"][0]["user"]["name"], "Renamed")
+
+	def test_detail_etag_changes_when_a_card_is_added(self):
+		project = Project.objects.create(team=self.team, name="Counted")
+		ProjectMember.objects.create(project=project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+		board = Board.objects.create(project=project, name="Board")
+		url = reverse("projects:project-detail", args=[project.id])
+		etag = self.client.get(url)["ETag"]
+
+		Task.objects.create(project=project, board_list=board.lists.first(), title="New card")
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data["counters"]["total"], 1)
+
+	def test_membership_checks_hit_the_cache_and_follow_role_changes(self):
+		project = Project.objects.create(team=self.team, name="Guarded")
+		membership = ProjectMember.objects.create(project=project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+		url = reverse("projects:project-detail", args=[project.id])
+		self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+		with CaptureQueriesContext(connection) as queries:
+			self.assertEqual(self.client.patch(url, {"description": "Updated"}, format="json").status_code, status.HTTP_200_OK)
+		membership_queries = [
+			query["sql"] for query in queries.captured_queries
+			if re.search(r'FROM "(projects_projectmember|teams_teammember)" WHERE .*"user_id" = ', query["sql"])
+		]
+		self.assertEqual(membership_queries, [])
+
+		membership.role = ProjectMember.RoleChoices.VIEWER
+		membership.save()
+		self.assertEqual(self.client.patch(url, {"description": "Again"}, format="json").status_code, status.HTTP_403_FORBIDDEN)
+		membership.delete()
+		self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+	def test_visibility_scoping_keeps_index_order(self):
+		project = self._project_with_tasks()
+		other = Project.objects.create(team=self.team, name="Other")
+		ProjectMember.objects.create(project=other, user=self.user)
+		hidden = Project.objects.create(team=self.team, name="Hidden")
+		request = RequestFactory().get("/")
+		request.user = self.user
+		task = project.tasks.first()
+		self.assertEqual(set(visible_to(Project.objects.all(), request, "pk")), {project, other})
+		with mock.patch("projects.visibility.MAX_VISIBLE_PROJECT_IDS", 1):
+			# Past the limit the same rows come from an EXISTS on the memberships.
+			self.assertEqual(set(visible_to(Project.objects.all(), request, "pk")), {project, other})
+			self.assertEqual(visible_to(Comment.objects.all(), request, "task__project").count(), 1)
+
+		queries = (
+			visible_to(Task.objects.all(), request).filter(project=project).order_by("position", "id"),
+			visible_to(Task.objects.all(), request).filter(board_list=task.board_list).order_by("position", "id"),
+			visible_to(Comment.objects.all(), request, "task__project").filter(task=task).order_by("-created_at", "id"),
+		)
+		for queryset in queries:
+			with transaction.atomic(), connection.cursor() as cursor:
+				if connection.vendor == "postgresql":
+					# The test tables are tiny; make the planner show which index it would use at scale.
+					cursor.execute("SET LOCAL enable_seqscan = off")
+				plan = queryset.explain()
+			self.assertNotIn("DISTINCT", str(queryset.query))
+			self.assertNotRegex(plan, r"\bSort\b|Unique|HashAggregate|TEMP B-TREE|Seq Scan|SCAN (tasks_task|comments_comment)\b", plan)
+		self.assertFalse(visible_to(Task.objects.all(), request).filter(project=hidden).exists())
+
+	def test_access_rows_follow_memberships_and_can_be_rebuilt(self):
+		project = Project.objects.create(team=self.team, name="Access")
+		teammate = User.objects.create_user(email="access@example.com", password="StrongPass123")
+		team_membership = TeamMember.objects.create(team=self.team, user=teammate, role=TeamMember.RoleChoices.MEMBER)
+		membership = ProjectMember.objects.create(project=project, user=teammate, role=ProjectMember.RoleChoices.VIEWER)
+		ProjectMember.objects.create(project=project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+
+		def bits(user):
+			return ProjectAccess.objects.filter(project=project, user=user).values_list("role_bits", flat=True).first()
+
+		self.assertEqual(bits(self.user), PROJECT_MEMBER | PROJECT_EDITOR | PROJECT_MANAGER | TEAM_MEMBER | TEAM_ADMIN | TEAM_OWNER)
+		self.assertEqual(bits(teammate), PROJECT_MEMBER | TEAM_MEMBER)
+		membership.role = ProjectMember.RoleChoices.MEMBER
+		membership.save()
+		team_membership.role = TeamMember.RoleChoices.ADMIN
+		team_membership.save()
+		self.assertEqual(bits(teammate), PROJECT_MEMBER | PROJECT_EDITOR | TEAM_MEMBER | TEAM_ADMIN)
+
+		# Moved to a team the teammate is not in: only the project role is left.
+		elsewhere = Team.objects.create(name="Elsewhere", description="", created_by=self.user)
+		project.team = elsewhere
+		project.save()
+		self.assertEqual(bits(teammate), PROJECT_MEMBER | PROJECT_EDITOR)
+		membership.delete()
+		self.assertIsNone(bits(teammate))
+
+		ProjectAccess.objects.filter(project=project, user=self.user).update(role_bits=0)
+		ProjectAccess.objects.create(project=project, user=teammate, role_bits=PROJECT_MANAGER)
+		output = io.StringIO()
+		call_command("rebuild_project_access", "--project", str(project.id), stdout=output)
+		self.assertIn("1 project(s) had drifted", output.getvalue())
+		self.assertEqual(bits(self.user), PROJECT_MEMBER | PROJECT_EDITOR | PROJECT_MANAGER)
+		self.assertIsNone(bits(teammate))
+
+	def _project_with_tasks(self):
+		project = Project.objects.create(team=self.team, name="Exported")
+		ProjectMember.objects.create(project=project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+		board = Board.objects.create(project=project, name="Export Board")
+		todo = board.lists.first()
+		first = Task.objects.create(project=project, board_list=todo, title="First", tags=["api", "db"])
+		Subtask.objects.create(task=first, title="Step", completed=True)
+		Comment.objects.create(task=first, user=self.user, text="Looks good")
+		Task.objects.create(project=project, board_list=todo, title="Second")
+		return project
+
+	def test_export_streams_ndjson_by_default(self):
+		project = self._project_with_tasks()
+		response = self.client.get(reverse("projects:project-export", args=[project.id]))
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertTrue(response.streaming)
+		records = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+		self.assertEqual([record["title"] for record in records], ["First", "Second"])
+		self.assertEqual(records[0]["subtasks"][0]["title"], "Step")
+		self.assertEqual(records[0]["comments"][0]["text"], "Looks good")
+		self.assertEqual(records[0]["tags"], ["api", "db"])
+
+	def test_export_csv_matches_import_columns(self):
+		project = self._project_with_tasks()
+		response = self.client.get(reverse("projects:project-export", args=[project.id]), {"format": "csv"})
+		self.assertEqual(response["Content-Type"], "text/csv")
+		rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+		self.assertEqual(len(rows), 2)
+		self.assertEqual((rows[0]["tags"], rows[0]["subtasks"], rows[0]["comment_count"]), ("api;db", "Step", "1"))
+
+	def test_async_export_writes_gzip_and_notifies(self):
+		project = self._project_with_tasks()
+		with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+			response = self.client.get(reverse("projects:project-export", args=[project.id]), {"async": "1"})
+			self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+			path = glob.glob(os.path.join(media_root, "exports", "*.ndjson.gz"))[0]
+			with gzip.open(path, "rt") as archive:
+				self.assertEqual(len(archive.read().splitlines()), 2)
+
+			link = Notification.objects.get(user=self.user, message__contains="export").message.rsplit(" ", 1)[1]
+			self.assertEqual(link, reverse("projects:project-export-download", args=[project.id, os.path.basename(path)]))
+			response = self.client.get(link)
+			self.assertEqual(response.status_code, status.HTTP_200_OK)
+			self.assertEqual(gzip.decompress(b"".join(response.streaming_content)).decode().count("\n"), 2)
+			response.close()
+			self.assertEqual(
+				self.client.get(reverse("projects:project-export-download", args=[project.id, "..%2Fsecret.gz"])).status_code,
+				status.HTTP_404_NOT_FOUND,
+			)
+
+			outsider = User.objects.create_user(email="outsider@example.com", password="StrongPass123")
+			self.client.force_authenticate(outsider)
+			self.assertEqual(self.client.get(link).status_code, status.HTTP_403_FORBIDDEN)
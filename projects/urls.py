@@ -1,6 +1,12 @@
 from django.urls import path
 
-from .views import ProjectDetailView, ProjectListCreateView, ProjectMembersView
+from .views import (
+    ProjectDetailView,
+    ProjectExportDownloadView,
+    ProjectExportView,
+    ProjectListCreateView,
+    ProjectMembersView,
+)
 
 app_name = "projects"
 
@@ -8,4 +14,6 @@ urlpatterns = [
     path("", ProjectListCreateView.as_view(), name="project-list"),
     path("<int:pk>/", ProjectDetailView.as_view(), name="project-detail"),
     path("<int:pk>/members/", ProjectMembersView.as_view(), name="project-members"),
+    path("<int:pk>/export/", ProjectExportView.as_view(), name="project-export"),
+    path("<int:pk>/exports/<str:name>", ProjectExportDownloadView.as_view(), name="project-export-download"),
 ]
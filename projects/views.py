@@ -1,34 +1,38 @@
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.conditional import etag_for, etag_matches, not_modified
+from core.prefetch import PrefetchPlannerMixin
+
+from .exports import EXPORTERS, CSVRenderer, NDJSONRenderer, export_file_pattern
+from .membership import get_memberships
 from .models import Project, ProjectMember
 from .permissions import IsProjectManager, IsProjectMember
 from .serializers import ProjectMemberSerializer, ProjectSerializer
+from .visibility import visible_to
 from .services import add_project_member, remove_project_member
+from .tasks import export_project
 
 User = get_user_model()
 
 
-class ProjectListCreateView(generics.ListCreateAPIView):
+class ProjectListCreateView(PrefetchPlannerMixin, generics.ListCreateAPIView):
 	serializer_class = ProjectSerializer
 	permission_classes = (permissions.IsAuthenticated,)
 
 	def get_queryset(self):
-		return (
-			Project.objects.filter(members__user=self.request.user)
-			.select_related("team")
-			.prefetch_related("members__user")
-			.distinct()
-		)
+		return visible_to(Project.objects.all(), self.request, "pk")
 
 	def perform_create(self, serializer):
 		team = serializer.validated_data.get("team")
-		if not team.members.filter(user=self.request.user).exists():
+		if not get_memberships(self.request).is_team_member(team.pk):
 			raise PermissionDenied("You must belong to the team.")
 		project = serializer.save()
 		add_project_member(
@@ -38,16 +42,11 @@ class ProjectListCreateView(generics.ListCreateAPIView):
 		)
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectDetailView(PrefetchPlannerMixin, generics.RetrieveUpdateDestroyAPIView):
 	serializer_class = ProjectSerializer
 
 	def get_queryset(self):
-		return (
-			Project.objects.filter(members__user=self.request.user)
-			.select_related("team")
-			.prefetch_related("members__user")
-			.distinct()
-		)
+		return visible_to(Project.objects.all(), self.request, "pk")
 
 	def get_permissions(self):
 		if self.request.method in permissions.SAFE_METHODS:
@@ -56,6 +55,17 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
 			permission_classes = (permissions.IsAuthenticated, IsProjectManager)
 		return [permission() for permission in permission_classes]
 
+	def retrieve(self, request, *args, **kwargs):
+		# Answer conditional polls from the version counter before anything is serialized.
+		version = self.get_queryset().filter(pk=kwargs["pk"]).values_list("version", flat=True).first()
+		etag = etag_for("project", kwargs["pk"], version) if version else None
+		if etag and etag_matches(request, etag):
+			return not_modified(etag)
+		response = super().retrieve(request, *args, **kwargs)
+		if etag:
+			response["ETag"] = etag
+		return response
+
 
 class ProjectMembersView(APIView):
 	permission_classes = (permissions.IsAuthenticated,)
@@ -103,3 +113,35 @@ class ProjectMembersView(APIView):
 		except DjangoValidationError as exc:
 			raise ValidationError(exc.message or str(exc)) from exc
 		return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ProjectExportView(APIView):
+	# The renderers make `?format=ndjson|csv` negotiate; the export itself is streamed.
+	renderer_classes = (NDJSONRenderer, CSVRenderer)
+	permission_classes = (permissions.IsAuthenticated, IsProjectMember)
+
+	def get(self, request, pk):
+		project = get_object_or_404(Project, pk=pk)
+		self.check_object_permissions(request, project)
+		file_format = request.accepted_renderer.format
+		if request.query_params.get("async") in ("1", "true"):
+			job = export_project.delay(project.id, file_format, request.user.id)
+			return Response({"task_id": job.id}, status=status.HTTP_202_ACCEPTED)
+
+		iter_export, content_type = EXPORTERS[file_format]
+		response = StreamingHttpResponse(iter_export(project), content_type=content_type)
+		response["Content-Disposition"] = f'attachment; filename="project-{project.id}-tasks.{file_format}"'
+		return response
+
+
+class ProjectExportDownloadView(APIView):
+	# Finished background exports are only served through here, to members of their project.
+	permission_classes = (permissions.IsAuthenticated, IsProjectMember)
+
+	def get(self, request, pk, name):
+		project = get_object_or_404(Project, pk=pk)
+		self.check_object_permissions(request, project)
+		path = f"exports/{name}"
+		if not export_file_pattern(project.id).fullmatch(name) or not default_storage.exists(path):
+			raise Http404
+		return FileResponse(default_storage.open(path, "rb"), as_attachment=True, filename=name)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from django.db.models import Exists, OuterRef
+
+from .membership import get_memberships
+from .models import ProjectAccess
+
+# Past this many projects the id list is swapped for an EXISTS on ProjectAccess, a semi-join on
+# its (user, project) key instead of an ever longer IN list.
+MAX_VISIBLE_PROJECT_IDS = 500
+
+
+def visible_to(queryset, request, project_field: str = "project"):
+    """
+    Narrow ``queryset`` to rows in projects ``request.user`` belongs to, reaching the project
+    through ``project_field`` (``"pk"`` for projects, ``"board__project"`` for lists, ...).
+
+    Filters on the cached project-id set rather than joining the membership table, so no
+    ``DISTINCT`` is needed and ``ORDER BY`` can be read straight from an index that starts
+    with the project.
+    """
+    project_ids = list(get_memberships(request).project_ids)
+    if len(project_ids) <= MAX_VISIBLE_PROJECT_IDS:
+        return queryset.filter(**{f"{project_field}__in": project_ids})
+    access = ProjectAccess.objects.filter(user=request.user, project=OuterRef(project_field))
+    return queryset.filter(Exists(access))
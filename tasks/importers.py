@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import csv
+import json
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.functions import Lower
+from django.utils import timezone
+from rest_framework import serializers
+
+from activity.services import create_activity_log
+from boards.counters import add_card_counts, card_counts, shift_card_counters
+from boards.models import BoardList
+from boards.services import bump_board_version
+
+from .models import POSITION_STEP, Subtask, Task
+from .serializers import TaskImportRowSerializer
+from .search import index_tasks
+from .tags import add_tag_links, clean_tags
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+# CSV cells holding several values (tags, subtasks) separate them with this character.
+MULTI_VALUE_SEPARATOR = ";"
+FORMATS = ("csv", "ndjson")
+
+# (line number, row, parse error)
+Row = Tuple[int, Optional[dict], Optional[str]]
+
+
+def detect_format(filename: str) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def _read_csv(stream) -> Iterator[Row]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        # Blank cells mean "not provided" so serializer defaults apply.
+        data = {key: value for key, value in row.items() if key and value not in (None, "")}
+        for key in ("tags", "subtasks"):
+            if key in data:
+                data[key] = [item.strip() for item in data[key].split(MULTI_VALUE_SEPARATOR) if item.strip()]
+        yield reader.line_num, data, None
+
+
+def _read_ndjson(stream) -> Iterator[Row]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, "Each line must be a JSON object."
+            continue
+        yield line_number, data, None
+
+
+def read_rows(stream, file_format: str) -> Iterator[Row]:
+    """Lazily parse a text stream; only the current row is held in memory."""
+    if file_format == "csv":
+        return _read_csv(stream)
+    if file_format == "ndjson":
+        return _read_ndjson(stream)
+    raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def _chunks(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class TaskImporter:
+    """
+    Create tasks for one project from parsed rows, ``chunk_size`` rows at a time.
+
+    Each chunk is validated in Python, resolves its assignees with a single query and is
+    written with ``bulk_create`` in its own transaction, so save signals do not run: the
+    importer indexes tags and search documents, shifts the card counters, bumps board
+    versions and logs one ``tasks_imported`` activity entry per chunk itself. Lists and the
+    current end-of-list ranks are loaded once up front; positions are then handed out in
+    memory. Invalid rows are skipped and reported by line number.
+    """
+
+    def __init__(self, project, user=None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.project = project
+        self.user = user
+        self.chunk_size = chunk_size
+        self.row_serializer = TaskImportRowSerializer()
+        self.created = 0
+        self.error_count = 0
+        self.errors: List[dict] = []
+
+        self.lists_by_id = {board_list.id: board_list for board_list in BoardList.objects.filter(board__project=project)}
+        self.lists_by_name = {}
+        for board_list in self.lists_by_id.values():
+            # List names are only unique per board; an ambiguous name cannot be used to import.
+            key = board_list.name.lower()
+            self.lists_by_name[key] = None if key in self.lists_by_name else board_list
+        self.last_rank = dict(
+            Task.objects.filter(board_list_id__in=list(self.lists_by_id))
+            .values("board_list_id")
+            .annotate(max_pos=Max("position"))
+            .values_list("board_list_id", "max_pos")
+        )
+
+    def run(self, rows: Iterable[Row]) -> dict:
+        for chunk in _chunks(rows, self.chunk_size):
+            self._import_chunk(chunk)
+        return {"created": self.created, "error_count": self.error_count, "errors": self.errors}
+
+    def _reject(self, line: int, errors) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def _resolve_list(self, attrs) -> Optional[BoardList]:
+        if "board_list" in attrs:
+            return self.lists_by_id.get(attrs["board_list"])
+        return self.lists_by_name.get(attrs["list_name"].lower())
+
+    def _import_chunk(self, chunk: List[Row]) -> None:
+        valid = []
+        for line, data, error in chunk:
+            if error:
+                self._reject(line, error)
+                continue
+            try:
+                attrs = self.row_serializer.run_validation(data)
+            except serializers.ValidationError as exc:
+                self._reject(line, exc.detail)
+                continue
+            board_list = self._resolve_list(attrs)
+            if board_list is None:
+                self._reject(line, {"board_list": "No single list of this project matches."})
+                continue
+            valid.append((line, attrs, board_list))
+
+        emails = {attrs["assigned_to"].lower() for _, attrs, _ in valid if attrs.get("assigned_to")}
+        members = {}
+        if emails:
+            members = dict(
+                User.objects.annotate(email_lower=Lower("email"))
+                .filter(email_lower__in=emails, project_memberships__project=self.project)
+                .values_list("email_lower", "id")
+            )
+
+        tasks, subtask_titles = [], []
+        for line, attrs, board_list in valid:
+            email = (attrs.get("assigned_to") or "").lower()
+            if email and email not in members:
+                self._reject(line, {"assigned_to": "Not a member of this project."})
+                continue
+            rank = self.last_rank.get(board_list.id, 0) + POSITION_STEP
+            self.last_rank[board_list.id] = rank
+            tasks.append(Task(
+                project=self.project,
+                board_list=board_list,
+                title=attrs["title"],
+                description=attrs["description"],
+                assigned_to_id=members.get(email),
+                priority=attrs["priority"],
+                due_date=attrs["due_date"],
+                tags=attrs["tags"],
+                status=board_list.name,
+                position=rank,
+                subtasks_total=len(attrs["subtasks"]),
+            ))
+            subtask_titles.append(attrs["subtasks"])
+        if not tasks:
+            return
+
+        now = timezone.now()
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            Subtask.objects.bulk_create([
+                Subtask(task=task, title=title, position=index)
+                for task, titles in zip(tasks, subtask_titles)
+                for index, title in enumerate(titles, start=1)
+            ])
+            add_tag_links(self.project.id, [(task.pk, name) for task in tasks for name in clean_tags(task.tags)])
+            index_tasks(task.pk for task in tasks)
+            counters = {}
+            for task in tasks:
+                add_card_counts(counters, task.board_list_id, card_counts(task.priority, task.due_date, now))
+            shift_card_counters(counters)
+            bump_board_version(lists__in={task.board_list_id for task in tasks})
+            create_activity_log(
+                user=self.user,
+                action="tasks_imported",
+                target=self.project,
+                metadata={
+                    "project_id": str(self.project.id),
+                    "count": len(tasks),
+                    "first_task_id": str(tasks[0].pk),
+                    "last_task_id": str(tasks[-1].pk),
+                },
+            )
+        self.created += len(tasks)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+from tasks.tags import rebuild_project_tag_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Tag/TaskTag index and tag counts from Task.tags"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, action="append", help="Limit to these project ids")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by("id")
+        if options["project"]:
+            projects = projects.filter(pk__in=options["project"])
+        for project_id in projects.values_list("id", flat=True).iterator():
+            indexed = rebuild_project_tag_index(project_id, chunk_size=options["chunk_size"])
+            self.stdout.write(f"Project {project_id}: indexed {indexed} tag links")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.models import Project
+from tasks.importers import DEFAULT_CHUNK_SIZE, FORMATS, TaskImporter, detect_format, read_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Bulk import tasks into a project from a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", type=int)
+        parser.add_argument("path")
+        parser.add_argument("--file-format", choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--user", help="Email of the user recorded as the importer in activity logs")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(pk=options["project_id"])
+        except Project.DoesNotExist as exc:
+            raise CommandError(f"Project {options['project_id']} does not exist") from exc
+        user = None
+        if options["user"]:
+            user = User.objects.filter(email__iexact=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User {options['user']} does not exist")
+        file_format = options["file_format"] or detect_format(options["path"])
+        if file_format is None:
+            raise CommandError("Cannot tell the file format from its name; pass --file-format")
+
+        with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+            importer = TaskImporter(project, user=user, chunk_size=options["chunk_size"])
+            report = importer.run(read_rows(stream, file_format))
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(f"Created {report['created']} tasks, skipped {report['error_count']} rows")
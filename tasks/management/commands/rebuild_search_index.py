@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task
+from tasks.search import index_tasks
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents of tasks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, action="append", help="Limit to these project ids")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.order_by("id")
+        if options["project"]:
+            tasks = tasks.filter(project_id__in=options["project"])
+        chunk, indexed = [], 0
+        for task_id in tasks.values_list("id", flat=True).iterator(chunk_size=options["chunk_size"]):
+            chunk.append(task_id)
+            if len(chunk) >= options["chunk_size"]:
+                index_tasks(chunk)
+                indexed += len(chunk)
+                chunk = []
+        index_tasks(chunk)
+        indexed += len(chunk)
+        self.stdout.write(f"Indexed {indexed} tasks")
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:26
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+# Value of tasks.models.POSITION_STEP when this migration was written
+POSITION_STEP = 1 << 16
+
+
+def spread_positions(apps, schema_editor):
+    # Dense positions keep their relative order; multiplying opens a gap between neighbours.
+    Task = apps.get_model("tasks", "Task")
+    Task.objects.update(position=F("position") * POSITION_STEP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0002_initial'),
+        ('projects', '0003_initial'),
+        ('tasks', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='position',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(spread_positions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['board_list', 'position', 'id'], name='task_list_position_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0002_initial'),
+        ('projects', '0003_initial'),
+        ('tasks', '0002_sparse_positions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'position', 'id'], name='task_project_position_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_tags_gin_index(apps, schema_editor):
+    # jsonb containment (`tags @> '["bug"]'`) only has an index to use on Postgres.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS task_tags_gin_idx ON tasks_task USING gin (tags jsonb_path_ops)"
+        )
+
+
+def drop_tags_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS task_tags_gin_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_version_counter'),
+        ('tasks', '0004_task_changes_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('task_count', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='projects.project')),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_links', to='tasks.tag')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='tasks.task')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['project', 'name'], name='tag_project_prefix_idx', opclasses=('', 'varchar_pattern_ops')),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('project', 'name'), name='tag_unique_project_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='tasktag',
+            constraint=models.UniqueConstraint(fields=('tag', 'task'), name='tasktag_unique_tag_task'),
+        ),
+        migrations.RunPython(create_tags_gin_index, drop_tags_gin_index),
+    ]
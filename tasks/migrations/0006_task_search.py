@@ -0,0 +1,79 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Must match tasks.search.POSTGRES_VECTOR for the planner to use the index.
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', tags), 'B') || "
+    "setweight(to_tsvector('english', description), 'C') || "
+    "setweight(to_tsvector('english', comments), 'D')"
+)
+
+SQLITE_FTS = [
+    # External-content FTS5 table: the text lives once, in tasks_tasksearchdocument.
+    "CREATE VIRTUAL TABLE tasks_task_fts USING fts5("
+    "title, tags, description, comments, content='tasks_tasksearchdocument', content_rowid='task_id')",
+    "CREATE TRIGGER tasks_task_fts_insert AFTER INSERT ON tasks_tasksearchdocument BEGIN "
+    "INSERT INTO tasks_task_fts(rowid, title, tags, description, comments) "
+    "VALUES (new.task_id, new.title, new.tags, new.description, new.comments); END",
+    "CREATE TRIGGER tasks_task_fts_delete AFTER DELETE ON tasks_tasksearchdocument BEGIN "
+    "INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, tags, description, comments) "
+    "VALUES ('delete', old.task_id, old.title, old.tags, old.description, old.comments); END",
+    "CREATE TRIGGER tasks_task_fts_update AFTER UPDATE ON tasks_tasksearchdocument BEGIN "
+    "INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, tags, description, comments) "
+    "VALUES ('delete', old.task_id, old.title, old.tags, old.description, old.comments); "
+    "INSERT INTO tasks_task_fts(rowid, title, tags, description, comments) "
+    "VALUES (new.task_id, new.title, new.tags, new.description, new.comments); END",
+]
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS tasks_search_vector_idx ON tasks_tasksearchdocument USING gin (({POSTGRES_VECTOR}))"
+        )
+    elif connection.vendor == "sqlite" and sqlite_has_fts5(connection):
+        for statement in SQLITE_FTS:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS tasks_search_vector_idx")
+    elif connection.vendor == "sqlite":
+        for trigger in ("insert", "delete", "update"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS tasks_task_fts_{trigger}")
+        schema_editor.execute("DROP TABLE IF EXISTS tasks_task_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_version_counter'),
+        ('tasks', '0005_tag_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSearchDocument',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='tasks.task')),
+                ('title', models.TextField(blank=True)),
+                ('tags', models.TextField(blank=True)),
+                ('description', models.TextField(blank=True)),
+                ('comments', models.TextField(blank=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.project')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+# Priority values and counter columns as of this migration
+PRIORITY_COUNTERS = {"high": "high_priority_count", "medium": "medium_priority_count", "low": "low_priority_count"}
+
+
+def backfill_card_counters(apps, schema_editor):
+    # Lists, boards and projects were added with zeroed counters; fill them from the cards.
+    Task = apps.get_model("tasks", "Task")
+    now = timezone.now()
+    totals = {
+        "task_count": Count("id"),
+        "overdue_count": Count("id", filter=Q(due_date__lt=now)),
+        **{field: Count("id", filter=Q(priority=priority)) for priority, field in PRIORITY_COUNTERS.items()},
+    }
+    for app_label, model_name, path in (
+        ("boards", "BoardList", "board_list"),
+        ("boards", "Board", "board_list__board"),
+        ("projects", "Project", "board_list__board__project"),
+    ):
+        model = apps.get_model(app_label, model_name)
+        rows = Task.objects.order_by().values(path).annotate(**totals)
+        for row in rows.iterator():
+            model.objects.filter(pk=row.pop(path)).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0004_card_counters'),
+        ('projects', '0005_card_counters'),
+        ('tasks', '0007_task_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_card_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date'], name='task_due_idx'),
+        ),
+    ]
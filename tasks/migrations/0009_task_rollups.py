@@ -0,0 +1,53 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:54
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_task_rollups(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+
+    def count(model, **filters):
+        rows = model.objects.filter(task=OuterRef("pk"), **filters).order_by().values("task").annotate(total=Count("id"))
+        return Coalesce(Subquery(rows.values("total"), output_field=IntegerField()), Value(0))
+
+    Subtask = apps.get_model("tasks", "Subtask")
+    Task.objects.update(
+        subtasks_total=count(Subtask),
+        subtasks_done=count(Subtask, completed=True),
+        comments_count=count(apps.get_model("comments", "Comment")),
+        attachments_count=count(apps.get_model("tasks", "Attachment")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_keyset_indexes'),
+        ('tasks', '0008_card_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='attachments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtasks_done',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtasks_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_task_rollups, migrations.RunPython.noop),
+    ]
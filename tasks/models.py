@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from boards.models import BoardList
+from core.tracking import TrackedFieldsMixin
 from projects.models import Project
 
+# Task positions are sparse ranks: neighbours start this far apart so a card can be
+# inserted or moved by writing only its own row (midpoint of the two neighbours).
+POSITION_STEP = 1 << 16
 
-class Task(models.Model):
+
+class Task(TrackedFieldsMixin, models.Model):
 	class PriorityChoices(models.TextChoices):
 		LOW = "low", "Low"
 		MEDIUM = "medium", "Medium"
@@ -22,25 +27,111 @@ class Task(models.Model):
 	assigned_to = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="tasks", on_delete=models.SET_NULL, null=True, blank=True)
 	priority = models.CharField(max_length=10, choices=PriorityChoices.choices, default=PriorityChoices.MEDIUM)
 	status = models.CharField(max_length=100, blank=True)
-	position = models.PositiveIntegerField(default=0)
+	position = models.PositiveBigIntegerField(default=0)
 	tags = models.JSONField(default=list, blank=True)
+	# Rollups of the card's details, kept current by the subtask/comment/attachment receivers.
+	subtasks_total = models.IntegerField(default=0)
+	subtasks_done = models.IntegerField(default=0)
+	comments_count = models.IntegerField(default=0)
+	attachments_count = models.IntegerField(default=0)
 	created_at = models.DateTimeField(default=timezone.now)
 	updated_at = models.DateTimeField(auto_now=True)
 
 	class Meta:
 		ordering = ("position", "id")
+		indexes = [
+			models.Index(fields=("board_list", "position", "id"), name="task_list_position_idx"),
+			models.Index(fields=("project", "position", "id"), name="task_project_position_idx"),
+			models.Index(fields=("project", "updated_at", "id"), name="task_project_changes_idx"),
+			# One per task query operator (tasks.query.OPERATORS)
+			models.Index(fields=("project", "assigned_to", "due_date"), name="task_project_assignee_idx"),
+			models.Index(fields=("project", "priority", "due_date"), name="task_project_priority_idx"),
+			models.Index(fields=("project", "due_date"), name="task_project_due_idx"),
+			models.Index(fields=("project", "status"), name="task_project_status_idx"),
+			models.Index(fields=("due_date",), name="task_due_idx"),
+		]
+
+	tracked_fields = (
+		"board_list_id",
+		"assigned_to_id",
+		"due_date",
+		"priority",
+		"title",
+		"description",
+		"tags",
+		"position",
+	)
 
 	def save(self, *args, **kwargs):
-		# Set status automatically from the list name
-		if self.board_list and self.board_list.name:
-			self.status = self.board_list.name
-		super().save(*args, **kwargs)
+		# Set status automatically from the list name, without loading the list unless it changed
+		list_changed = self._state.adding or "board_list_id" in self.get_field_changes()
+		if list_changed or Task.board_list.is_cached(self):
+			if self.board_list and self.board_list.name:
+				self.status = self.board_list.name
+		# Post-save receivers keep denormalised counters; they commit or roll back with the row.
+		with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+			super().save(*args, **kwargs)
 
 	def __str__(self):
 		return f"{self.title} ({self.project_id})"
 
 
-class Subtask(models.Model):
+# Normalised index of `Task.tags`, kept in sync by tasks.tags; `task_count` is maintained incrementally.
+class Tag(models.Model):
+	project = models.ForeignKey(Project, related_name="tags", on_delete=models.CASCADE)
+	name = models.CharField(max_length=100)
+	task_count = models.PositiveIntegerField(default=0)
+
+	class Meta:
+		ordering = ("name",)
+		constraints = [models.UniqueConstraint(fields=("project", "name"), name="tag_unique_project_name")]
+		# Pattern opclass lets Postgres serve `name LIKE 'prefix%'` from the index under any collation.
+		indexes = [models.Index(fields=("project", "name"), name="tag_project_prefix_idx", opclasses=("", "varchar_pattern_ops"))]
+
+	def __str__(self):
+		return f"{self.name} ({self.project_id})"
+
+
+class TaskTag(models.Model):
+	task = models.ForeignKey(Task, related_name="tag_links", on_delete=models.CASCADE)
+	tag = models.ForeignKey(Tag, related_name="task_links", on_delete=models.CASCADE)
+
+	class Meta:
+		constraints = [models.UniqueConstraint(fields=("tag", "task"), name="tasktag_unique_tag_task")]
+
+	def __str__(self):
+		return f"{self.tag_id} -> {self.task_id}"
+
+
+# Searchable text of a task and its comments, kept current by tasks.search. It is only queried
+# through the full-text index the migrations add (tsvector GIN on Postgres, FTS5 on SQLite).
+class TaskSearchDocument(models.Model):
+	task = models.OneToOneField(Task, primary_key=True, related_name="search_document", on_delete=models.CASCADE)
+	project = models.ForeignKey(Project, related_name="+", on_delete=models.CASCADE)
+	title = models.TextField(blank=True)
+	tags = models.TextField(blank=True)
+	description = models.TextField(blank=True)
+	comments = models.TextField(blank=True)
+
+	def __str__(self):
+		return f"Search document for task {self.task_id}"
+
+
+# Deletion log read by the delta sync feed; `task_id` is the id the deleted task used to have.
+class TaskTombstone(models.Model):
+	project = models.ForeignKey(Project, related_name="task_tombstones", on_delete=models.CASCADE)
+	task_id = models.BigIntegerField()
+	deleted_at = models.DateTimeField(default=timezone.now)
+
+	class Meta:
+		ordering = ("deleted_at", "id")
+		indexes = [models.Index(fields=("project", "deleted_at", "id"), name="tombstone_project_changes_idx")]
+
+	def __str__(self):
+		return f"Deleted task {self.task_id} ({self.project_id})"
+
+
+class Subtask(TrackedFieldsMixin, models.Model):
 	task = models.ForeignKey(Task, related_name="subtasks", on_delete=models.CASCADE)
 	title = models.CharField(max_length=255)
 	description = models.TextField(blank=True)
@@ -52,6 +143,13 @@ class Subtask(models.Model):
 	class Meta:
 		ordering = ("position", "id")
 
+	tracked_fields = ("task_id", "title", "completed")
+
+	def save(self, *args, **kwargs):
+		# The task's subtask rollups are shifted by a post-save receiver in the same transaction.
+		with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+			super().save(*args, **kwargs)
+
 	def __str__(self):
 		return f"{self.title} ({self.task_id})"
 
@@ -65,7 +163,8 @@ class Attachment(models.Model):
 	def save(self, *args, **kwargs):
 		if not self.filename and self.file:
 			self.filename = getattr(self.file, "name", "")
-		super().save(*args, **kwargs)
+		with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+			super().save(*args, **kwargs)
 
 	def __str__(self):
 		return f"{self.filename} ({self.task_id})"
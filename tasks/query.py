@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime, time, timedelta
+from typing import List, NamedTuple, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from boards.models import BoardList
+
+from .models import Task, TaskTag
+
+User = get_user_model()
+
+MAX_TERMS = 20
+# Operators and the index on `tasks_task` (or the tag tables) that serves each of them.
+# Visible tasks are always narrowed to the user's projects first, hence the `project` prefix.
+OPERATORS = {
+    "assignee": "task_project_assignee_idx",
+    "priority": "task_project_priority_idx",
+    "due": "task_project_due_idx",
+    "status": "task_project_status_idx",
+    "list": "task_list_position_idx",
+    "tag": "tag_unique_project_name",
+}
+RELATIVE_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+TERM_RE = re.compile(r'(?P<negated>-?)(?P<key>\w+):(?:"(?P<quoted>[^"]*)"|(?P<value>\S+))')
+DUE_RE = re.compile(r"(?P<op><=|>=|<|>)?(?P<value>.+)")
+RELATIVE_RE = re.compile(r"(?P<amount>\d+)(?P<unit>[hdw])")
+
+
+class Term(NamedTuple):
+    key: str
+    value: str
+    negated: bool
+
+
+def parse_task_query(text: str) -> List[Term]:
+    """
+    Split ``text`` into ``key:value`` terms, e.g. ``assignee:me priority:high due:<7d tag:bug
+    list:"In review"``. A leading ``-`` negates a term and ``a,b`` in a value means either.
+    """
+    terms, position = [], 0
+    text = text.strip()
+    while position < len(text):
+        if text[position].isspace():
+            position += 1
+            continue
+        match = TERM_RE.match(text, position)
+        if match is None:
+            word = text[position:].split(None, 1)[0]
+            raise ValidationError(f"Expected key:value, got '{word}'. Use tasks/search/ for free text.")
+        key = match["key"].lower()
+        if key not in OPERATORS:
+            raise ValidationError(f"Unknown filter '{key}'. Use one of: {', '.join(OPERATORS)}.")
+        value = match["quoted"] if match["quoted"] is not None else match["value"]
+        if not _choices(value):
+            raise ValidationError(f"'{key}:' needs a value.")
+        terms.append(Term(key, value.strip(), bool(match["negated"])))
+        position = match.end()
+    if len(terms) > MAX_TERMS:
+        raise ValidationError(f"At most {MAX_TERMS} filters can be combined.")
+    return terms
+
+
+def is_time_relative(terms: List[Term]) -> bool:
+    """Whether the matching tasks can change without any task changing (``due:<7d``, ``due:overdue``)."""
+    return any(
+        term.key == "due" and term.value.lower() != "none" and _parse_day(DUE_RE.fullmatch(term.value)["value"]) is None
+        for term in terms
+    )
+
+
+def _choices(value: str) -> List[str]:
+    return [choice.strip() for choice in value.split(",") if choice.strip()]
+
+
+def _parse_day(value: str):
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def _start_of_day(day) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _assignee(value: str, user, now: datetime) -> Q:
+    condition = Q()
+    for choice in _choices(value):
+        if choice.lower() == "me":
+            condition |= Q(assigned_to_id=user.pk)
+        elif choice.lower() == "none":
+            condition |= Q(assigned_to__isnull=True)
+        else:
+            condition |= Q(assigned_to_id__in=User.objects.filter(email__iexact=choice).values("id"))
+    return condition
+
+
+def _priority(value: str, user, now: datetime) -> Q:
+    choices = [choice.lower() for choice in _choices(value)]
+    unknown = set(choices) - set(Task.PriorityChoices.values)
+    if unknown:
+        raise ValidationError(
+            f"Unknown priority '{sorted(unknown)[0]}'. Use one of: {', '.join(Task.PriorityChoices.values)}."
+        )
+    return Q(priority__in=choices)
+
+
+def _due(value: str, user, now: datetime) -> Q:
+    lowered = value.lower()
+    if lowered == "none":
+        return Q(due_date__isnull=True)
+    if lowered == "overdue":
+        return Q(due_date__lt=now)
+    if lowered == "today":
+        start = _start_of_day(timezone.localdate(now))
+        return Q(due_date__gte=start, due_date__lt=start + timedelta(days=1))
+
+    match = DUE_RE.fullmatch(value)
+    op, bound = match["op"], match["value"]
+    relative = RELATIVE_RE.fullmatch(bound.lower())
+    if relative is not None:
+        # "due:<7d" is everything due within a week from now, overdue tasks included.
+        moment = now + timedelta(**{RELATIVE_UNITS[relative["unit"]]: int(relative["amount"])})
+        lookup = {"<": "lt", "<=": "lte", ">": "gt", ">=": "gte", None: "lte"}[op]
+        return Q(**{f"due_date__{lookup}": moment})
+    day = _parse_day(bound)
+    if day is None:
+        raise ValidationError(f"Cannot read due date '{value}'. Use e.g. <7d, >2w, 2025-01-31, today, overdue or none.")
+    start = _start_of_day(day)
+    end = start + timedelta(days=1)
+    if op is None:
+        return Q(due_date__gte=start, due_date__lt=end)
+    # A date stands for the whole day, so "<=" and ">" split at its end.
+    lookup, moment = {"<": ("lt", start), "<=": ("lt", end), ">": ("gte", end), ">=": ("gte", start)}[op]
+    return Q(**{f"due_date__{lookup}": moment})
+
+
+def _status(value: str, user, now: datetime) -> Q:
+    return Q(status__in=_choices(value))
+
+
+def _list(value: str, user, now: datetime) -> Q:
+    ids = [int(choice) for choice in _choices(value) if choice.isdigit()]
+    names = [choice for choice in _choices(value) if not choice.isdigit()]
+    condition = Q(board_list_id__in=ids) if ids else Q()
+    for name in names:
+        condition |= Q(board_list_id__in=BoardList.objects.filter(name__iexact=name).values("id"))
+    return condition
+
+
+def _tag(value: str, user, now: datetime) -> Q:
+    # An EXISTS per term, so "tag:a tag:b" needs both tags and "-tag:a" keeps untagged tasks.
+    return Q(Exists(TaskTag.objects.filter(
+        task=OuterRef("pk"),
+        tag__project=OuterRef("project"),
+        tag__name__in=_choices(value),
+    )))
+
+
+COMPILERS = {
+    "assignee": _assignee,
+    "priority": _priority,
+    "due": _due,
+    "status": _status,
+    "list": _list,
+    "tag": _tag,
+}
+
+
+def compile_task_query(text: str, user, now: Optional[datetime] = None) -> Q:
+    """Compile a task query into one ``Q`` over ``Task``; every term must hold."""
+    return compile_terms(parse_task_query(text), user, now)
+
+
+def compile_terms(terms: List[Term], user, now: Optional[datetime] = None) -> Q:
+    now = now or timezone.now()
+    condition = Q()
+    for term in terms:
+        term_condition = COMPILERS[term.key](term.value, user, now)
+        condition &= ~term_condition if term.negated else term_condition
+    return condition
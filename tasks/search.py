@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import re
+from typing import Iterable, List, Sequence
+
+from django.db import connection
+from django.db.models import Q
+
+from comments.models import Comment
+
+from .models import Task, TaskSearchDocument
+
+# Same expression as the GIN index created in migration 0006; Postgres only uses the index
+# when the query repeats it verbatim. Title outranks tags, then description, then comments.
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', tags), 'B') || "
+    "setweight(to_tsvector('english', description), 'C') || "
+    "setweight(to_tsvector('english', comments), 'D')"
+)
+# bm25() column weights for the FTS5 table, in column order (title, tags, description, comments).
+SQLITE_WEIGHTS = "10.0, 5.0, 2.0, 1.0"
+SQLITE_FTS_TABLE = "tasks_task_fts"
+
+
+def index_tasks(task_ids: Iterable[int]) -> None:
+    """(Re)build the search documents of ``task_ids`` with a fixed number of queries."""
+    rows = Task.objects.filter(pk__in=list(task_ids)).values_list("id", "project_id", "title", "description", "tags")
+    _write_documents(list(rows))
+
+
+def index_task(task: Task) -> None:
+    """Like ``index_tasks`` for one in-memory task, without reading its row back."""
+    _write_documents([(task.pk, task.project_id, task.title, task.description, task.tags)])
+
+
+def _write_documents(rows) -> None:
+    if not rows:
+        return
+    task_ids = [row[0] for row in rows]
+    comments = {}
+    for task_id, text in (
+        Comment.objects.filter(task_id__in=task_ids)
+        .order_by("created_at", "id")
+        .values_list("task_id", "text")
+    ):
+        comments.setdefault(task_id, []).append(text)
+    documents = [
+        TaskSearchDocument(
+            task_id=task_id,
+            project_id=project_id,
+            title=title,
+            tags=" ".join(tag for tag in tags or [] if isinstance(tag, str)),
+            description=description,
+            comments="\n".join(comments.get(task_id, [])),
+        )
+        for task_id, project_id, title, description, tags in rows
+    ]
+    existing = set(TaskSearchDocument.objects.filter(pk__in=task_ids).values_list("pk", flat=True))
+    TaskSearchDocument.objects.bulk_update(
+        [document for document in documents if document.task_id in existing],
+        ["project", "title", "tags", "description", "comments"],
+        batch_size=500,
+    )
+    TaskSearchDocument.objects.bulk_create(
+        [document for document in documents if document.task_id not in existing],
+        batch_size=500,
+    )
+
+
+def _sqlite_match(query: str) -> str:
+    # Every word must match; quoting keeps FTS5 operators in user input inert.
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in re.findall(r"\w+", query))
+
+
+def _fts_available() -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def search_task_ids(query: str, project_ids: Sequence[int], limit: int, offset: int = 0) -> List[int]:
+    """
+    Ids of tasks in ``project_ids`` matching ``query``, best match first. Served from the
+    tsvector GIN index on Postgres and the FTS5 table on SQLite; other databases fall back
+    to a substring scan of the search documents.
+    """
+    project_ids = list(project_ids)
+    if not project_ids or not query.strip():
+        return []
+    in_projects = ", ".join(["%s"] * len(project_ids))
+
+    if connection.vendor == "postgresql":
+        sql = (
+            f"SELECT d.task_id FROM tasks_tasksearchdocument d, websearch_to_tsquery('english', %s) query "
+            f"WHERE d.project_id IN ({in_projects}) AND ({POSTGRES_VECTOR}) @@ query "
+            f"ORDER BY ts_rank(({POSTGRES_VECTOR}), query) DESC, d.task_id DESC LIMIT %s OFFSET %s"
+        )
+        params = [query, *project_ids, limit, offset]
+    elif connection.vendor == "sqlite" and _fts_available():
+        match = _sqlite_match(query)
+        if not match:
+            return []
+        sql = (
+            f"SELECT d.task_id FROM {SQLITE_FTS_TABLE} "
+            f"JOIN tasks_tasksearchdocument d ON d.task_id = {SQLITE_FTS_TABLE}.rowid "
+            f"WHERE {SQLITE_FTS_TABLE} MATCH %s AND d.project_id IN ({in_projects}) "
+            f"ORDER BY bm25({SQLITE_FTS_TABLE}, {SQLITE_WEIGHTS}), d.task_id DESC LIMIT %s OFFSET %s"
+        )
+        params = [match, *project_ids, limit, offset]
+    else:
+        matches = Q()
+        for word in query.split():
+            matches &= (
+                Q(title__icontains=word) | Q(tags__icontains=word)
+                | Q(description__icontains=word) | Q(comments__icontains=word)
+            )
+        documents = TaskSearchDocument.objects.filter(matches, project_id__in=project_ids).order_by("-task_id")
+        return list(documents.values_list("task_id", flat=True)[offset:offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
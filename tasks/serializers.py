@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-from django.db.models import Max
 from rest_framework import serializers
 
 from boards.models import BoardList
 from projects.models import Project
 
 from .models import Task, Subtask, Attachment
-from .services import move_task_to_list
+from .services import move_task_to_list, next_position
 
 
 class AttachmentSerializer(serializers.ModelSerializer):
@@ -48,12 +47,27 @@ class TaskSerializer(serializers.ModelSerializer):
             "status",
             "position",
             "tags",
+            "subtasks_total",
+            "subtasks_done",
+            "comments_count",
+            "attachments_count",
             "subtasks",
             "attachments",
             "created_at",
             "updated_at",
         )
-        read_only_fields = ("id", "project", "board_list", "status", "created_at", "updated_at")
+        read_only_fields = (
+            "id",
+            "project",
+            "board_list",
+            "status",
+            "subtasks_total",
+            "subtasks_done",
+            "comments_count",
+            "attachments_count",
+            "created_at",
+            "updated_at",
+        )
 
     def validate(self, attrs):
         project = attrs.get("project") or getattr(self.instance, "project", None)
@@ -64,9 +78,7 @@ class TaskSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         if validated_data.get("position") is None:
-            board_list = validated_data["board_list"]
-            next_pos = board_list.tasks.aggregate(max_pos=Max("position")).get("max_pos") or 0
-            validated_data["position"] = next_pos + 1
+            validated_data["position"] = next_position(validated_data["board_list"])
         task = super().create(validated_data)
         return task
 
@@ -75,7 +87,8 @@ class TaskSerializer(serializers.ModelSerializer):
         board_list = validated_data.get("board_list")
         if board_list and board_list != instance.board_list:
             position = validated_data.get("position")
-            task = move_task_to_list(instance, board_list, position)
+            user = getattr(self.context.get("request"), "user", None)
+            task = move_task_to_list(instance, board_list, position, user=user)
             # Update other fields if provided
             for attr, value in validated_data.items():
                 if attr in ("board_list", "position"):
@@ -84,3 +97,32 @@ class TaskSerializer(serializers.ModelSerializer):
             task.save()
             return task
         return super().update(instance, validated_data)
+
+
+class TaskCardSerializer(TaskSerializer):
+    """A task as drawn on a card: the rollup counters stand in for the nested subtasks and attachments."""
+
+    subtasks = None
+    attachments = None
+
+    class Meta(TaskSerializer.Meta):
+        fields = tuple(name for name in TaskSerializer.Meta.fields if name not in ("subtasks", "attachments"))
+
+
+class TaskImportRowSerializer(serializers.Serializer):
+    """One row of a bulk import file. List and assignee references are resolved per chunk by the importer."""
+
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    board_list = serializers.IntegerField(required=False)
+    list_name = serializers.CharField(required=False, max_length=100)
+    assigned_to = serializers.EmailField(required=False)
+    priority = serializers.ChoiceField(choices=Task.PriorityChoices.choices, default=Task.PriorityChoices.MEDIUM)
+    due_date = serializers.DateTimeField(required=False, allow_null=True, default=None)
+    tags = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+    subtasks = serializers.ListField(child=serializers.CharField(max_length=255), required=False, default=list)
+
+    def validate(self, attrs):
+        if "board_list" not in attrs and "list_name" not in attrs:
+            raise serializers.ValidationError({"board_list": "Provide a board_list id or a list_name."})
+        return attrs
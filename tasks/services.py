@@ -1,53 +1,297 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional, Tuple
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Max, F
+from django.db.models import Case, Count, F, IntegerField, Max, OuterRef, PositiveBigIntegerField, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from .models import Task, Subtask
+from activity.services import create_activity_log
+from comments.models import Comment
+from boards.counters import moved_card_deltas, shift_card_counters
+from boards.models import BoardList
+from boards.services import bump_board_version
+
+from .models import POSITION_STEP, Attachment, Task, Subtask
+
+
+def shift_task_rollups(task_id: int, **deltas: int) -> None:
+    """
+    Mark a task changed because one of its details changed, shifting its rollup counters by
+    ``deltas`` (e.g. ``subtasks_total=1``) in the same UPDATE.
+    """
+    Task.objects.filter(pk=task_id).update(
+        updated_at=timezone.now(),
+        **{field: F(field) + delta for field, delta in deltas.items() if delta},
+    )
+
+
+def recount_task_rollups(tasks) -> int:
+    """Recompute the rollup counters of the ``tasks`` queryset from their details."""
+    def count(model, **filters):
+        rows = model.objects.filter(task=OuterRef("pk"), **filters).order_by().values("task").annotate(total=Count("id"))
+        return Coalesce(Subquery(rows.values("total"), output_field=IntegerField()), Value(0))
+
+    return tasks.update(
+        subtasks_total=count(Subtask),
+        subtasks_done=count(Subtask, completed=True),
+        comments_count=count(Comment),
+        attachments_count=count(Attachment),
+    )
+
+
+def _find_single_move(current_ids: List[int], ordered_ids: List[int]) -> Optional[Tuple[int, int]]:
+    """
+    Return ``(from_index, to_index)`` when ``ordered_ids`` is ``current_ids`` with
+    exactly one item dragged to a new slot, otherwise ``None``.
+    """
+    size = len(current_ids)
+    start = 0
+    while start < size and current_ids[start] == ordered_ids[start]:
+        start += 1
+    if start == size:
+        return None
+    end = size - 1
+    while current_ids[end] == ordered_ids[end]:
+        end -= 1
+    # Dragged upwards: the item at `end` now sits at `start`, the rest slid down by one.
+    if ordered_ids[start] == current_ids[end] and ordered_ids[start + 1:end + 1] == current_ids[start:end]:
+        return end, start
+    # Dragged downwards: the item at `start` now sits at `end`, the rest slid up by one.
+    if ordered_ids[end] == current_ids[start] and ordered_ids[start:end] == current_ids[start + 1:end + 1]:
+        return start, end
+    return None
+
+
+def rank_between(before: Optional[int], after: Optional[int]) -> Optional[int]:
+    """Return a position strictly between two neighbour ranks, or ``None`` when the gap ran out."""
+    lower = before or 0
+    if after is None:
+        return lower + POSITION_STEP
+    if after - lower < 2:
+        return None
+    return (lower + after) // 2
+
+
+def next_position(board_list) -> int:
+    max_pos = board_list.tasks.aggregate(max_pos=Max("position")).get("max_pos") or 0
+    return max_pos + POSITION_STEP
+
+
+def _neighbours_at_slot(board_list_id: int, slot: int, exclude_ids=()) -> Tuple[Optional[int], Optional[int]]:
+    """Ranks of the cards that would sit right before and after 1-based ``slot`` in a list."""
+    ranks = (
+        Task.objects.filter(board_list_id=board_list_id)
+        .exclude(pk__in=exclude_ids)
+        .order_by("position", "id")
+        .values_list("position", flat=True)
+    )
+    if slot <= 1:
+        return None, ranks.first()
+    neighbours = list(ranks[slot - 2:slot])
+    if not neighbours:
+        # Slot lies past the end of the list: append after the last card.
+        return ranks.last(), None
+    return neighbours[0], neighbours[1] if len(neighbours) > 1 else None
+
+
+def _rank_for_slot(board_list_id: int, slot: int) -> Optional[int]:
+    """Rank that places a card at 1-based ``slot`` in a list, or ``None`` when the gap ran out."""
+    return rank_between(*_neighbours_at_slot(board_list_id, slot))
+
+
+def _ranks_between(before: Optional[int], after: Optional[int], count: int) -> Optional[List[int]]:
+    """``count`` increasing ranks spread evenly between two neighbours, or ``None`` when they don't fit."""
+    lower = before or 0
+    if after is None:
+        return [lower + POSITION_STEP * index for index in range(1, count + 1)]
+    step = (after - lower) // (count + 1)
+    if step < 1:
+        return None
+    return [lower + step * index for index in range(1, count + 1)]
+
+
+def lock_list(board_list_id: int) -> None:
+    """
+    Take the list's row lock for the rest of the transaction. Everything that picks ranks from
+    a list's current neighbours takes it first, so none of them interleaves with a rebalance.
+    """
+    list(BoardList.objects.select_for_update().filter(pk=board_list_id).values_list("pk", flat=True))
+
+
+def rebalance_list_positions(board_list_id: int) -> int:
+    """Renumber every card of a list ``POSITION_STEP`` apart, preserving the current order."""
+    with transaction.atomic():
+        lock_list(board_list_id)
+        ordered_ids = list(
+            Task.objects.select_for_update()
+            .filter(board_list_id=board_list_id)
+            .order_by("position", "id")
+            .values_list("id", flat=True)
+        )
+        now = timezone.now()
+        for start in range(0, len(ordered_ids), 1000):
+            chunk = ordered_ids[start:start + 1000]
+            Task.objects.filter(board_list_id=board_list_id, pk__in=chunk).update(
+                position=Case(
+                    *[When(pk=task_id, then=Value((start + index) * POSITION_STEP)) for index, task_id in enumerate(chunk, start=1)],
+                    output_field=PositiveBigIntegerField(),
+                ),
+                updated_at=now,
+            )
+        bump_board_version(lists=board_list_id)
+    return len(ordered_ids)
+
+
+def _schedule_rebalance_if_tight(board_list_id: int, before: Optional[int], rank: int, after: Optional[int]) -> None:
+    # The next insertion into this gap would have nothing left to split: renumber the list
+    # in the background rather than on the request that finally runs out of room.
+    if rank - (before or 0) > 1 and (after is None or after - rank > 1):
+        return
+    from .tasks import rebalance_task_positions
+
+    transaction.on_commit(lambda: rebalance_task_positions.delay(board_list_id))
 
 
 @transaction.atomic
-def reorder_tasks(board_list, ordered_ids: List[int]) -> None:
-    existing_ids = list(board_list.tasks.values_list("id", flat=True))
-    if len(ordered_ids) != len(existing_ids) or set(ordered_ids) != set(existing_ids):
+def reorder_tasks(board_list, ordered_ids: List[int], user=None) -> None:
+    lock_list(board_list.id)
+    rows = list(board_list.tasks.order_by("position", "id").values_list("id", "position"))
+    current_ids = [task_id for task_id, _ in rows]
+    if len(ordered_ids) != len(current_ids) or set(ordered_ids) != set(current_ids):
         raise ValidationError("Order must include all tasks in the list.")
+    if ordered_ids == current_ids:
+        return
 
-    ordering_map = {item_id: idx for idx, item_id in enumerate(ordered_ids, start=1)}
-    tasks = board_list.tasks.all()
-    for task in tasks:
-        new_position = ordering_map.get(task.id)
-        if new_position is None:
-            raise ValidationError("Invalid task id in order payload.")
-        if task.position != new_position:
-            task.position = new_position
-            task.save(update_fields=["position"])
+    now = timezone.now()
+    current_positions = dict(rows)
+    single_move = _find_single_move(current_ids, ordered_ids)
+    rank = None
+    if single_move is not None:
+        # One dragged card: only its own row needs a new rank between its new neighbours.
+        _, to_index = single_move
+        before = current_positions[ordered_ids[to_index - 1]] if to_index > 0 else None
+        after = current_positions[ordered_ids[to_index + 1]] if to_index + 1 < len(ordered_ids) else None
+        rank = rank_between(before, after)
+        if rank is not None:
+            Task.objects.filter(pk=ordered_ids[to_index]).update(position=rank, updated_at=now)
+            _schedule_rebalance_if_tight(board_list.id, before, rank, after)
+            changed = 1
+    if rank is None:
+        changed_tasks = [
+            Task(id=task_id, position=index * POSITION_STEP, updated_at=now)
+            for index, task_id in enumerate(ordered_ids, start=1)
+            if current_positions[task_id] != index * POSITION_STEP
+        ]
+        Task.objects.bulk_update(changed_tasks, ["position", "updated_at"], batch_size=1000)
+        changed = len(changed_tasks)
+
+    if changed:
+        bump_board_version(pk=board_list.board_id)
+        create_activity_log(
+            user=user,
+            action="tasks_reordered",
+            target=board_list,
+            metadata={
+                "project_id": str(board_list.board.project_id),
+                "board_list_id": str(board_list.id),
+                "changed": changed,
+            },
+        )
 
 
 @transaction.atomic
-def move_task_to_list(task: Task, target_list, position: int | None = None) -> Task:
-    if task.board_list == target_list:
+def move_task_to_list(task: Task, target_list, position: int | None = None, user=None) -> Task:
+    if task.board_list_id == target_list.id:
         # nothing to do
         return task
-    # Adjust positions on source list: decrement tasks with position > current
-    source_list = task.board_list
-    source_tasks = source_list.tasks.filter(position__gt=task.position)
-    for t in source_tasks:
-        t.position = t.position - 1
-        t.save(update_fields=["position"])
-
-    # Determine new position in target list
+    source_list_id = task.board_list_id
+    now = timezone.now()
+    lock_list(target_list.id)
+
+    # `position` is the 1-based slot in the target list; translate it into a sparse rank.
     if position is None:
-        max_pos = target_list.tasks.aggregate(max_pos=Max("position")).get("max_pos") or 0
-        position = max_pos + 1
+        rank = next_position(target_list)
     else:
-        # shift existing tasks in target list equal or greater than position
-        target_list.tasks.filter(position__gte=position).update(position=F("position") + 1)
+        rank = _rank_for_slot(target_list.id, position)
+        if rank is None:
+            rebalance_list_positions(target_list.id)
+            rank = _rank_for_slot(target_list.id, position)
 
+    # Only the moved row is written; neither list needs its other cards shifted.
+    Task.objects.filter(pk=task.pk).update(
+        board_list=target_list,
+        position=rank,
+        status=target_list.name,
+        updated_at=now,
+    )
     task.board_list = target_list
-    task.position = position
+    task.position = rank
     task.status = target_list.name
-    task.save(update_fields=["board_list", "position", "status"])
+    task.updated_at = now
+    # Already written and counted: a later task.save() by the caller must not see them as changed.
+    task._snapshot_tracked_fields("board_list_id", "position")
+    shift_card_counters(moved_card_deltas([(source_list_id, task.priority, task.due_date)], target_list.id, now))
+    bump_board_version(lists__in=(source_list_id, target_list.id))
+
+    create_activity_log(
+        user=user,
+        action="task_moved",
+        target=task,
+        metadata={
+            "project_id": str(task.project_id),
+            "from_list": str(source_list_id),
+            "to_list": str(target_list.id),
+        },
+    )
     return task
+
+
+@transaction.atomic
+def move_tasks_to_list(task_ids: List[int], target_list, position: int | None = None, user=None) -> dict:
+    """
+    Move several cards into ``target_list`` as one contiguous block, keeping the order of
+    ``task_ids``. ``position`` is the 1-based slot of the first card among the cards that
+    stay in the target list; ``None`` appends the block to the end.
+    """
+    now = timezone.now()
+    lock_list(target_list.id)
+    if position is None:
+        before = target_list.tasks.exclude(pk__in=task_ids).aggregate(max_pos=Max("position")).get("max_pos")
+        after = None
+    else:
+        before, after = _neighbours_at_slot(target_list.id, position, exclude_ids=task_ids)
+    ranks = _ranks_between(before, after, len(task_ids))
+    if ranks is None:
+        # Not enough room between the neighbours for the whole block: renumber and retry.
+        rebalance_list_positions(target_list.id)
+        before, after = _neighbours_at_slot(target_list.id, position, exclude_ids=task_ids)
+        ranks = _ranks_between(before, after, len(task_ids))
+
+    new_positions = dict(zip(task_ids, ranks))
+    cards = list(Task.objects.filter(pk__in=task_ids).values_list("board_list_id", "priority", "due_date"))
+    Task.objects.filter(pk__in=task_ids).update(
+        board_list=target_list,
+        status=target_list.name,
+        updated_at=now,
+        position=Case(
+            *[When(pk=task_id, then=Value(rank)) for task_id, rank in new_positions.items()],
+            output_field=PositiveBigIntegerField(),
+        ),
+    )
+    shift_card_counters(moved_card_deltas(cards, target_list.id, now))
+    bump_board_version(lists__in={board_list_id for board_list_id, _, _ in cards} | {target_list.id})
+
+    create_activity_log(
+        user=user,
+        action="tasks_moved",
+        target=target_list,
+        metadata={
+            "project_id": str(target_list.board.project_id),
+            "to_list": str(target_list.id),
+            "task_ids": [str(task_id) for task_id in task_ids],
+        },
+    )
+    return new_positions
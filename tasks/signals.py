@@ -1,12 +1,15 @@
 import logging
 from datetime import timedelta
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
 from notifications.tasks import send_task_assigned_email, send_task_due_soon_email
-from .models import Task, Subtask, Attachment
+from .models import Task, Subtask, Attachment, TaskTombstone
+from .search import index_task
+from .services import shift_task_rollups
+from .tags import forget_deleted_task_tags, sync_task_tags
 
 logger = logging.getLogger(__name__)
 
@@ -27,27 +30,21 @@ def log_task_activity(sender, instance, created, **kwargs):
 def detect_task_move(sender, instance, **kwargs):
     if not instance.pk:
         return
-    try:
-        old = Task.objects.get(pk=instance.pk)
-    except Task.DoesNotExist:
-        return
-    if old.board_list_id != instance.board_list_id:
+    changes = instance.get_field_changes()
+    if "board_list_id" in changes:
         logger.info(
             "Task moved",
-            extra={"task_id": instance.id, "from_list": old.board_list_id, "to_list": instance.board_list_id},
+            extra={"task_id": instance.id, "from_list": changes["board_list_id"][0], "to_list": instance.board_list_id},
         )
 
-    old_assignee = getattr(old, "assigned_to_id", None)
-    new_assignee = getattr(instance, "assigned_to_id", None)
-    if new_assignee and new_assignee != old_assignee:
+    new_assignee = instance.assigned_to_id
+    if new_assignee and "assigned_to_id" in changes:
         send_task_assigned_email.delay(task_id=instance.id)
 
-    if new_assignee and instance.due_date:
-        due_changed = getattr(old, "due_date", None) != instance.due_date
-        if due_changed:
-            time_diff = instance.due_date - timezone.now()
-            if timedelta(seconds=0) < time_diff <= timedelta(hours=24):
-                send_task_due_soon_email.delay(task_id=instance.id)
+    if new_assignee and instance.due_date and "due_date" in changes:
+        time_diff = instance.due_date - timezone.now()
+        if timedelta(seconds=0) < time_diff <= timedelta(hours=24):
+            send_task_due_soon_email.delay(task_id=instance.id)
 
 
 @receiver(post_save, sender=Subtask)
@@ -62,3 +59,63 @@ def log_subtask_activity(sender, instance, created, **kwargs):
 def log_attachment_activity(sender, instance, created, **kwargs):
     if created:
         logger.info("Attachment %s added to task %s", instance.id, instance.task_id)
+
+
+@receiver(post_delete, sender=Task)
+def record_task_tombstone(sender, instance, **kwargs):
+    # Lets the delta sync feed report deletions to clients that last synced before it.
+    TaskTombstone.objects.create(project_id=instance.project_id, task_id=instance.pk)
+
+
+# Subtasks and attachments are served inside the task (and counted on it), so the task
+# counts as changed whenever one of them is.
+@receiver(post_save, sender=Subtask)
+def roll_up_saved_subtask(sender, instance, created, **kwargs):
+    if created:
+        shift_task_rollups(instance.task_id, subtasks_total=1, subtasks_done=int(instance.completed))
+        return
+    changes = instance.get_field_changes()
+    if "task_id" in changes:
+        was_completed = changes.get("completed", (instance.completed,))[0]
+        shift_task_rollups(changes["task_id"][0], subtasks_total=-1, subtasks_done=-int(was_completed))
+        shift_task_rollups(instance.task_id, subtasks_total=1, subtasks_done=int(instance.completed))
+    elif "completed" in changes:
+        shift_task_rollups(instance.task_id, subtasks_done=1 if instance.completed else -1)
+    else:
+        shift_task_rollups(instance.task_id)
+
+
+@receiver(post_delete, sender=Subtask)
+def roll_up_deleted_subtask(sender, instance, **kwargs):
+    shift_task_rollups(instance.task_id, subtasks_total=-1, subtasks_done=-int(instance.completed))
+
+
+@receiver(post_save, sender=Attachment)
+def roll_up_saved_attachment(sender, instance, created, **kwargs):
+    shift_task_rollups(instance.task_id, attachments_count=int(created))
+
+
+@receiver(post_delete, sender=Attachment)
+def roll_up_deleted_attachment(sender, instance, **kwargs):
+    shift_task_rollups(instance.task_id, attachments_count=-1)
+
+
+@receiver(post_save, sender=Task)
+def index_task_tags(sender, instance, created, **kwargs):
+    if created:
+        sync_task_tags(instance, [], instance.tags)
+        return
+    changes = instance.get_field_changes()
+    if "tags" in changes:
+        sync_task_tags(instance, *changes["tags"])
+
+
+@receiver(post_delete, sender=Task)
+def unindex_task_tags(sender, instance, **kwargs):
+    forget_deleted_task_tags(instance)
+
+
+@receiver(post_save, sender=Task)
+def index_task_search_document(sender, instance, created, **kwargs):
+    if created or {"title", "description", "tags"} & instance.get_field_changes().keys():
+        index_task(instance)
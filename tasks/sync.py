@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Task, TaskTombstone
+
+CHANGES_PAGE_SIZE = 100
+MAX_CHANGES_PAGE_SIZE = 500
+
+# Position of each stream in the merged feed when an upsert and a deletion share a timestamp.
+UPSERT, TOMBSTONE = 0, 1
+
+Cursor = Tuple  # (changed_at, stream, row_id)
+
+
+def _after(time_field: str, stream: int, cursor: Optional[Cursor]) -> Q:
+    """Rows of ``stream`` that sort after ``cursor`` in ``(changed_at, stream, id)`` order."""
+    if cursor is None:
+        return Q()
+    changed_at, cursor_stream, row_id = cursor
+    condition = Q(**{f"{time_field}__gt": changed_at})
+    if stream > cursor_stream:
+        condition |= Q(**{time_field: changed_at})
+    elif stream == cursor_stream:
+        condition |= Q(**{time_field: changed_at, "id__gt": row_id})
+    return condition
+
+
+def cursor_expired(cursor: Optional[Cursor]) -> bool:
+    """Tombstones older than the retention window are pruned, so such a cursor could miss deletions."""
+    if cursor is None:
+        return False
+    return cursor[0] < timezone.now() - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+
+
+def _oldest_open_transaction() -> Optional[datetime]:
+    """
+    Start of the oldest transaction open in this database (Postgres only, else ``None``). Other
+    roles' sessions are only visible with pg_read_all_stats; the app's own connections always are.
+    """
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT min(xact_start) FROM pg_stat_activity "
+            "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+        )
+        return cursor.fetchone()[0]
+
+
+def settled_before(now: Optional[datetime] = None) -> datetime:
+    """
+    Rows stamped after this may still be joined by rows of transactions that have not
+    committed yet, stamped earlier than them; the feed does not hand them out yet.
+
+    On Postgres this follows commit order: nothing is handed out past the start of the oldest
+    open transaction, however long it runs (import chunks, batch moves, rebalances), and
+    ``TASK_CHANGES_SETTLE_SECONDS`` only covers the skew between application and database
+    clocks. Elsewhere open transactions cannot be seen and the window is all there is: a
+    transaction that commits more than that after stamping its rows is missed by clients
+    whose cursor has moved past them. It is a correctness limit, not a tuning knob.
+    """
+    margin = timedelta(seconds=settings.TASK_CHANGES_SETTLE_SECONDS)
+    settled = (now or timezone.now()) - margin
+    oldest = _oldest_open_transaction()
+    if oldest is not None:
+        settled = min(settled, oldest - margin)
+    return settled
+
+
+def task_changes_since(project, cursor: Optional[Cursor] = None, limit: int = CHANGES_PAGE_SIZE) -> dict:
+    """
+    Task upserts and deletions of ``project`` after ``cursor``, oldest first, at most ``limit``.
+
+    Both streams are read by keyset on their ``(project, changed_at, id)`` index and merged, so
+    a page costs two indexed range scans however large the project is. Rows past
+    ``settled_before()`` are held back until the transactions that could still precede them
+    have committed.
+    """
+    settled = settled_before()
+    upserts = (
+        Task.objects.filter(project=project, updated_at__lte=settled)
+        .filter(_after("updated_at", UPSERT, cursor))
+        .order_by("updated_at", "id")
+        .values_list("updated_at", "id")[: limit + 1]
+    )
+    tombstones = (
+        TaskTombstone.objects.filter(project=project, deleted_at__lte=settled)
+        .filter(_after("deleted_at", TOMBSTONE, cursor))
+        .order_by("deleted_at", "id")
+        .values_list("deleted_at", "id", "task_id")[: limit + 1]
+    )
+    merged = sorted(
+        [(changed_at, UPSERT, task_id, task_id) for changed_at, task_id in upserts]
+        + [(changed_at, TOMBSTONE, row_id, task_id) for changed_at, row_id, task_id in tombstones]
+    )
+    page = merged[:limit]
+    return {
+        "upserts": [task_id for _, stream, _, task_id in page if stream == UPSERT],
+        "deleted": [task_id for _, stream, _, task_id in page if stream == TOMBSTONE],
+        "cursor": page[-1][:3] if page else cursor,
+        "has_more": len(merged) > limit,
+    }
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Iterable, List, Set, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from activity.services import create_activity_log
+from boards.services import bump_board_version
+
+from .models import Tag, Task, TaskTag
+from .search import index_tasks
+
+RENAME_BATCH_SIZE = 1000
+
+# (task_id, tag name)
+TagLink = Tuple[int, str]
+
+
+def clean_tags(tags) -> Set[str]:
+    if not isinstance(tags, (list, tuple)):
+        return set()
+    return {tag.strip() for tag in tags if isinstance(tag, str) and tag.strip()}
+
+
+def _shift_counts(tag_ids: Iterable[int], sign: int) -> None:
+    # One UPDATE per distinct delta, however many tags it covers.
+    by_delta = {}
+    for tag_id, delta in Counter(tag_ids).items():
+        by_delta.setdefault(delta, []).append(tag_id)
+    for delta, ids in by_delta.items():
+        Tag.objects.filter(pk__in=ids).update(task_count=F("task_count") + sign * delta)
+
+
+def add_tag_links(project_id: int, links: List[TagLink]) -> None:
+    """Index ``links`` for tasks of one project, creating missing tags and bumping their counts."""
+    if not links:
+        return
+    names = {name for _, name in links}
+    Tag.objects.bulk_create([Tag(project_id=project_id, name=name) for name in names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(project_id=project_id, name__in=names).values_list("name", "id"))
+    wanted = {(task_id, tag_ids[name]) for task_id, name in links}
+    existing = set(
+        TaskTag.objects.filter(task_id__in={task_id for task_id, _ in wanted}, tag_id__in=tag_ids.values())
+        .values_list("task_id", "tag_id")
+    )
+    new_links = [TaskTag(task_id=task_id, tag_id=tag_id) for task_id, tag_id in wanted - existing]
+    TaskTag.objects.bulk_create(new_links, batch_size=1000)
+    _shift_counts((link.tag_id for link in new_links), 1)
+
+
+def remove_tag_links(project_id: int, links: List[TagLink]) -> None:
+    if not links:
+        return
+    tag_ids = dict(
+        Tag.objects.filter(project_id=project_id, name__in={name for _, name in links}).values_list("name", "id")
+    )
+    doomed = TaskTag.objects.filter(
+        task_id__in={task_id for task_id, _ in links},
+        tag_id__in=tag_ids.values(),
+    ).values_list("id", "task_id", "tag_id")
+    wanted = {(task_id, tag_ids.get(name)) for task_id, name in links}
+    rows = [(link_id, tag_id) for link_id, task_id, tag_id in doomed if (task_id, tag_id) in wanted]
+    TaskTag.objects.filter(pk__in=[link_id for link_id, _ in rows]).delete()
+    _shift_counts((tag_id for _, tag_id in rows), -1)
+
+
+def sync_task_tags(task: Task, old_tags, new_tags) -> None:
+    old, new = clean_tags(old_tags), clean_tags(new_tags)
+    add_tag_links(task.project_id, [(task.pk, name) for name in new - old])
+    remove_tag_links(task.project_id, [(task.pk, name) for name in old - new])
+
+
+def forget_deleted_task_tags(task: Task) -> None:
+    # The TaskTag rows went with the task through the cascade; only the counts are left to fix.
+    names = clean_tags(task.tags)
+    if names:
+        Tag.objects.filter(project_id=task.project_id, name__in=names, task_count__gt=0).update(
+            task_count=F("task_count") - 1
+        )
+
+
+def recount_tags(project_id: int, tag_ids=None) -> None:
+    """Recompute ``task_count`` from the links, for every tag of the project or just ``tag_ids``."""
+    tags = Tag.objects.filter(project_id=project_id)
+    if tag_ids is not None:
+        tags = tags.filter(pk__in=tag_ids)
+    links = TaskTag.objects.filter(tag=OuterRef("pk")).order_by().values("tag").annotate(total=Count("id")).values("total")
+    tags.update(task_count=Coalesce(Subquery(links), Value(0)))
+
+
+def rebuild_project_tag_index(project_id: int, chunk_size: int = 2000) -> int:
+    """Rebuild a project's tag index from ``Task.tags``; used by the backfill command."""
+    TaskTag.objects.filter(tag__project_id=project_id).delete()
+    indexed = 0
+    rows = Task.objects.filter(project_id=project_id).order_by("id").values_list("id", "tags")
+    chunk: List[TagLink] = []
+    for task_id, tags in rows.iterator(chunk_size=chunk_size):
+        chunk.extend((task_id, name) for name in clean_tags(tags))
+        if len(chunk) >= chunk_size:
+            indexed += _index_without_counts(project_id, chunk)
+            chunk = []
+    indexed += _index_without_counts(project_id, chunk)
+    recount_tags(project_id)
+    Tag.objects.filter(project_id=project_id, task_count=0).delete()
+    return indexed
+
+
+def _index_without_counts(project_id: int, links: List[TagLink]) -> int:
+    if not links:
+        return 0
+    names = {name for _, name in links}
+    Tag.objects.bulk_create([Tag(project_id=project_id, name=name) for name in names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(project_id=project_id, name__in=names).values_list("name", "id"))
+    TaskTag.objects.bulk_create(
+        [TaskTag(task_id=task_id, tag_id=tag_ids[name]) for task_id, name in links],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return len(links)
+
+
+@transaction.atomic
+def rename_tag(project, old_name: str, new_name: str, user=None) -> int:
+    """
+    Rename ``old_name`` to ``new_name`` on every task of ``project``, merging into ``new_name``
+    when it already exists. Tagged tasks are found through the index and rewritten with
+    ``bulk_update`` batches; the index itself is moved with a handful of UPDATE/DELETEs.
+    """
+    old_name, new_name = old_name.strip(), new_name.strip()
+    if not old_name or not new_name:
+        raise ValidationError("Tag names cannot be blank.")
+    if old_name == new_name:
+        return 0
+    source = Tag.objects.select_for_update().filter(project=project, name=old_name).first()
+    if source is None:
+        raise ValidationError(f"Tag '{old_name}' does not exist in this project.")
+
+    now = timezone.now()
+    task_ids = list(source.task_links.values_list("task_id", flat=True))
+    for start in range(0, len(task_ids), RENAME_BATCH_SIZE):
+        batch = Task.objects.filter(pk__in=task_ids[start:start + RENAME_BATCH_SIZE]).only("id", "tags")
+        updated = []
+        for task in batch:
+            renamed = [new_name if isinstance(tag, str) and tag.strip() == old_name else tag for tag in task.tags]
+            task.tags = list(dict.fromkeys(renamed))
+            task.updated_at = now
+            updated.append(task)
+        Task.objects.bulk_update(updated, ["tags", "updated_at"])
+        index_tasks(task.pk for task in updated)
+
+    target = Tag.objects.filter(project=project, name=new_name).first()
+    if target is None:
+        source.name = new_name
+        source.save(update_fields=["name"])
+    else:
+        # Merge: tasks already carrying the target keep that link, the rest move over.
+        source.task_links.filter(task__tag_links__tag=target).delete()
+        source.task_links.update(tag=target)
+        source.delete()
+        recount_tags(project.id, tag_ids=[target.id])
+
+    bump_board_version(project=project)
+    create_activity_log(
+        user=user,
+        action="tag_renamed",
+        target=project,
+        metadata={"project_id": str(project.id), "from": old_name, "to": new_name, "tasks": len(task_ids)},
+    )
+    return len(task_ids)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TaskTombstone
+from .services import rebalance_list_positions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def rebalance_task_positions(self, board_list_id: int) -> int:
+    renumbered = rebalance_list_positions(board_list_id)
+    logger.info("Rebalanced %s task positions in list %s", renumbered, board_list_id)
+    return renumbered
+
+
+@shared_task(bind=True)
+def prune_task_tombstones(self) -> int:
+    cutoff = timezone.now() - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    logger.info("Pruned %s task tombstones older than %s", deleted, cutoff)
+    return deleted
@@ -1,12 +1,29 @@
+import io
+from datetime import datetime, timedelta
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from projects.models import Project, ProjectMember
 from teams.models import Team, TeamMember
 from boards.models import Board, BoardList
-from .models import Task
+from comments.models import Comment
+from activity.models import ActivityLog
+from .importers import TaskImporter, read_rows
+from .query import compile_task_query
+from .models import POSITION_STEP, Attachment, Subtask, Tag, Task, TaskTag
+from .services import move_task_to_list, recount_task_rollups, reorder_tasks
+from .tasks import rebalance_task_positions
 
 User = get_user_model()
 
@@ -34,7 +51,7 @@ class TaskApiTests(APITestCase):
 		response = self.client.post(url, payload, format="json")
 		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 		task = Task.objects.get(title="Implement feature")
-		self.assertEqual(task.position, 1)
+		self.assertEqual(task.position, POSITION_STEP)
 		self.assertEqual(task.status, self.list_todo.name)
 
 	def test_move_task_between_lists_and_reorder(self):
@@ -54,3 +71,518 @@ class TaskApiTests(APITestCase):
 		response = self.client.post(reorder_url, {"ordered_ids": [t2.id]}, format="json")
 		self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+	def test_rebalance_renumbers_only_cards_still_in_the_list(self):
+		ranks = (5, 6, 7)
+		cards = [
+			Task.objects.create(project=self.project, board_list=self.list_todo, title=f"Tight {rank}", position=rank)
+			for rank in ranks
+		]
+		other = Task.objects.create(project=self.project, board_list=self.list_progress, title="Elsewhere", position=3)
+		with CaptureQueriesContext(connection) as queries:
+			self.assertEqual(rebalance_task_positions.delay(self.list_todo.id).get(), 3)
+		updates = [query["sql"] for query in queries.captured_queries if query["sql"].startswith('UPDATE "tasks_task"')]
+		self.assertTrue(updates and all('"board_list_id" =' in sql for sql in updates))
+		self.assertEqual(
+			list(Task.objects.filter(board_list=self.list_todo).order_by("position").values_list("id", "position")),
+			[(card.id, index * POSITION_STEP) for index, card in enumerate(cards, start=1)],
+		)
+		other.refresh_from_db()
+		self.assertEqual(other.position, 3)
+
+	def test_move_batch_keeps_selection_order_at_anchor(self):
+		todo = [
+			Task.objects.create(project=self.project, board_list=self.list_todo, title=f"Todo {index}", position=index * POSITION_STEP)
+			for index in range(1, 4)
+		]
+		done = [
+			Task.objects.create(project=self.project, board_list=self.list_progress, title=f"Done {index}", position=index * POSITION_STEP)
+			for index in range(1, 3)
+		]
+		url = reverse("tasks:tasks-move-batch")
+		payload = {"task_ids": [todo[2].id, todo[0].id], "target_list_id": self.list_progress.id, "position": 2}
+		response = self.client.post(url, payload, format="json")
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(
+			list(self.list_progress.tasks.values_list("id", flat=True)),
+			[done[0].id, todo[2].id, todo[0].id, done[1].id],
+		)
+		self.assertEqual(set(self.list_progress.tasks.values_list("status", flat=True)), {self.list_progress.name})
+		self.assertEqual(list(self.list_todo.tasks.values_list("id", flat=True)), [todo[1].id])
+
+	def test_move_batch_requires_manager_role(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Locked", position=POSITION_STEP)
+		# Saved rather than updated in bulk, so the member's ProjectAccess row follows the role.
+		membership = ProjectMember.objects.get(project=self.project, user=self.user)
+		membership.role = ProjectMember.RoleChoices.MEMBER
+		membership.save()
+		url = reverse("tasks:tasks-move-batch")
+		response = self.client.post(url, {"task_ids": [task.id], "target_list_id": self.list_progress.id}, format="json")
+		self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+		task.refresh_from_db()
+		self.assertEqual(task.board_list_id, self.list_todo.id)
+
+	def test_move_batch_rejects_a_non_integer_target_list(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Card", position=POSITION_STEP)
+		url = reverse("tasks:tasks-move-batch")
+		for target_list_id in ("x", [self.list_progress.id]):
+			response = self.client.post(url, {"task_ids": [task.id], "target_list_id": target_list_id}, format="json")
+			self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+	def _list_query_count(self):
+		# Measured with the user's memberships already cached, as on every request but the first.
+		self.client.get(reverse("tasks:tasks-list"))
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(reverse("tasks:tasks-list"))
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		return len(context.captured_queries)
+
+	def test_list_query_count_does_not_grow_with_page_size(self):
+		def add_tasks(count):
+			for _ in range(count):
+				task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Card")
+				task.subtasks.create(title="Step")
+
+		add_tasks(2)
+		small_page = self._list_query_count()
+		add_tasks(18)
+		self.assertEqual(self._list_query_count(), small_page)
+
+	def test_cursor_pagination_follows_list_order(self):
+		tasks = [
+			Task.objects.create(project=self.project, board_list=self.list_todo, title=f"Task {index}", position=index * POSITION_STEP)
+			for index in range(1, 6)
+		]
+		url = reverse("tasks:tasks-list")
+		response = self.client.get(url, {"pagination": "cursor", "page_size": 3, "board_list": self.list_todo.id})
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual([item["id"] for item in response.data["results"]], [task.id for task in tasks[:3]])
+		response = self.client.get(response.data["next"])
+		self.assertEqual([item["id"] for item in response.data["results"]], [task.id for task in tasks[3:]])
+		self.assertIsNone(response.data["next"])
+
+
+	def test_list_etag_changes_when_a_card_moves(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Polled", position=POSITION_STEP)
+		url = reverse("tasks:tasks-list")
+		etag = self.client.get(url)["ETag"]
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+		self.assertEqual(self.client.get(url, {"page": 1}, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+		move_task_to_list(task, self.list_progress)
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data["results"][0]["board_list"], self.list_progress.id)
+
+	@override_settings(TASK_CHANGES_SETTLE_SECONDS=0)
+	def test_changes_feed_pages_upserts_then_reports_deletions(self):
+		tasks = [
+			Task.objects.create(project=self.project, board_list=self.list_todo, title=f"Task {index}", position=index * POSITION_STEP)
+			for index in range(3)
+		]
+		url = reverse("tasks:tasks-changes")
+		synced, cursor, has_more = [], None, True
+		while has_more:
+			params = {"project": self.project.id, "limit": 2}
+			if cursor:
+				params["since"] = cursor
+			response = self.client.get(url, params)
+			self.assertEqual(response.status_code, status.HTTP_200_OK)
+			synced.extend(item["id"] for item in response.data["upserts"])
+			cursor, has_more = response.data["cursor"], response.data["has_more"]
+		self.assertEqual(sorted(synced), sorted(task.id for task in tasks))
+
+		tasks[0].title = "Renamed"
+		tasks[0].save()
+		deleted_id = tasks[1].id
+		tasks[1].delete()
+		response = self.client.get(url, {"project": self.project.id, "since": cursor})
+		self.assertEqual([item["id"] for item in response.data["upserts"]], [tasks[0].id])
+		self.assertEqual(response.data["deleted"], [deleted_id])
+		self.assertFalse(response.data["has_more"])
+
+	@override_settings(TASK_CHANGES_SETTLE_SECONDS=0)
+	def test_changes_feed_waits_for_transactions_still_open(self):
+		task = Task.objects.create(project=self.project, board_list=self.list_todo, title="Committed")
+		Task.objects.filter(pk=task.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+		url = reverse("tasks:tasks-changes")
+		# A long import that began ten minutes ago may still commit rows stamped before this one.
+		with mock.patch("tasks.sync._oldest_open_transaction", return_value=timezone.now() - timedelta(minutes=10)):
+			self.assertEqual(self.client.get(url, {"project": self.project.id}).data["upserts"], [])
+		with mock.patch("tasks.sync._oldest_open_transaction", return_value=None):
+			self.assertEqual([item["id"] for item in self.client.get(url, {"project": self.project.id}).data["upserts"]], [task.id])
+
+	def test_changes_feed_holds_back_unsettled_rows(self):
+		Task.objects.create(project=self.project, board_list=self.list_todo, title="Fresh")
+		response = self.client.get(reverse("tasks:tasks-changes"), {"project": self.project.id})
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data["upserts"], [])
+		self.assertIsNone(response.data["cursor"])
+
+	def test_import_csv_appends_tasks_and_reports_bad_rows(self):
+		existing = Task.objects.create(project=self.project, board_list=self.list_todo, title="Existing", position=POSITION_STEP)
+		content = (
+			"title,list_name,assigned_to,priority,tags,subtasks\n"
+			f"Imported 1,{self.list_todo.name},{self.user.email},high,api;backend,Write;Review\n"
+			f"Imported 2,{self.list_todo.name},,low,,\n"
+			",missing title,,,,\n"
+			f"Imported 3,{self.list_todo.name},stranger@example.com,,,\n"
+		)
+		upload = SimpleUploadedFile("tasks.csv", content.encode(), content_type="text/csv")
+		response = self.client.post(reverse("tasks:tasks-import"), {"project_id": self.project.id, "file": upload})
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(response.data["created"], 2)
+		self.assertEqual([error["line"] for error in response.data["errors"]], [4, 5])
+
+		imported = list(self.list_todo.tasks.exclude(pk=existing.pk))
+		self.assertEqual([task.title for task in imported], ["Imported 1", "Imported 2"])
+		self.assertEqual([task.position for task in imported], [2 * POSITION_STEP, 3 * POSITION_STEP])
+		self.assertEqual(imported[0].assigned_to_id, self.user.id)
+		self.assertEqual(imported[0].tags, ["api", "backend"])
+		self.assertEqual(imported[0].status, self.list_todo.name)
+		self.assertEqual(list(imported[0].subtasks.values_list("title", flat=True)), ["Write", "Review"])
+
+	def test_import_logs_one_activity_entry_per_chunk(self):
+		lines = [f'{{"title": "Row {index}", "board_list": {self.list_progress.id}, "subtasks": ["a"]}}' for index in range(5)]
+		stream = io.StringIO("\n".join(lines) + "\nnot json\n")
+		report = TaskImporter(self.project, user=self.user, chunk_size=2).run(read_rows(stream, "ndjson"))
+		self.assertEqual((report["created"], report["error_count"]), (5, 1))
+		self.assertEqual(Subtask.objects.filter(task__board_list=self.list_progress).count(), 5)
+		self.assertEqual(ActivityLog.objects.filter(action="tasks_imported").count(), 3)
+
+	def test_import_rejects_a_non_integer_project(self):
+		upload = SimpleUploadedFile("tasks.csv", b"title\nImported\n", content_type="text/csv")
+		response = self.client.post(reverse("tasks:tasks-import"), {"project_id": "abc", "file": upload})
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn("project_id", response.data)
+
+
+class TaskOrderingQueryCountTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(email="orderer@example.com", password="StrongPass123")
+		self.team = Team.objects.create(name="Team Order", description="", created_by=self.user)
+		self.project = Project.objects.create(team=self.team, name="Project Order")
+		self.board = Board.objects.create(project=self.project, name="Order Board")
+		# warm the content type cache used by the activity log
+		ContentType.objects.get_for_models(Task, BoardList)
+
+	def _fill_list(self, size):
+		board_list = BoardList.objects.create(board=self.board, name=f"Bulk {size}", position=100 + size)
+		Task.objects.bulk_create(
+			Task(project=self.project, board_list=board_list, title=f"Card {index}", position=index * POSITION_STEP)
+			for index in range(1, size + 1)
+		)
+		return BoardList.objects.select_related("board").get(pk=board_list.pk)
+
+	def _count_queries(self, func):
+		with CaptureQueriesContext(connection) as context:
+			func()
+		return len(context.captured_queries)
+
+	def test_reorder_and_move_query_count_is_independent_of_list_size(self):
+		target = self._fill_list(0)
+		reorder_counts = []
+		move_counts = []
+		for size in (10, 1000, 10000):
+			board_list = self._fill_list(size)
+			ordered_ids = list(board_list.tasks.values_list("id", flat=True))
+			# drag the last card to the top of the list
+			ordered_ids.insert(0, ordered_ids.pop())
+			reorder_counts.append(self._count_queries(lambda: reorder_tasks(board_list, ordered_ids, user=self.user)))
+			self.assertEqual(list(board_list.tasks.values_list("id", flat=True)), ordered_ids)
+
+			task = board_list.tasks.get(pk=ordered_ids[0])
+			move_counts.append(self._count_queries(lambda: move_task_to_list(task, target, 1, user=self.user)))
+			self.assertEqual(list(board_list.tasks.values_list("id", flat=True)), ordered_ids[1:])
+			self.assertEqual(target.tasks.first(), task)
+
+		self.assertEqual(len(set(reorder_counts)), 1, reorder_counts)
+		self.assertEqual(len(set(move_counts)), 1, move_counts)
+		self.assertLessEqual(reorder_counts[0], 8)
+		self.assertEqual(ActivityLog.objects.filter(action="tasks_reordered").count(), 3)
+		self.assertEqual(ActivityLog.objects.filter(action="task_moved").count(), 3)
+		self.assertEqual(ActivityLog.objects.filter(action="task_updated").count(), 0)
+
+	def test_exhausted_gap_renumbers_the_list(self):
+		board_list = self._fill_list(0)
+		first = Task.objects.create(project=self.project, board_list=board_list, title="First", position=1)
+		second = Task.objects.create(project=self.project, board_list=board_list, title="Second", position=2)
+		other = self._fill_list(1).tasks.get()
+
+		move_task_to_list(other, board_list, 2, user=self.user)
+
+		self.assertEqual(list(board_list.tasks.values_list("id", flat=True)), [first.id, other.id, second.id])
+		positions = list(board_list.tasks.values_list("position", flat=True))
+		self.assertTrue(all(later - earlier > 1 for earlier, later in zip(positions, positions[1:])))
+
+
+class TaskChangeTrackingTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(email="tracker@example.com", password="StrongPass123")
+		self.team = Team.objects.create(name="Team Track", description="", created_by=self.user)
+		self.project = Project.objects.create(team=self.team, name="Project Track")
+		self.board = Board.objects.create(project=self.project, name="Track Board")
+		self.list_todo = BoardList.objects.filter(board=self.board).first()
+		self.list_done = BoardList.objects.filter(board=self.board).last()
+		Task.objects.create(project=self.project, board_list=self.list_todo, title="Tracked", position=POSITION_STEP)
+		ContentType.objects.get_for_models(Task)
+
+	def test_update_does_not_refetch_the_row(self):
+		task = Task.objects.get(title="Tracked")
+		task.title = "Renamed"
+		task.board_list_id = self.list_done.id
+		with CaptureQueriesContext(connection) as context:
+			task.save()
+		task_selects = [
+			query["sql"] for query in context.captured_queries
+			if query["sql"].startswith("SELECT") and 'FROM "tasks_task"' in query["sql"]
+		]
+		self.assertEqual(task_selects, [])
+		self.assertEqual(task.status, self.list_done.name)
+		moved = ActivityLog.objects.get(action="task_moved")
+		self.assertEqual(moved.metadata["from_list"], str(self.list_todo.id))
+		self.assertEqual(task.get_field_changes(), {})
+
+	def test_changes_are_diffed_against_the_loaded_values(self):
+		task = Task.objects.get(title="Tracked")
+		task.tags.append("bug")
+		task.priority = Task.PriorityChoices.HIGH
+		self.assertEqual(
+			task.get_field_changes(),
+			{"tags": ([], ["bug"]), "priority": (Task.PriorityChoices.MEDIUM, Task.PriorityChoices.HIGH)},
+		)
+
+
+class TaskTagIndexTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(email="tagger@example.com", password="StrongPass123")
+		team = Team.objects.create(name="Tag Team", description="", created_by=self.user)
+		TeamMember.objects.create(team=team, user=self.user, role=TeamMember.RoleChoices.OWNER)
+		self.project = Project.objects.create(team=team, name="Tagged")
+		ProjectMember.objects.create(project=self.project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+		self.board_list = Board.objects.create(project=self.project, name="Tags").lists.first()
+		self.client.force_authenticate(self.user)
+
+	def _task(self, title, tags):
+		return Task.objects.create(project=self.project, board_list=self.board_list, title=title, tags=tags)
+
+	def _counts(self):
+		return dict(Tag.objects.filter(project=self.project).values_list("name", "task_count"))
+
+	def test_counts_follow_saves_and_deletes(self):
+		first = self._task("First", ["bug", "api"])
+		second = self._task("Second", ["bug"])
+		self.assertEqual(self._counts(), {"bug": 2, "api": 1})
+
+		first.tags = ["api", "ui"]
+		first.save()
+		second.delete()
+		self.assertEqual(self._counts(), {"bug": 0, "api": 1, "ui": 1})
+		self.assertEqual(set(TaskTag.objects.values_list("tag__name", flat=True)), {"api", "ui"})
+
+	def test_autocomplete_and_tag_filter(self):
+		tagged = self._task("Tagged", ["backend", "bug"])
+		self._task("Other", ["backlog", "backend"])
+		response = self.client.get(reverse("tasks:tasks-tags"), {"project": self.project.id, "q": "bac"})
+		self.assertEqual(response.data, [{"name": "backend", "count": 2}, {"name": "backlog", "count": 1}])
+
+		response = self.client.get(reverse("tasks:tasks-list"), {"tag": "bug"})
+		self.assertEqual([item["id"] for item in response.data["results"]], [tagged.id])
+
+	def test_rename_merges_into_existing_tag(self):
+		both = self._task("Both", ["bug", "defect"])
+		only_old = self._task("Old", ["defect", "api"])
+		response = self.client.post(
+			reverse("tasks:tasks-rename-tags"),
+			{"project_id": self.project.id, "from": "defect", "to": "bug"},
+			format="json",
+		)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data["tasks"], 2)
+		both.refresh_from_db()
+		only_old.refresh_from_db()
+		self.assertEqual((both.tags, only_old.tags), (["bug"], ["bug", "api"]))
+		self.assertEqual(self._counts(), {"bug": 2, "api": 1})
+
+	def test_non_integer_project_is_a_bad_request(self):
+		response = self.client.get(reverse("tasks:tasks-tags"), {"project": "abc"})
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn("project", response.data)
+		response = self.client.post(
+			reverse("tasks:tasks-rename-tags"),
+			{"project_id": "abc", "from": "defect", "to": "bug"},
+			format="json",
+		)
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn("project_id", response.data)
+
+	def test_backfill_rebuilds_index_from_json(self):
+		task = self._task("Legacy", [])
+		Task.objects.filter(pk=task.pk).update(tags=["legacy", " legacy ", "ops"])
+		call_command("backfill_task_tags", project=[self.project.id], stdout=io.StringIO())
+		self.assertEqual(self._counts(), {"legacy": 1, "ops": 1})
+
+
+class TaskSearchTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(email="seeker@example.com", password="StrongPass123")
+		team = Team.objects.create(name="Search Team", description="", created_by=self.user)
+		TeamMember.objects.create(team=team, user=self.user, role=TeamMember.RoleChoices.OWNER)
+		self.project = Project.objects.create(team=team, name="Searchable")
+		ProjectMember.objects.create(project=self.project, user=self.user, role=ProjectMember.RoleChoices.MEMBER)
+		self.board_list = Board.objects.create(project=self.project, name="Search").lists.first()
+		other_project = Project.objects.create(team=team, name="Hidden")
+		self.hidden = Task.objects.create(
+			project=other_project,
+			board_list=Board.objects.create(project=other_project, name="Hidden").lists.first(),
+			title="Invoice export",
+		)
+		self.client.force_authenticate(self.user)
+
+	def _search(self, query, **params):
+		response = self.client.get(reverse("tasks:tasks-search"), {"q": query, **params})
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		return response
+
+	def test_ranks_title_matches_above_comment_matches(self):
+		in_comment = Task.objects.create(project=self.project, board_list=self.board_list, title="Billing")
+		Comment.objects.create(task=in_comment, user=self.user, text="The invoice totals are wrong")
+		in_title = Task.objects.create(project=self.project, board_list=self.board_list, title="Invoice layout")
+		response = self._search("invoice")
+		self.assertEqual([item["id"] for item in response.data["results"]], [in_title.id, in_comment.id])
+
+	def test_follows_edits_and_pages(self):
+		tasks = [
+			Task.objects.create(project=self.project, board_list=self.board_list, title=f"Release note {index}")
+			for index in range(3)
+		]
+		tasks[0].title = "Changelog"
+		tasks[0].save()
+		self.assertEqual(self._search("changelog").data["results"][0]["id"], tasks[0].id)
+
+		first_page = self._search("release", page_size=1)
+		self.assertIsNotNone(first_page.data["next"])
+		second_page = self.client.get(first_page.data["next"])
+		self.assertIsNone(second_page.data["next"])
+		self.assertEqual(len(first_page.data["results"]) + len(second_page.data["results"]), 2)
+
+
+
+class TaskQueryLanguageTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(email="filter@example.com", password="StrongPass123")
+		self.other = User.objects.create_user(email="other@example.com", password="StrongPass123")
+		team = Team.objects.create(name="Filter Team", description="", created_by=self.user)
+		TeamMember.objects.create(team=team, user=self.user, role=TeamMember.RoleChoices.OWNER)
+		self.project = Project.objects.create(team=team, name="Filtered")
+		ProjectMember.objects.create(project=self.project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+		ProjectMember.objects.create(project=self.project, user=self.other, role=ProjectMember.RoleChoices.MEMBER)
+		board = Board.objects.create(project=self.project, name="Filters")
+		self.todo = board.lists.first()
+		self.review = BoardList.objects.create(board=board, name="In Review", position=10)
+		self.client.force_authenticate(self.user)
+
+	def _task(self, title, board_list=None, assignee=None, **fields):
+		task = Task.objects.create(project=self.project, board_list=board_list or self.todo, title=title, **fields)
+		if assignee:
+			# Assigned after creation so the assignment e-mail is not sent
+			Task.objects.filter(pk=task.pk).update(assigned_to=assignee)
+		return task
+
+	def _ids(self, query):
+		response = self.client.get(reverse("tasks:tasks-list"), {"q": query})
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		return {item["id"] for item in response.data["results"]}
+
+	def test_combined_terms_narrow_the_list(self):
+		soon = timezone.now() + timedelta(days=2)
+		match = self._task("Match", self.review, self.user, priority="high", due_date=soon, tags=["bug"])
+		self._task("Not mine", self.review, self.other, priority="high", due_date=soon, tags=["bug"])
+		self._task("Later", self.review, self.user, priority="high", due_date=soon + timedelta(days=30), tags=["bug"])
+		self._task("Untagged", self.review, self.user, priority="high", due_date=soon)
+		self._task("Elsewhere", self.todo, self.user, priority="high", due_date=soon, tags=["bug"])
+		self.assertEqual(self._ids('assignee:me priority:high due:<7d tag:bug list:"In Review"'), {match.id})
+
+	def test_negation_choices_and_absolute_dates(self):
+		low = self._task("Low", priority="low", due_date=timezone.make_aware(datetime(2030, 1, 15, 12)), tags=["ops"])
+		medium = self._task("Medium", priority="medium", tags=["bug", "ops"])
+		high = self._task("High", priority="high", assignee=self.other)
+		self.assertEqual(self._ids("priority:low,medium -tag:bug"), {low.id})
+		self.assertEqual(self._ids("due:2030-01-15"), {low.id})
+		self.assertEqual(self._ids("due:none assignee:none"), {medium.id})
+		self.assertEqual(self._ids("assignee:OTHER@example.com"), {high.id})
+		self.assertEqual(self._ids("tag:bug tag:ops"), {medium.id})
+
+	def test_invalid_queries_are_rejected(self):
+		for query in ("priority:urgent", "owner:me", "just words", "due:<soon"):
+			response = self.client.get(reverse("tasks:tasks-list"), {"q": query})
+			self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+			self.assertIn("q", response.data)
+
+	def test_common_predicates_use_an_index(self):
+		for _ in range(3):
+			self._task("Filler", tags=["bug"])
+		visible = Task.objects.filter(project__members__user=self.user)
+		queries = ("assignee:me", "priority:high", "due:<7d", "status:Done", f"list:{self.review.id}", "tag:bug")
+		for query in queries:
+			plan = _query_plan(visible.filter(compile_task_query(query, self.user)))
+			self.assertNotRegex(plan, r"Seq Scan on tasks_task\b|SCAN tasks_task\b", f"{query}\n{plan}")
+
+
+def _query_plan(queryset):
+	if connection.vendor == "postgresql":
+		with transaction.atomic(), connection.cursor() as cursor:
+			# The test tables are tiny; make the planner show which index it would use at scale.
+			cursor.execute("SET LOCAL enable_seqscan = off")
+			return queryset.explain()
+	return queryset.explain()
+
+
+class TaskRollupTests(APITestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(email="rollup@example.com", password="StrongPass123")
+		team = Team.objects.create(name="Rollup Team", description="", created_by=self.user)
+		TeamMember.objects.create(team=team, user=self.user, role=TeamMember.RoleChoices.OWNER)
+		self.project = Project.objects.create(team=team, name="Rolled up")
+		ProjectMember.objects.create(project=self.project, user=self.user, role=ProjectMember.RoleChoices.MANAGER)
+		self.board_list = Board.objects.create(project=self.project, name="Cards").lists.first()
+		self.client.force_authenticate(self.user)
+
+	def _rollups(self, task):
+		return Task.objects.filter(pk=task.pk).values_list(
+			"subtasks_total", "subtasks_done", "comments_count", "attachments_count"
+		).get()
+
+	def test_rollups_follow_detail_saves_and_deletes(self):
+		task = Task.objects.create(project=self.project, board_list=self.board_list, title="Card")
+		other = Task.objects.create(project=self.project, board_list=self.board_list, title="Other")
+		first = Subtask.objects.create(task=task, title="First")
+		Subtask.objects.create(task=task, title="Second", completed=True)
+		Comment.objects.create(task=task, user=self.user, text="Note")
+		Attachment.objects.create(task=task, file="attachments/spec.pdf")
+		self.assertEqual(self._rollups(task), (2, 1, 1, 1))
+
+		first.completed = True
+		first.save()
+		self.assertEqual(self._rollups(task), (2, 2, 1, 1))
+		first.task = other
+		first.save()
+		task.comments.get().delete()
+		task.attachments.get().delete()
+		self.assertEqual((self._rollups(task), self._rollups(other)), ((1, 1, 0, 0), (1, 1, 0, 0)))
+
+		Task.objects.filter(pk=task.pk).update(subtasks_total=9)
+		recount_task_rollups(Task.objects.filter(project=self.project))
+		self.assertEqual(self._rollups(task), (1, 1, 0, 0))
+
+	def test_card_view_drops_nested_arrays(self):
+		task = Task.objects.create(project=self.project, board_list=self.board_list, title="Card")
+		Subtask.objects.create(task=task, title="Step", completed=True)
+		Attachment.objects.create(task=task, file="attachments/spec.pdf")
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(reverse("tasks:tasks-list"), {"view": "card"})
+		card = response.data["results"][0]
+		self.assertNotIn("subtasks", card)
+		self.assertNotIn("attachments", card)
+		self.assertEqual((card["subtasks_done"], card["subtasks_total"], card["attachments_count"]), (1, 1, 1))
+		self.assertFalse([query for query in queries.captured_queries if "tasks_subtask" in query["sql"]])
@@ -1,7 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import TaskViewSet, move_task_view, reorder_tasks_view
+from .views import TaskViewSet, import_tasks_view, move_task_view, move_tasks_batch_view, reorder_tasks_view
 
 router = DefaultRouter()
 router.register(r"", TaskViewSet, basename="tasks")
@@ -9,6 +9,9 @@ router.register(r"", TaskViewSet, basename="tasks")
 app_name = "tasks"
 
 urlpatterns = [
+    # Declared ahead of the router so it is not captured by the task detail route
+    path("move-batch/", move_tasks_batch_view, name="tasks-move-batch"),
+    path("import/", import_tasks_view, name="tasks-import"),
     path("", include(router.urls)),
     path("<int:pk>/move/", move_task_view, name="task-move"),
     path("list/<int:list_pk>/reorder/", reorder_tasks_view, name="tasks-reorder"),
@@ -1,21 +1,52 @@
 from __future__ import annotations
 
+import io
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, parser_classes, permission_classes
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
+from core.conditional import etag_matches, hashed_etag, not_modified
+from core.pagination import KeysetPagination, decode_cursor, encode_cursor
+from core.prefetch import PrefetchPlannerMixin, apply_plan, plan_for_serializer
+from projects.membership import get_memberships
+from projects.models import Project
 from projects.permissions import IsProjectMember, IsProjectManager
-from boards.models import BoardList
+from projects.visibility import visible_to
+from boards.models import Board, BoardList
+
+from .importers import FORMATS, TaskImporter, detect_format, read_rows
+from .models import Tag, Task
+from .serializers import TaskCardSerializer, TaskSerializer
+from .services import move_task_to_list, move_tasks_to_list, reorder_tasks
+from .query import compile_terms, is_time_relative, parse_task_query
+from .search import search_task_ids
+from .sync import CHANGES_PAGE_SIZE, MAX_CHANGES_PAGE_SIZE, cursor_expired, task_changes_since
+from .tags import rename_tag
+
+MAX_BATCH_MOVE = 500
+TAG_SUGGESTIONS = 10
+MAX_TAG_SUGGESTIONS = 100
+SEARCH_PAGE_SIZE = 25
+MAX_SEARCH_PAGE_SIZE = 100
+
 
-from .models import Task
-from .serializers import TaskSerializer
-from .services import move_task_to_list, reorder_tasks
+class TaskPagination(KeysetPagination):
+    ordering = ("position", "id")
 
 
-class TaskViewSet(viewsets.ModelViewSet):
-    queryset = Task.objects.all().select_related("project", "board_list", "assigned_to").prefetch_related("subtasks", "attachments")
+class TaskViewSet(PrefetchPlannerMixin, viewsets.ModelViewSet):
+    queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    pagination_class = TaskPagination
+    filterset_fields = ("project", "board_list")
 
     def get_permissions(self):
         if self.request.method in permissions.SAFE_METHODS:
@@ -24,9 +55,159 @@ class TaskViewSet(viewsets.ModelViewSet):
             permission_classes = (permissions.IsAuthenticated, IsProjectManager)
         return [permission() for permission in permission_classes]
 
+    def get_serializer_class(self):
+        # ?view=card drops the nested subtasks/attachments in favour of their rollup counters
+        if self.action == "list" and self.request.query_params.get("view") == "card":
+            return TaskCardSerializer
+        return super().get_serializer_class()
+
     def get_queryset(self):
         # Users can only see tasks for projects they are a member of
-        return Task.objects.filter(project__members__user=self.request.user).distinct()
+        queryset = visible_to(Task.objects.all(), self.request)
+        tag = self.request.query_params.get("tag")
+        if tag:
+            # Served from the tag index rather than a scan of the JSON column; a task links a
+            # tag name at most once, so this join cannot repeat rows.
+            queryset = queryset.filter(tag_links__tag__name=tag)
+        if self.action == "list" and self._query_terms():
+            try:
+                queryset = queryset.filter(compile_terms(self._query_terms(), self.request.user))
+            except DjangoValidationError as exc:
+                raise ValidationError({"q": exc.messages})
+        return queryset
+
+    def _query_terms(self):
+        # ?q=assignee:me priority:high due:<7d tag:bug list:Review (see tasks.query)
+        if not hasattr(self, "_parsed_query"):
+            try:
+                self._parsed_query = parse_task_query(self.request.query_params.get("q", ""))
+            except DjangoValidationError as exc:
+                raise ValidationError({"q": exc.messages})
+        return self._parsed_query
+
+    def list(self, request, *args, **kwargs):
+        # Every visible card lives on a board of one of the user's projects, so their version
+        # counters (plus the query string) identify the response without building it.
+        versions = list(
+            visible_to(Board.objects.all(), request)
+            .order_by("id")
+            .values_list("id", "version", "project_id", "project__version")
+        )
+        # Relative due dates ("due:<7d") select different cards as time passes.
+        as_of = timezone.now().replace(second=0, microsecond=0) if is_time_relative(self._query_terms()) else None
+        etag = hashed_etag(request.user.pk, request.get_full_path(), versions, as_of)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        project_id = request.query_params.get("project")
+        if not project_id:
+            raise ValidationError({"project": "This field is required."})
+        project = get_object_or_404(visible_to(Project.objects.all(), request, "pk"), pk=project_id)
+        try:
+            limit = min(int(request.query_params.get("limit", CHANGES_PAGE_SIZE)), MAX_CHANGES_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        if limit < 1:
+            raise ValidationError({"limit": "Must be at least 1."})
+
+        since = request.query_params.get("since")
+        cursor = _parse_changes_cursor(since) if since else None
+        if cursor_expired(cursor):
+            return Response(
+                {"detail": "Cursor is older than the deletion log; resync the project."},
+                status=status.HTTP_410_GONE,
+            )
+
+        changes = task_changes_since(project, cursor, limit)
+        tasks = apply_plan(Task.objects.filter(pk__in=changes["upserts"]), plan_for_serializer(Task, TaskSerializer))
+        tasks_by_id = {task.pk: task for task in tasks}
+        # Deleted after being updated within this page: reported only as a deletion.
+        upserts = [tasks_by_id[task_id] for task_id in changes["upserts"] if task_id in tasks_by_id]
+        cursor = changes["cursor"]
+        return Response({
+            "upserts": TaskSerializer(upserts, many=True, context={"request": request}).data,
+            "deleted": changes["deleted"],
+            "cursor": encode_cursor(cursor) if cursor else None,
+            "has_more": changes["has_more"],
+        })
+
+    @action(detail=False, methods=["get"])
+    def tags(self, request):
+        project_id = _parse_project_id(request.query_params.get("project"), "project")
+        project = get_object_or_404(visible_to(Project.objects.all(), request, "pk"), pk=project_id)
+        try:
+            limit = min(int(request.query_params.get("limit", TAG_SUGGESTIONS)), MAX_TAG_SUGGESTIONS)
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        tags = Tag.objects.filter(project=project, task_count__gt=0)
+        prefix = request.query_params.get("q", "").strip()
+        if prefix:
+            tags = tags.filter(name__startswith=prefix)
+        rows = tags.order_by("-task_count", "name").values("name", "task_count")[:limit]
+        return Response([{"name": row["name"], "count": row["task_count"]} for row in rows])
+
+    @action(detail=False, methods=["post"], url_path="tags/rename")
+    def rename_tags(self, request):
+        project = get_object_or_404(Project, pk=_parse_project_id(request.data.get("project_id"), "project_id"))
+        if not get_memberships(request).is_project_manager(project.pk):
+            return Response({"detail": IsProjectManager.message}, status=status.HTTP_403_FORBIDDEN)
+        old_name, new_name = request.data.get("from"), request.data.get("to")
+        if not isinstance(old_name, str) or not isinstance(new_name, str):
+            return Response({"detail": "Provide the tag to rename as 'from' and its new name as 'to'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            updated = rename_tag(project, old_name, new_name, user=request.user)
+        except DjangoValidationError as exc:
+            return Response({"detail": exc.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"from": old_name.strip(), "to": new_name.strip(), "tasks": updated})
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This field is required."})
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+            page_size = min(max(int(request.query_params.get("page_size", SEARCH_PAGE_SIZE)), 1), MAX_SEARCH_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({"detail": "page and page_size must be integers."})
+        project_ids = list(get_memberships(request).project_ids)
+        if request.query_params.get("project"):
+            project_ids = [project_id for project_id in project_ids if str(project_id) == request.query_params["project"]]
+
+        # One extra id tells whether there is a next page without counting every match.
+        task_ids = search_task_ids(query, project_ids, limit=page_size + 1, offset=(page - 1) * page_size)
+        has_next, task_ids = len(task_ids) > page_size, task_ids[:page_size]
+        tasks = apply_plan(Task.objects.filter(pk__in=task_ids), plan_for_serializer(Task, TaskSerializer))
+        tasks_by_id = {task.pk: task for task in tasks}
+        ranked = [tasks_by_id[task_id] for task_id in task_ids if task_id in tasks_by_id]
+        url = request.build_absolute_uri()
+        return Response({
+            "next": replace_query_param(url, "page", page + 1) if has_next else None,
+            "previous": replace_query_param(url, "page", page - 1) if page > 1 else None,
+            "results": TaskSerializer(ranked, many=True, context={"request": request}).data,
+        })
+
+
+def _parse_project_id(value, field):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({field: "A valid integer is required."})
+
+
+def _parse_changes_cursor(value):
+    values = decode_cursor(value)
+    if len(values) != 3 or not all(isinstance(item, int) for item in values[1:]):
+        raise NotFound("Invalid cursor.")
+    changed_at = parse_datetime(values[0]) if isinstance(values[0], str) else None
+    if changed_at is None:
+        raise NotFound("Invalid cursor.")
+    return changed_at, values[1], values[2]
 
 
 @api_view(["POST"])
@@ -38,22 +219,84 @@ def move_task_view(request, pk):
     if not target_list_id:
         return Response({"target_list_id": "This field is required."}, status=status.HTTP_400_BAD_REQUEST)
     target_list = get_object_or_404(BoardList, pk=target_list_id)
-    task = move_task_to_list(task, target_list, int(position) if position is not None else None)
+    task = move_task_to_list(task, target_list, int(position) if position is not None else None, user=request.user)
     return Response(TaskSerializer(task, context={"request": request}).data)
 
 
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated, IsProjectManager])
 def reorder_tasks_view(request, list_pk):
-    board_list = get_object_or_404(BoardList, pk=list_pk)
+    board_list = get_object_or_404(BoardList.objects.select_related("board"), pk=list_pk)
     ordered_ids = request.data.get("ordered_ids")
     if not isinstance(ordered_ids, list) or not ordered_ids:
         return Response({"ordered_ids": "This field must be a list of task ids."}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        reorder_tasks(board_list, ordered_ids)
+        reorder_tasks(board_list, ordered_ids, user=request.user)
     except Exception as exc:
         return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     return Response(status=status.HTTP_204_NO_CONTENT)
-from django.shortcuts import render
 
-# Create your views here.
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def move_tasks_batch_view(request):
+    task_ids = request.data.get("task_ids")
+    target_list_id = request.data.get("target_list_id")
+    position = request.data.get("position")
+    if not isinstance(task_ids, list) or not task_ids:
+        return Response({"task_ids": "This field must be a list of task ids."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(task_ids) > MAX_BATCH_MOVE:
+        return Response({"task_ids": f"At most {MAX_BATCH_MOVE} tasks can be moved at once."}, status=status.HTTP_400_BAD_REQUEST)
+    if not target_list_id:
+        return Response({"target_list_id": "This field is required."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        task_ids = [int(task_id) for task_id in task_ids]
+        target_list_id = int(target_list_id)
+        position = int(position) if position is not None else None
+    except (TypeError, ValueError):
+        return Response(
+            {"detail": "Task ids, target_list_id and position must be integers."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(set(task_ids)) != len(task_ids):
+        return Response({"task_ids": "Task ids must be unique."}, status=status.HTTP_400_BAD_REQUEST)
+
+    target_list = get_object_or_404(BoardList.objects.select_related("board"), pk=target_list_id)
+    task_projects = dict(Task.objects.filter(pk__in=task_ids).values_list("id", "project_id"))
+    if len(task_projects) != len(task_ids):
+        return Response({"task_ids": "Some tasks do not exist."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Every project touched by the batch, checked against the cached roles
+    project_ids = set(task_projects.values()) | {target_list.board.project_id}
+    if not get_memberships(request).manages_all(project_ids):
+        return Response({"detail": IsProjectManager.message}, status=status.HTTP_403_FORBIDDEN)
+    if len(project_ids) > 1:
+        return Response({"task_ids": "All tasks must belong to the target list's project."}, status=status.HTTP_400_BAD_REQUEST)
+
+    new_positions = move_tasks_to_list(task_ids, target_list, position, user=request.user)
+    return Response(
+        {
+            "target_list_id": target_list.id,
+            "tasks": [{"id": task_id, "position": rank} for task_id, rank in new_positions.items()],
+        }
+    )
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+@parser_classes([MultiPartParser])
+def import_tasks_view(request):
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"file": "This field is required."}, status=status.HTTP_400_BAD_REQUEST)
+    file_format = request.data.get("file_format") or detect_format(upload.name)
+    if file_format not in FORMATS:
+        return Response({"file_format": f"Use one of: {', '.join(FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+    project_id = _parse_project_id(request.data.get("project_id") or request.query_params.get("project"), "project_id")
+    project = get_object_or_404(Project, pk=project_id)
+    if not get_memberships(request).is_project_manager(project.pk):
+        return Response({"detail": IsProjectManager.message}, status=status.HTTP_403_FORBIDDEN)
+
+    # Large uploads are spooled to disk by Django; rows are decoded from it as they are read.
+    stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    report = TaskImporter(project, user=request.user).run(read_rows(stream, file_format))
+    return Response(report, status=status.HTTP_201_CREATED if report["created"] else status.HTTP_400_BAD_REQUEST)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from uuid import uuid4
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
@@ -50,6 +50,11 @@ class TeamMember(models.Model):
 	def __str__(self):
 		return f"{self.user} -> {self.team} ({self.role})"
 
+	def save(self, *args, **kwargs):
+		# The member's ProjectAccess rows in this team are rewritten by a post-save receiver in the same transaction.
+		with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+			super().save(*args, **kwargs)
+
 	@property
 	def is_owner(self):
 		return self.role == self.RoleChoices.OWNER
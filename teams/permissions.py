@@ -4,6 +4,8 @@ from typing import Iterable
 
 from rest_framework.permissions import BasePermission
 
+from projects.membership import get_memberships
+
 from .models import Team, TeamMember
 
 
@@ -11,15 +13,15 @@ class BaseTeamPermission(BasePermission):
     required_roles: Iterable[str] = tuple()
 
     def has_object_permission(self, request, view, obj):
-        team = obj if isinstance(obj, Team) else getattr(obj, "team", None)
-        if team is None:
+        team_id = obj.pk if isinstance(obj, Team) else getattr(obj, "team_id", None)
+        if team_id is None:
             return False
-        membership = TeamMember.objects.filter(team=team, user=request.user).first()
-        if not membership:
+        role = get_memberships(request).team_role(team_id)
+        if role is None:
             return False
         if not self.required_roles:
             return True
-        return membership.role in self.required_roles
+        return role in self.required_roles
 
 
 class IsTeamMember(BaseTeamPermission):
@@ -4,6 +4,9 @@ from django.contrib.auth import get_user_model
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import transaction
 
+from projects.access import refresh_project_access
+from projects.membership import invalidate_memberships
+
 from .models import Team, TeamInvite, TeamMember
 
 User = get_user_model()
@@ -46,9 +49,15 @@ def transfer_team_owner(*, team, acting_user, new_owner):
 
     new_membership, _ = TeamMember.objects.get_or_create(team=team, user=new_owner)
     with transaction.atomic():
-        TeamMember.objects.filter(team=team, role=TeamMember.RoleChoices.OWNER).exclude(user=new_owner).update(
-            role=TeamMember.RoleChoices.ADMIN,
+        demoted = list(
+            TeamMember.objects.filter(team=team, role=TeamMember.RoleChoices.OWNER)
+            .exclude(user=new_owner)
+            .values_list("user_id", flat=True)
         )
+        TeamMember.objects.filter(team=team, user_id__in=demoted).update(role=TeamMember.RoleChoices.ADMIN)
+        # A queryset update sends no signals, so the demoted owners' access and cached roles are redone here.
+        refresh_project_access(user_id__in=demoted, project__team_id=team.pk)
+        invalidate_memberships(demoted)
         new_membership.role = TeamMember.RoleChoices.OWNER
         new_membership.save(update_fields=["role"])
         team.created_by = new_owner
@@ -1,10 +1,16 @@
 import logging
 
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from projects.access import refresh_project_access
+from projects.membership import invalidate_memberships
+
 from .models import TeamInvite, TeamMember
 
+User = get_user_model()
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,6 +20,20 @@ def log_membership(sender, instance, created, **kwargs):
         logger.info("User %s joined team %s as %s", instance.user_id, instance.team_id, instance.role)
 
 
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def invalidate_team_memberships(sender, instance, **kwargs):
+    refresh_project_access(user_id=instance.user_id, project__team_id=instance.team_id)
+    invalidate_memberships([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def reset_memberships_of_new_user(sender, instance, created, **kwargs):
+    # A new account must not pick up roles cached for an earlier user with the same id.
+    if created:
+        invalidate_memberships([instance.pk])
+
+
 @receiver(post_save, sender=TeamInvite)
 def log_invite(sender, instance, created, **kwargs):
     if created:
@@ -37,3 +37,7 @@ class TeamApiTests(APITestCase):
 		response = self.client.post(url, {"new_owner_id": new_owner.id}, format="json")
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
 		self.assertTrue(TeamMember.objects.filter(team=self.team, user=new_owner, role=TeamMember.RoleChoices.OWNER).exists())
+
+		# The demotion is a queryset update; the former owner's cached role must not survive it.
+		response = self.client.post(url, {"new_owner_id": self.owner.id}, format="json")
+		self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
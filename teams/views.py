@@ -6,6 +6,8 @@ from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from projects.membership import get_memberships
+
 from .models import Team, TeamMember
 from .permissions import IsTeamAdmin, IsTeamMember, IsTeamOwner
 from .serializers import InviteSerializer, TeamMemberSerializer, TeamSerializer
@@ -20,8 +22,7 @@ class TeamListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         return (
-            Team.objects.filter(members__user=self.request.user)
-            .distinct()
+            Team.objects.filter(pk__in=list(get_memberships(self.request).team_ids))
             .prefetch_related("members__user")
         )
 
@@ -35,8 +36,7 @@ class TeamDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         return (
-            Team.objects.filter(members__user=self.request.user)
-            .distinct()
+            Team.objects.filter(pk__in=list(get_memberships(self.request).team_ids))
             .prefetch_related("members__user")
         )
 
@@ -105,8 +105,7 @@ class TransferOwnerView(APIView):
 	def post(self, request, pk):
 		team = get_object_or_404(Team, pk=pk)
 		self.check_object_permissions(request, team)
-		membership = TeamMember.objects.filter(team=team, user=request.user, role=TeamMember.RoleChoices.OWNER).first()
-		if not membership:
+		if get_memberships(request).team_role(team.pk) != TeamMember.RoleChoices.OWNER:
 			raise PermissionDenied("Only owners can transfer ownership.")
 
 		new_owner_id = request.data.get("new_owner_id")
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import uuid
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+VERSION_KEY = "auth:version:{user_id}"
+USER_KEY = "auth:user:{user_id}:{version}"
+
+
+def _auth_version(user_id) -> str:
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Random versions, as in projects.membership: an evicted key cannot revive an old entry.
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_cached_users(user_ids: Iterable) -> None:
+    """Retire the cached ``request.user`` of ``user_ids``, at once and again on commit."""
+    user_ids = set(user_ids)
+
+    def bump():
+        cache.set_many({VERSION_KEY.format(user_id=user_id): uuid.uuid4().hex for user_id in user_ids}, timeout=None)
+
+    if user_ids:
+        bump()
+        transaction.on_commit(bump)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that keeps the token's user in the cache for
+    ``AUTH_USER_CACHE_SECONDS`` under a per-user version, so authenticated requests do not
+    read the users table. Saving or deleting a user bumps the version (users.signals).
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        key = USER_KEY.format(user_id=user_id, version=_auth_version(user_id))
+        user = cache.get(key)
+        if user is None:
+            # Inactive users are refused here and never cached; deactivating one bumps its version.
+            user = super().get_user(validated_token)
+            cache.set(key, user, timeout=settings.AUTH_USER_CACHE_SECONDS)
+            return user
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    # drf-spectacular matches authenticators by exact class; document this one as jwtAuth too.
+    target_class = CachedJWTAuthentication
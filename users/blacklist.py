@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+logger = logging.getLogger(__name__)
+
+BLOOM_KEY = "token-blacklist:bloom:{day}"
+REBUILD_LOCK_KEY = "token-blacklist:rebuild:{day}"
+REBUILD_CHUNK_SIZE = 5000
+
+
+def _filter_shape() -> Tuple[int, int]:
+    """(bits, hash functions) for TOKEN_BLACKLIST_BLOOM_CAPACITY jtis at TOKEN_BLACKLIST_BLOOM_ERROR_RATE."""
+    capacity, error_rate = settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    return bits, max(1, round(bits / capacity * math.log(2)))
+
+
+def _positions(jti: str) -> List[int]:
+    bits, hashes = _filter_shape()
+    digest = hashlib.blake2b(jti.encode(), digest_size=16).digest()
+    first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+    return [(first + index * second) % bits for index in range(hashes)]
+
+
+def _ready_bit() -> int:
+    # Set once a day's filter holds every blacklisted jti of that day; it lives in the same key
+    # as the filter, so losing the key (eviction, restart) also makes the filter untrusted.
+    return _filter_shape()[0]
+
+
+def expiry_day(expires_at: datetime) -> date:
+    return expires_at.astimezone(dt_timezone.utc).date()
+
+
+def _day_end(day: date) -> datetime:
+    return datetime.combine(day + timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+
+
+# Publishes a rebuilt filter (KEYS[1]) over the live one (KEYS[2]) in one step, keeping bits added
+# to the live key meanwhile. A staging key that lost its ready bit (ARGV[1]) was evicted during
+# the build and is dropped instead, so the live filter stays untrusted.
+PUBLISH_SCRIPT = """
+if redis.call('GETBIT', KEYS[1], ARGV[1]) == 0 then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('BITOP', 'OR', KEYS[1], KEYS[1], KEYS[2])
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('EXPIREAT', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+class _RedisBitmaps:
+    """Filters as Redis bitmaps, shared by every process; SETBIT/GETBIT keep updates atomic."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str, positions: Iterable[int]) -> List[bool]:
+        pipe = self.client.pipeline(transaction=False)
+        for position in positions:
+            pipe.getbit(key, position)
+        return [bool(bit) for bit in pipe.execute()]
+
+    def set(self, key: str, positions: Iterable[int], expires_at: datetime) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for position in positions:
+            pipe.setbit(key, position, 1)
+        pipe.expireat(key, int(expires_at.timestamp()))
+        pipe.execute()
+
+    def rebuild(self, key: str, chunks: Iterable[List[int]], ready: int, expires_at: datetime) -> bool:
+        staging = f"{key}:staging:{uuid.uuid4().hex}"
+        # The ready bit is set first: if the staging key is evicted, the chunks written after it
+        # recreate the key without that bit and the script refuses to publish it.
+        self.set(staging, [ready], expires_at)
+        for positions in chunks:
+            self.set(staging, positions, expires_at)
+        return bool(self.client.eval(PUBLISH_SCRIPT, 2, staging, key, ready, int(expires_at.timestamp())))
+
+
+class _LocalBitmaps:
+    """Filters in process memory, for the local-memory cache, which is per process as well."""
+
+    def __init__(self):
+        self._bitmaps = {}
+        self._lock = threading.Lock()
+
+    def _bitmap(self, key: str, expires_at: Optional[datetime] = None) -> Optional[bytearray]:
+        now = timezone.now()
+        for stale in [name for name, (until, _) in self._bitmaps.items() if until <= now]:
+            del self._bitmaps[stale]
+        if key not in self._bitmaps and expires_at is not None:
+            self._bitmaps[key] = (expires_at, bytearray(_ready_bit() // 8 + 1))
+        entry = self._bitmaps.get(key)
+        return entry[1] if entry else None
+
+    def get(self, key: str, positions: Iterable[int]) -> List[bool]:
+        with self._lock:
+            bitmap = self._bitmap(key)
+            return [bool(bitmap and bitmap[position // 8] & (1 << position % 8)) for position in positions]
+
+    def set(self, key: str, positions: Iterable[int], expires_at: datetime) -> None:
+        with self._lock:
+            bitmap = self._bitmap(key, expires_at)
+            for position in positions:
+                bitmap[position // 8] |= 1 << position % 8
+
+    def rebuild(self, key: str, chunks: Iterable[List[int]], ready: int, expires_at: datetime) -> bool:
+        staging = bytearray(ready // 8 + 1)
+        for positions in [*chunks, [ready]]:
+            for position in positions:
+                staging[position // 8] |= 1 << position % 8
+        with self._lock:
+            live = self._bitmap(key)
+            if live is not None:
+                # Keep what was added to the live filter while this one was being built.
+                merged = int.from_bytes(staging, "little") | int.from_bytes(live, "little")
+                staging = bytearray(merged.to_bytes(len(staging), "little"))
+            self._bitmaps[key] = (expires_at, staging)
+        return True
+
+
+_local_bitmaps = _LocalBitmaps()
+
+
+def _bitmaps():
+    """The filter store matching the cache backend, or None to always ask the database."""
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend.startswith("django_redis."):
+        from django_redis import get_redis_connection
+
+        return _RedisBitmaps(get_redis_connection("default"))
+    if backend == "django.core.cache.backends.locmem.LocMemCache":
+        return _local_bitmaps
+    return None
+
+
+def _kept_until(day: date) -> datetime:
+    # A day past the expiry day; tokens expiring then are rejected without a lookup anyway.
+    return _day_end(day) + timedelta(days=1)
+
+
+def add_to_blacklist_filter(jti: str, expires_at: datetime) -> None:
+    bitmaps = _bitmaps()
+    if bitmaps is not None:
+        day = expiry_day(expires_at)
+        bitmaps.set(BLOOM_KEY.format(day=day.isoformat()), _positions(jti), _kept_until(day))
+
+
+def might_be_blacklisted(jti: str, expires_at: datetime) -> bool:
+    """
+    False when ``jti`` is certainly not blacklisted. Each expiry day has its own filter, so
+    filters age out with the tokens in them; a day whose filter is missing or still being
+    rebuilt answers True (ask the database) and has a rebuild queued.
+    """
+    bitmaps = _bitmaps()
+    if bitmaps is None:
+        return True
+    day = expiry_day(expires_at)
+    *bits, ready = bitmaps.get(BLOOM_KEY.format(day=day.isoformat()), [*_positions(jti), _ready_bit()])
+    if not ready:
+        schedule_filter_rebuild(day)
+        return True
+    return all(bits)
+
+
+def schedule_filter_rebuild(day: date) -> None:
+    if cache.add(REBUILD_LOCK_KEY.format(day=day.isoformat()), True, timeout=300):
+        from .tasks import rebuild_token_blacklist_filter
+
+        rebuild_token_blacklist_filter.delay(day.isoformat())
+
+
+def rebuild_blacklist_filter(day: date) -> int:
+    """
+    Load every blacklisted jti expiring on ``day`` into a new filter, then swap it in for the
+    live one in a single step, ready. Jtis blacklisted meanwhile were added to the live filter
+    by the BlacklistedToken signal and are carried over. Returns the number of jtis loaded.
+    """
+    bitmaps = _bitmaps()
+    if bitmaps is None:
+        return 0
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    jtis = OutstandingToken.objects.filter(
+        blacklistedtoken__isnull=False, expires_at__gte=start, expires_at__lt=_day_end(day)
+    ).values_list("jti", flat=True)
+    count = 0
+
+    def chunks() -> Iterator[List[int]]:
+        nonlocal count
+        positions = []
+        for jti in jtis.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+            positions.extend(_positions(jti))
+            count += 1
+            if count % REBUILD_CHUNK_SIZE == 0:
+                yield positions
+                positions = []
+        yield positions
+
+    key = BLOOM_KEY.format(day=day.isoformat())
+    published = bitmaps.rebuild(key, chunks(), _ready_bit(), _kept_until(day))
+    cache.delete(REBUILD_LOCK_KEY.format(day=day.isoformat()))
+    if published:
+        logger.info("Rebuilt the token blacklist filter for %s with %s jtis", day, count)
+    else:
+        logger.warning("Token blacklist filter for %s was evicted while rebuilding; it stays untrusted", day)
+    return count
+
+
+def prune_expired_tokens(chunk_size: Optional[int] = None) -> int:
+    """
+    Delete expired outstanding tokens, and with them their blacklist entries, ``chunk_size``
+    at a time so no single statement holds locks for long. Tokens expire in roughly id order,
+    so each chunk is read from the front of the primary key. Returns the number deleted.
+    """
+    chunk_size = chunk_size or settings.TOKEN_PRUNE_CHUNK_SIZE
+    expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now()).order_by("pk")
+    deleted = 0
+    while True:
+        ids = list(expired.values_list("pk", flat=True)[:chunk_size])
+        if ids:
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+        if len(ids) < chunk_size:
+            return deleted
+
+
+class FilteredRefreshToken(RefreshToken):
+    """A refresh token that only looks itself up in the blacklist table when the filter says it may be there."""
+
+    def check_blacklist(self) -> None:
+        exp = self.payload.get("exp")
+        if exp is None or might_be_blacklisted(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(exp)):
+            super().check_blacklist()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.blacklist import expiry_day, rebuild_blacklist_filter
+from users.serializers import RefreshSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure /auth/refresh/ latency as the blacklist grows, with and without the blacklist "
+        "filter. Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated blacklist sizes")
+        parser.add_argument("--samples", type=int, default=200, help="Refreshes timed per size and mode")
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        self.stdout.write(f"{'blacklisted':>12} {'filtered p50/p95 ms':>22} {'unfiltered p50/p95 ms':>24}")
+        with transaction.atomic():
+            seeded = 0
+            for size in sizes:
+                seeded += self._seed(size - seeded, options["batch_size"])
+                rebuild_blacklist_filter(expiry_day(self._expires_at()))
+                filtered = self._time(RefreshSerializer, options["samples"])
+                unfiltered = self._time(TokenRefreshSerializer, options["samples"])
+                self.stdout.write(f"{seeded:>12} {filtered:>22} {unfiltered:>24}")
+            transaction.set_rollback(True)
+
+    def _expires_at(self):
+        # Seeded and sampled tokens share an expiry day, so they land in the same filter.
+        return timezone.now() + RefreshToken.lifetime - timedelta(minutes=1)
+
+    def _seed(self, count: int, batch_size: int) -> int:
+        expires_at = self._expires_at()
+        for start in range(0, count, batch_size):
+            tokens = OutstandingToken.objects.bulk_create(
+                OutstandingToken(jti=uuid.uuid4().hex, token="", expires_at=expires_at)
+                for _ in range(min(batch_size, count - start))
+            )
+            BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in tokens)
+        return max(count, 0)
+
+    def _time(self, serializer_class, samples: int) -> str:
+        durations = []
+        for _ in range(samples):
+            token = str(RefreshToken())
+            started = time.perf_counter()
+            serializer_class(data={"refresh": token}).is_valid(raise_exception=True)
+            durations.append((time.perf_counter() - started) * 1000)
+        durations.sort()
+        return f"{statistics.median(durations):.2f}/{durations[int(len(durations) * 0.95) - 1]:.2f}"
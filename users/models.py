@@ -4,6 +4,8 @@ from django.core.validators import EmailValidator
 from django.db import models
 from django.utils import timezone
 
+from core.tracking import TrackedFieldsMixin
+
 from .utils import user_avatar_upload_path
 
 
@@ -40,7 +42,7 @@ class UserManager(BaseUserManager):
 		return self._create_user(email, password, **extra_fields)
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(TrackedFieldsMixin, AbstractBaseUser, PermissionsMixin):
 	"""Custom user model for the Kanban platform."""
 
 	email = models.EmailField(
@@ -64,6 +66,9 @@ class User(AbstractBaseUser, PermissionsMixin):
 	USERNAME_FIELD = "email"
 	REQUIRED_FIELDS: list[str] = []
 
+	# Shown on project members and board cards; see users.signals.
+	tracked_fields = ("email", "name")
+
 	class Meta:
 		ordering = ("-created_at",)
 		verbose_name = "User"
@@ -1,8 +1,9 @@
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 
+from .blacklist import FilteredRefreshToken
 from .services import create_user_account, update_user_profile
 from .utils import build_avatar_response
 
@@ -64,6 +65,10 @@ class LoginSerializer(TokenObtainPairSerializer):
         return data
 
 
+class RefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
+
+
 class ProfileUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -1,8 +1,14 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 
+from boards.services import bump_board_version
 from notifications.tasks import send_welcome_email
+from projects.models import Project
+from .authentication import invalidate_cached_users
+from .blacklist import add_to_blacklist_filter
 from .tasks import notify_profile_updated
 
 User = get_user_model()
@@ -14,3 +20,26 @@ def user_post_save(sender, instance, created, **kwargs):
         send_welcome_email.delay(user_id=str(instance.id))
     else:
         notify_profile_updated.delay(user_id=str(instance.id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers update_user_profile, ChangePasswordSerializer and is_active changes made in the admin.
+    invalidate_cached_users([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def bump_versions_showing_user(sender, instance, created, **kwargs):
+    # Project members and board cards embed the name and email, and their ETags come from the versions.
+    if created or not instance.get_field_changes():
+        return
+    Project.objects.filter(members__user=instance).update(version=F("version") + 1)
+    bump_board_version(lists__tasks__assigned_to=instance)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_blacklisted_token_to_filter(sender, instance, created, **kwargs):
+    # Added before the row commits, so a refresh can never pass the filter once it is visible.
+    if created:
+        add_to_blacklist_filter(instance.token.jti, instance.token.expires_at)
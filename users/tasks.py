@@ -6,6 +6,9 @@ from celery import shared_task
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
+from django.utils.dateparse import parse_date
+
+from .blacklist import prune_expired_tokens, rebuild_blacklist_filter
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -34,3 +37,15 @@ def send_welcome_email(self, user_id: str) -> None:
 @shared_task(bind=True)
 def notify_profile_updated(self, user_id: str) -> None:
     logger.info("Profile updated for user %s", user_id)
+
+
+@shared_task(bind=True)
+def prune_outstanding_tokens(self) -> int:
+    deleted = prune_expired_tokens()
+    logger.info("Pruned %s expired outstanding tokens", deleted)
+    return deleted
+
+
+@shared_task(bind=True)
+def rebuild_token_blacklist_filter(self, day: str) -> int:
+    return rebuild_blacklist_filter(parse_date(day))
@@ -1,7 +1,22 @@
+import re
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .blacklist import (
+	add_to_blacklist_filter,
+	expiry_day,
+	might_be_blacklisted,
+	prune_expired_tokens,
+	rebuild_blacklist_filter,
+)
 
 User = get_user_model()
 
@@ -33,3 +48,92 @@ class UserEndpointsTests(APITestCase):
 		url = reverse("users:user-profile")
 		response = self.client.get(url)
 		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+	def test_authenticated_requests_reuse_the_cached_user(self):
+		login = self.client.post(
+			reverse("users:user-login"),
+			{"email": "existing@example.com", "password": "StrongPass123"},
+			format="json",
+		)
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+		url = reverse("users:user-profile")
+		user_selects = re.compile(r'FROM "users_user" WHERE')
+
+		def profile_user_selects():
+			with CaptureQueriesContext(connection) as queries:
+				response = self.client.get(url)
+			self.assertEqual(response.status_code, status.HTTP_200_OK)
+			return response, [query["sql"] for query in queries if user_selects.search(query["sql"])]
+
+		_, cold = profile_user_selects()
+		self.assertEqual(len(cold), 1)
+		_, warm = profile_user_selects()
+		self.assertEqual(warm, [])
+
+		response = self.client.patch(url, {"name": "Renamed"}, format="json")
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		response, reloaded = profile_user_selects()
+		self.assertEqual(len(reloaded), 1)
+		self.assertEqual(response.data["name"], "Renamed")
+
+		response = self.client.post(
+			reverse("users:user-change-password"),
+			{"old_password": "StrongPass123", "new_password": "EvenStronger456"},
+			format="json",
+		)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.user.refresh_from_db()
+		self.user.is_active = False
+		self.user.save()
+		self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+	def test_refresh_consults_the_blacklist_table_only_on_a_filter_match(self):
+		login = self.client.post(
+			reverse("users:user-login"),
+			{"email": "existing@example.com", "password": "StrongPass123"},
+			format="json",
+		)
+		url = reverse("users:token-refresh")
+		blacklist_lookup = re.compile(r'FROM "token_blacklist_blacklistedtoken" INNER JOIN')
+
+		def refresh(token):
+			with CaptureQueriesContext(connection) as queries:
+				response = self.client.post(url, {"refresh": token}, format="json")
+			return response, [query["sql"] for query in queries if blacklist_lookup.search(query["sql"])]
+
+		response, _ = refresh(login.data["refresh"])
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		rotated = response.data["refresh"]
+
+		response, lookups = refresh(rotated)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(lookups, [])
+
+		response, lookups = refresh(login.data["refresh"])
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+		self.assertEqual(len(lookups), 1)
+		self.assertEqual(refresh(rotated)[0].status_code, status.HTTP_401_UNAUTHORIZED)
+
+	def test_rebuilt_filter_keeps_jtis_added_while_it_was_built(self):
+		expires_at = timezone.now() + timedelta(hours=1)
+		token = OutstandingToken.objects.create(user=self.user, jti="stored", token="", expires_at=expires_at)
+		BlacklistedToken.objects.create(token=token)
+		# Blacklisted by the signal after the rebuild read the table, so only the live filter has it.
+		add_to_blacklist_filter("late", expires_at)
+
+		self.assertEqual(rebuild_blacklist_filter(expiry_day(expires_at)), 1)
+		self.assertTrue(might_be_blacklisted("stored", expires_at))
+		self.assertTrue(might_be_blacklisted("late", expires_at))
+		self.assertFalse(might_be_blacklisted("never-blacklisted", expires_at))
+
+	def test_prune_expired_tokens_in_chunks(self):
+		now = timezone.now()
+		tokens = OutstandingToken.objects.bulk_create(
+			OutstandingToken(user=self.user, jti=f"jti-{index}", token="", expires_at=now + timedelta(hours=offset))
+			for index, offset in enumerate((-3, -2, -1, 1, 2))
+		)
+		BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in tokens[1:4])
+
+		self.assertEqual(prune_expired_tokens(chunk_size=2), 3)
+		self.assertEqual(set(OutstandingToken.objects.values_list("jti", flat=True)), {"jti-3", "jti-4"})
+		self.assertEqual(list(BlacklistedToken.objects.values_list("token__jti", flat=True)), ["jti-3"])
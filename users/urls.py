@@ -1,14 +1,13 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 
-from .views import ChangePasswordView, LoginView, ProfileView, RegisterView
+from .views import ChangePasswordView, LoginView, ProfileView, RefreshView, RegisterView
 
 app_name = "users"
 
 urlpatterns = [
     path("auth/register/", RegisterView.as_view(), name="user-register"),
     path("auth/login/", LoginView.as_view(), name="user-login"),
-    path("auth/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
+    path("auth/refresh/", RefreshView.as_view(), name="token-refresh"),
     path("me/", ProfileView.as_view(), name="user-profile"),
     path("me/change-password/", ChangePasswordView.as_view(), name="user-change-password"),
 ]
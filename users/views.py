@@ -2,13 +2,14 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .permissions import IsAuthenticated, IsOwner
 from .serializers import (
 	ChangePasswordSerializer,
 	LoginSerializer,
 	ProfileUpdateSerializer,
+	RefreshSerializer,
 	RegisterSerializer,
 	UserSerializer,
 )
@@ -38,6 +39,10 @@ class LoginView(TokenObtainPairView):
 	serializer_class = LoginSerializer
 
 
+class RefreshView(TokenRefreshView):
+	serializer_class = RefreshSerializer
+
+
 class ProfileView(generics.RetrieveUpdateAPIView):
 	permission_classes = (IsAuthenticated, IsOwner)
 